@@ -0,0 +1,137 @@
+"""
+Async counterpart of DRF's APIView for hot read endpoints under ASGI.
+
+DRF views are synchronous, so under an ASGI server every request holds a
+thread for its whole duration. AsyncAPIView authenticates, checks
+permissions and runs its handler on the event loop, and handlers query with
+the async ORM. Serializers only ever see rows that are already loaded, so
+they never touch the database.
+
+Permissions may provide `ahas_permission`/`ahas_object_permission`
+coroutines. Plain DRF permissions are called directly and must therefore
+only read request.user, which for a Principal means token claims.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .authentication import PrincipalJWTAuthentication
+
+
+async def _check(permission, name, *args):
+    check = getattr(permission, f'a{name}', None)
+    if check is not None:
+        return await check(*args)
+    return getattr(permission, name)(*args)
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async APIView: GET handlers return a DRF Response (rendered here
+    by the configured renderer the client accepts, JSON by default) or a
+    plain HttpResponse.
+    """
+    authentication_classes = [PrincipalJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    # The browsable API needs a full APIView
+    renderer_classes = [
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+        if not issubclass(renderer, BrowsableAPIRenderer)
+    ]
+    content_negotiation_class = DefaultContentNegotiation
+    http_method_names = ['get']
+    # Read by permission classes shared with the viewsets
+    action = None
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request)
+        self.request, self.args, self.kwargs = request, args, kwargs
+        try:
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            await self.ainitial(request)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(request, response)
+
+    async def ainitial(self, request):
+        request.user, request.auth = AnonymousUser(), None
+        for authenticator in self.get_authenticators():
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                request.user, request.auth = result
+                break
+        await self.acheck_permissions(request)
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await _check(permission, 'has_permission', request, self):
+                self.permission_denied(request, permission)
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await _check(permission, 'has_object_permission', request, self, obj):
+                self.permission_denied(request, permission)
+
+    def permission_denied(self, request, permission):
+        if not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(
+            getattr(permission, 'message', None), getattr(permission, 'code', None)
+        )
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            exc = exceptions.NotFound(*exc.args)
+        elif isinstance(exc, PermissionDenied):
+            exc = exceptions.PermissionDenied(*exc.args)
+        if not isinstance(exc, exceptions.APIException):
+            raise exc
+
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As in DRF: 401 with a challenge when an authenticator provides one
+            challenge = self.get_authenticators()[0].authenticate_header(self.request)
+            if challenge:
+                exc.status_code = status.HTTP_401_UNAUTHORIZED
+                headers['WWW-Authenticate'] = challenge
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = str(int(exc.wait))
+
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return Response(data, status=exc.status_code, headers=headers)
+
+    def finalize_response(self, request, response):
+        if isinstance(response, Response):
+            renderers = [renderer() for renderer in self.renderer_classes]
+            try:
+                renderer, media_type = self.content_negotiation_class().select_renderer(request, renderers)
+            except exceptions.NotAcceptable:
+                renderer, media_type = renderers[0], renderers[0].media_type
+            response.accepted_renderer = renderer
+            response.accepted_media_type = media_type
+            response.renderer_context = {'view': self, 'request': request, 'response': response}
+            response.render()
+        if len(self.renderer_classes) > 1:
+            # As in DRF: the body depends on the negotiated renderer
+            patch_vary_headers(response, ['Accept'])
+        return response
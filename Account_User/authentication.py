@@ -0,0 +1,209 @@
+"""
+Stateless JWT authentication.
+
+Requests authenticated with a token carrying principal claims (see
+Account_User.tokens) get a Principal instead of a User instance, so hot
+read paths never load the User row. Attributes that are not claims fall
+through to a lazily loaded User.
+
+When a user's principal attributes change, or the user is deleted,
+revoke_principal() records a revocation time and access tokens issued up to
+it are rejected until the client refreshes. Access tokens carry a
+sub-second `iat` (PrincipalAccessToken), so one minted earlier in the same
+second as the revocation is rejected too.
+
+Revocations are stored in the PrincipalRevocation table; the Django cache
+only fronts it, so an evicted entry costs a query, never a revocation. The
+cache must still be shared by every worker (system check
+Account_User.E001), or one worker keeps serving the "not revoked" it cached
+before another revoked the user.
+
+aauthenticate() is the same flow for async views; with principal tokens it
+awaits nothing but the revocation lookup.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from Mtambo_BackendApis import db_router
+from .models import PrincipalRevocation
+from .tokens import PRINCIPAL_CLAIMS
+
+User = get_user_model()
+
+REVOCATION_KEY = 'principal-revoked:{}'
+
+
+def get_cache_timeout():
+    # No entry needs to outlive the tokens it judges
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def revoke_principal(user_id):
+    """
+    Reject access tokens issued for this user before now.
+    """
+    revoked_at = time.time()
+    PrincipalRevocation.objects.bulk_create(
+        [PrincipalRevocation(user_id=user_id, revoked_at=revoked_at)],
+        update_conflicts=True,
+        unique_fields=['user_id'],
+        update_fields=['revoked_at'],
+    )
+    key = REVOCATION_KEY.format(user_id)
+    cache.set(key, revoked_at, timeout=get_cache_timeout())
+    # Again once committed, over any entry a reader filled from the
+    # uncommitted table in between
+    transaction.on_commit(lambda: cache.set(key, revoked_at, timeout=get_cache_timeout()))
+
+
+def is_revoked(token):
+    user_id = token[api_settings.USER_ID_CLAIM]
+    revoked_at = cache.get(REVOCATION_KEY.format(user_id))
+    if revoked_at is None:
+        # A replica may not have the revocation yet
+        with db_router.primary():
+            revoked_at = PrincipalRevocation.objects.filter(
+                user_id=user_id
+            ).values_list('revoked_at', flat=True).first() or 0.0
+        # add(), not set(): never replace a revocation recorded meanwhile
+        cache.add(REVOCATION_KEY.format(user_id), revoked_at, timeout=get_cache_timeout())
+    return token.get('iat', 0) <= revoked_at
+
+
+async def ais_revoked(token):
+    user_id = token[api_settings.USER_ID_CLAIM]
+    revoked_at = await cache.aget(REVOCATION_KEY.format(user_id))
+    if revoked_at is None:
+        with db_router.primary():
+            revoked_at = await PrincipalRevocation.objects.filter(
+                user_id=user_id
+            ).values_list('revoked_at', flat=True).afirst() or 0.0
+        await cache.aadd(REVOCATION_KEY.format(user_id), revoked_at, timeout=get_cache_timeout())
+    return token.get('iat', 0) <= revoked_at
+
+
+def load_user(user):
+    """
+    Return the User row behind request.user, loading it for a Principal.
+    """
+    return user.user if isinstance(user, Principal) else user
+
+
+class Principal(TokenUser):
+    """
+    Authenticated caller built from signed token claims.
+    """
+
+    @cached_property
+    def id(self):
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def account_type(self):
+        return self.token['account_type']
+
+    @cached_property
+    def is_superuser(self):
+        return self.token['is_superuser']
+
+    @cached_property
+    def is_staff(self):
+        return self.token['is_staff']
+
+    @cached_property
+    def is_active(self):
+        return self.token['is_active']
+
+    @cached_property
+    def administered_company_id(self):
+        company_id = self.token['company_id']
+        return models.UUIDField().to_python(company_id) if company_id else None
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.pk)
+
+    def __str__(self):
+        return f"Principal {self.id}"
+
+    def __eq__(self, other):
+        if isinstance(other, models.Model):
+            return isinstance(other, User) and other.pk == self.pk
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __getattr__(self, attr):
+        # Anything that is not a claim (email, profiles, set_password...) comes from the row
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that returns a Principal for tokens with principal claims
+    and falls back to loading the User for older tokens.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in PRINCIPAL_CLAIMS):
+            return super().get_user(validated_token)
+
+        self.check_principal_claims(validated_token)
+        if is_revoked(validated_token):
+            raise self.revoked()
+        return Principal(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if not all(claim in validated_token for claim in PRINCIPAL_CLAIMS):
+            # Older tokens need the User row; simplejwt only loads it synchronously
+            return await sync_to_async(super().get_user)(validated_token)
+
+        self.check_principal_claims(validated_token)
+        if await ais_revoked(validated_token):
+            raise self.revoked()
+        return Principal(validated_token)
+
+    def check_principal_claims(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise AuthenticationFailed(_('Token contained no recognizable user identification'))
+
+        if not validated_token['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+    def revoked(self):
+        return AuthenticationFailed(
+            _('Token claims are out of date, refresh the token'), code='token_revoked'
+        )
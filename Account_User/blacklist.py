@@ -0,0 +1,165 @@
+"""
+In-memory Bloom filter in front of the refresh-token blacklist.
+
+simplejwt checks every refresh token against BlacklistedToken, a table that
+keeps growing until compact_token_blacklist purges expired rows. The filter
+holds the JTIs of blacklisted tokens, so a token it has never seen is
+accepted without a query; only filter hits (real, or false positives at about
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE) are confirmed against the database.
+
+Each process builds its filter from the table on first use and keeps it
+current by:
+
+* adding the JTI whenever a BlacklistedToken is saved (Account_User.signals);
+* watching a generation key in the cache, replaced whenever such a save
+  commits, and pulling newly blacklisted rows when it changes or when the
+  last sync is older than TOKEN_BLACKLIST_SYNC_INTERVAL seconds.
+
+Logouts in one process reach the others through the generation key, so the
+filter is only trusted when that key can be read from a shared cache. With a
+process-local cache, or while the key is missing, every token is confirmed
+against the database.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from Mtambo_BackendApis.bloom import BloomFilter
+from Mtambo_BackendApis.caches import is_shared
+
+GENERATION_KEY = 'token-blacklist:generation'
+
+
+def get_capacity():
+    return getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 1_000_000)
+
+
+def get_error_rate():
+    return getattr(settings, 'TOKEN_BLACKLIST_BLOOM_ERROR_RATE', 0.001)
+
+
+def get_sync_interval():
+    return getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 30)
+
+
+class BlacklistFilter:
+    """
+    Process-local Bloom filter of blacklisted JTIs, synced from the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._generation = None
+        self._synced_at = 0.0
+        # Each sync re-reads the rows added since the one before it, so a
+        # blacklisting that commits out of id order is still picked up.
+        self._floor_id = 0
+        self._max_id = 0
+
+    def might_contain(self, jti):
+        generation = self._confirmed_generation()
+        if generation is None:
+            # Blacklistings made by other processes cannot be seen
+            return True
+        return jti in self._current(generation)
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is None:
+                return
+            self._bloom.add(jti)
+            if self._bloom.saturated:
+                # Past capacity the error rate climbs; rebuild larger on next use
+                self._bloom = None
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+    def _fresh(self, bloom, generation):
+        return (
+            bloom is not None
+            and generation == self._generation
+            and time.monotonic() - self._synced_at < get_sync_interval()
+        )
+
+    @staticmethod
+    def _confirmed_generation():
+        """
+        Return the shared generation, or None if there is none to go by.
+        """
+        if not is_shared():
+            return None
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            # Never set, or evicted: start one, which also resyncs every process
+            cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def _current(self, generation):
+        # The generation is read before the table so a concurrent bump is never lost
+        bloom = self._bloom
+        if self._fresh(bloom, generation):
+            return bloom
+        with self._lock:
+            if self._bloom is None:
+                self._rebuild()
+            elif not self._fresh(self._bloom, generation):
+                self._sync()
+            self._generation = generation
+            self._synced_at = time.monotonic()
+            return self._bloom
+
+    def _rebuild(self):
+        max_id = BlacklistedToken.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        # Expired tokens fail verification on their own and need no entry
+        jtis = BlacklistedToken.objects.filter(
+            id__lte=max_id, token__expires_at__gt=timezone.now()
+        ).values_list('token__jti', flat=True)
+
+        bloom = BloomFilter(max(get_capacity(), jtis.count() * 2), get_error_rate())
+        bloom.update(jtis.iterator(chunk_size=10000))
+        self._bloom = bloom
+        self._floor_id = self._max_id = max_id
+
+    def _sync(self):
+        rows = BlacklistedToken.objects.filter(id__gt=self._floor_id).values_list('id', 'token__jti')
+        max_id = self._max_id
+        for row_id, jti in rows:
+            self._bloom.add(jti)
+            max_id = max(max_id, row_id)
+        self._floor_id, self._max_id = self._max_id, max_id
+
+
+_filter = BlacklistFilter()
+
+
+def might_be_blacklisted(jti):
+    """
+    Return False only if `jti` is certainly not blacklisted.
+    """
+    return _filter.might_contain(jti)
+
+
+def record(jti):
+    """
+    Add a newly blacklisted JTI here and, once committed, in other processes.
+    """
+    _filter.add(jti)
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
+
+
+def reset():
+    """
+    Drop the filter so the next check rebuilds it from the database.
+    """
+    _filter.reset()
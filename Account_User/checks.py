@@ -0,0 +1,45 @@
+from django.core.checks import Error, Tags, register
+
+from Mtambo_BackendApis.caches import is_shared
+from . import response_cache
+
+
+@register(Tags.caches, Tags.security)
+def check_revocation_cache(app_configs, **kwargs):
+    """
+    Revocation lookups are cached; a process-local cache keeps a demoted or
+    deleted user's access token valid in every worker that cached it before
+    another worker revoked it.
+    """
+    if is_shared():
+        return []
+    return [Error(
+        "The default cache is process-local, so principal revocations "
+        "(Account_User.authentication) only replace the cached lookups of the "
+        "process that made them.",
+        hint=(
+            "Configure CACHES['default'] with a backend shared by every worker, "
+            "or silence Account_User.E001 when a single process serves requests."
+        ),
+        id='Account_User.E001',
+    )]
+
+
+@register(Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    """
+    A write invalidates cached responses only in the backend it reaches; a
+    process-local one leaves every other worker serving the old payload.
+    """
+    name = response_cache.get_backend_name()
+    if name is None or (name != 'locmem' and is_shared(name)):
+        return []
+    return [Error(
+        f"RESPONSE_CACHE_BACKEND {name!r} is process-local, so invalidations "
+        "(Account_User.signals) only reach the process that made the change.",
+        hint=(
+            "Set RESPONSE_CACHE_BACKEND to the alias of a cache shared by every "
+            "worker, or silence Account_User.E002 when a single process serves requests."
+        ),
+        id='Account_User.E002',
+    )]
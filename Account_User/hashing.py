@@ -0,0 +1,233 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 is slow on purpose; run inline it pins a sync worker (or blocks the
+event loop) for the whole of every login, sign-up and password change.
+With PASSWORD_HASHING_WORKERS set, hashing and verification run in a
+bounded process pool instead: sync callers wait for the result and async
+callers await it. Once PASSWORD_HASHING_MAX_PENDING jobs are in flight, new
+ones are refused with PasswordHashingUnavailable (503 with Retry-After)
+instead of queueing without bound.
+
+Settings:
+    PASSWORD_HASHING_WORKERS      pool size; 0 hashes inline (default: 0)
+    PASSWORD_HASHING_MAX_PENDING  jobs queued or running (default: 8 per worker)
+    PASSWORD_HASHING_TIMEOUT      seconds to wait for a result (default: 10)
+    PASSWORD_HASHING_START_METHOD multiprocessing start method (default: spawn;
+                                  forking a threaded server can copy held locks)
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password as _verify_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+
+
+def get_workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+
+
+def get_max_pending():
+    return getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', None) or get_workers() * 8
+
+
+def get_timeout():
+    return getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+
+
+def get_start_method():
+    return getattr(settings, 'PASSWORD_HASHING_START_METHOD', 'spawn')
+
+
+class PasswordHashingUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign-in requests are being processed. Try again shortly.')
+    default_code = 'password_hashing_unavailable'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def _apply(fn, items):
+    return [fn(item) for item in items]
+
+
+def _init_worker(settings_module):
+    # Forked workers inherit configured settings; spawned ones load them
+    from django.apps import apps
+    if apps.ready:
+        return
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+class PasswordHashPool:
+    """
+    Process pool that refuses work beyond `max_pending` outstanding jobs.
+    """
+
+    def __init__(self, workers, max_pending, timeout, start_method='spawn'):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.start_method = start_method
+        self.pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise PasswordHashingUnavailable()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),),
+                )
+            future = self._executor.submit(fn, *args)
+            self.pending += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def run(self, fn, *args):
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingUnavailable()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self.shutdown(wait=False)
+            raise PasswordHashingUnavailable()
+
+    async def arun(self, fn, *args):
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise PasswordHashingUnavailable()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self.shutdown(wait=False)
+            raise PasswordHashingUnavailable()
+
+    def map(self, fn, items, chunk_size=16):
+        """
+        Return [fn(item) for item in items] computed in the pool.
+
+        Items are sent in chunks, with at most one chunk per worker in flight,
+        so a large batch leaves queue room for interactive callers.
+        """
+        items = list(items)
+        results = []
+        window = deque()
+
+        def collect(future, size):
+            try:
+                results.extend(future.result(timeout=self.timeout * size))
+            except FutureTimeoutError:
+                raise PasswordHashingUnavailable()
+            except BrokenProcessPool:
+                self.shutdown(wait=False)
+                raise PasswordHashingUnavailable()
+
+        try:
+            for start in range(0, len(items), chunk_size):
+                if len(window) >= self.workers:
+                    collect(*window.popleft())
+                chunk = items[start:start + chunk_size]
+                window.append((self.submit(_apply, fn, chunk), len(chunk)))
+            while window:
+                collect(*window.popleft())
+        finally:
+            for future, _ in window:
+                future.cancel()
+        return results
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the shared pool, or None when hashing runs inline.
+    """
+    global _pool
+    if get_workers() <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashPool(
+                    get_workers(), get_max_pending(), get_timeout(), get_start_method()
+                )
+    return _pool
+
+
+def hash_password(raw_password):
+    """
+    make_password() in the pool.
+    """
+    pool = get_pool()
+    if pool is None or raw_password is None:
+        # Unusable passwords are random strings, not hashes
+        return make_password(raw_password)
+    return pool.run(make_password, raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """
+    Return (is_correct, must_update) for `raw_password` against `encoded`.
+    """
+    pool = get_pool()
+    if pool is None:
+        return _verify_password(raw_password, encoded)
+    return pool.run(_verify_password, raw_password, encoded)
+
+
+def hash_passwords(raw_passwords):
+    """
+    make_password() for a batch, spread across the pool's workers.
+    """
+    pool = get_pool()
+    if pool is None:
+        return [make_password(raw_password) for raw_password in raw_passwords]
+    return pool.map(make_password, raw_passwords)
+
+
+async def ahash_password(raw_password):
+    pool = get_pool()
+    if pool is None or raw_password is None:
+        return await sync_to_async(make_password, thread_sensitive=False)(raw_password)
+    return await pool.arun(make_password, raw_password)
+
+
+async def averify_password(raw_password, encoded):
+    pool = get_pool()
+    if pool is None:
+        return await sync_to_async(_verify_password, thread_sensitive=False)(raw_password, encoded)
+    return await pool.arun(_verify_password, raw_password, encoded)
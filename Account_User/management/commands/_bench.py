@@ -0,0 +1,97 @@
+"""
+Shared helpers for the bench_* management commands.
+
+Benchmarks seed their data inside a transaction that is always rolled back,
+so they can be pointed at a development database without leaving rows behind.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Grace', 'Peter', 'Faith', 'David', 'Mercy', 'Brian', 'Joy']
+LAST_NAMES = ['Otieno', 'Wanjiru', 'Kamau', 'Achieng', 'Mwangi', 'Njeri', 'Kiprop', 'Wekesa']
+SPECIALIZATIONS = ['lifts', 'escalators', 'hvac', 'electrical', 'plumbing', 'generators']
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(using=None):
+    """
+    Run the block inside a transaction that is rolled back on exit.
+    """
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def measure(fn, repeat):
+    """
+    Call fn `repeat` times and return the wall-clock duration of each call.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(label, samples):
+    return (
+        f"{label:<32} n={len(samples):<6} "
+        f"mean={statistics.mean(samples) * 1000:8.2f}ms "
+        f"p50={percentile(samples, 50) * 1000:8.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.2f}ms"
+    )
+
+
+def seed_technicians(count, company=None, batch_size=10000, prefix='bench'):
+    """
+    Bulk insert `count` technician users and profiles sharing one password hash.
+
+    Signals do not fire for bulk inserts: callers that need the search index
+    or company headcount must refresh them explicitly.
+    """
+    from technician.models import TechnicianProfile
+
+    User = get_user_model()
+    password = make_password('bench-password')
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        users = []
+        for i in range(created, created + size):
+            users.append(User(
+                email=f'{prefix}{i}@example.com',
+                phone_number=f'+9{i:012d}',
+                first_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+                last_name=f'{LAST_NAMES[i % len(LAST_NAMES)]}{i}',
+                account_type='technician',
+                password=password,
+            ))
+        User.objects.bulk_create(users, batch_size=1000)
+        TechnicianProfile.objects.bulk_create([
+            TechnicianProfile(
+                user=user,
+                maintenance_company=company,
+                specialization=SPECIALIZATIONS[i % len(SPECIALIZATIONS)],
+            )
+            for i, user in enumerate(users, start=created)
+        ], batch_size=1000)
+        created += size
+    return created
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from Account_User.tokens import PrincipalRefreshToken
+from maintenance_company.models import MaintenanceCompanyProfile
+from ._bench import percentile, seed_technicians
+
+EMAIL_PREFIX = 'bench-async-'
+HOST = 'bench.local'
+
+# endpoint -> (sync path, async path, caller); paths are formatted with the seeded ids
+ENDPOINTS = {
+    'user': ('/api/users/{admin}/', '/api/async/users/{admin}/', 'admin'),
+    'profile': ('/api/users/{superuser}/profile/', '/api/async/users/{superuser}/profile/', 'superuser'),
+    'technicians': ('/api/technicians/', '/api/async/technicians/', 'admin'),
+    'roster': ('/api/companies/{company}/technicians/', '/api/async/companies/{company}/technicians/', 'admin'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second and latency of the sync read endpoints "
+        "served through WSGIHandler by a thread pool with their async "
+        "counterparts served through ASGIHandler on one event loop, with "
+        "--connections requests in flight. Seeded rows and their tokens are "
+        "deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=32, help="WSGI worker threads.")
+        parser.add_argument('--technicians', type=int, default=200)
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        admin = User.objects.create_user(
+            email=f'{EMAIL_PREFIX}admin@example.com', phone_number='+7000000000001',
+            first_name='Bench', last_name='Admin', account_type='maintenance', password=None,
+        )
+        superuser = User.objects.create_superuser(
+            email=f'{EMAIL_PREFIX}root@example.com', phone_number='+7000000000002',
+            first_name='Bench', last_name='Root', account_type='admin', password=None,
+        )
+        company = MaintenanceCompanyProfile.objects.create(
+            user=admin, admin_user=admin, company_name='Bench Async Lifts'
+        )
+
+        try:
+            seed_technicians(options['technicians'], company=company, prefix=EMAIL_PREFIX)
+            ids = {'admin': admin.pk, 'superuser': superuser.pk, 'company': company.pk}
+            tokens = {
+                'admin': str(PrincipalRefreshToken.for_user(admin).access_token),
+                'superuser': str(PrincipalRefreshToken.for_user(superuser).access_token),
+            }
+
+            with override_settings(ALLOWED_HOSTS=[HOST]):
+                wsgi, asgi = WSGIHandler(), ASGIHandler()
+                for name in options['endpoint'] or ENDPOINTS:
+                    sync_path, async_path, caller = ENDPOINTS[name]
+                    token = tokens[caller]
+                    self.report(f"wsgi {name}", *asyncio.run(
+                        self.run_wsgi(wsgi, sync_path.format(**ids), token, options)
+                    ))
+                    self.report(f"asgi {name}", *asyncio.run(
+                        self.run_asgi(asgi, async_path.format(**ids), token, options)
+                    ))
+        finally:
+            OutstandingToken.objects.filter(user__email__startswith=EMAIL_PREFIX).delete()
+            User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+
+    async def run_wsgi(self, handler, path, token, options):
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(options['connections'])
+
+        def call():
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST, 'HTTP_AUTHORIZATION': f'Bearer {token}',
+                'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+            }
+            status = []
+            response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+            b''.join(response)
+            response.close()
+            return int(status[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            async def request():
+                async with limit:
+                    started = time.perf_counter()
+                    code = await loop.run_in_executor(executor, call)
+                    return code, time.perf_counter() - started
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*[request() for _ in range(options['requests'])])
+            return results, time.perf_counter() - started
+
+    async def run_asgi(self, handler, path, token, options):
+        limit = asyncio.Semaphore(options['connections'])
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'root_path': '', 'query_string': b'',
+            'headers': [(b'host', HOST.encode()), (b'authorization', f'Bearer {token}'.encode())],
+            'server': (HOST, 80), 'client': ('127.0.0.1', 50000),
+        }
+
+        async def request():
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            disconnected = asyncio.Event()
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # The handler listens for a disconnect until the response is sent
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            async with limit:
+                started = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                return status[0], time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[request() for _ in range(options['requests'])])
+        return results, time.perf_counter() - started
+
+    def report(self, label, results, elapsed):
+        statuses = Counter(code for code, _ in results)
+        latencies = [duration for _, duration in results]
+        self.stdout.write(
+            f"{label:<18} {len(results) / elapsed:8.1f} req/s"
+            f"  p50={percentile(latencies, 50) * 1000:7.1f}ms"
+            f"  p99={percentile(latencies, 99) * 1000:7.1f}ms"
+            f"  statuses={dict(statuses)}"
+        )
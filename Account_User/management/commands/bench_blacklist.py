@@ -0,0 +1,77 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Account_User import blacklist
+from Account_User.tokens import PrincipalRefreshToken, PrincipalTokenRefreshSerializer
+from ._bench import measure, rolled_back, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure refresh-token verification throughput against a large "
+        "blacklist, with and without the Bloom filter. All seeded rows are "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=10_000_000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def seed(self, count, batch_size):
+        expires_at = timezone.now() + timedelta(days=30)
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            tokens = OutstandingToken.objects.bulk_create([
+                OutstandingToken(jti=uuid.uuid4().hex, token='', expires_at=expires_at)
+                for _ in range(size)
+            ])
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens])
+            created += size
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+
+        with rolled_back():
+            started = time.perf_counter()
+            self.seed(options['tokens'], options['batch_size'])
+            self.stdout.write(f"Blacklisted {options['tokens']} tokens in {time.perf_counter() - started:.1f}s")
+
+            user = User.objects.create_user(
+                email='bench-blacklist@example.com', phone_number='+9999999999999',
+                first_name='Bench', last_name='Blacklist', password='bench-password', account_type='technician',
+            )
+            refresh = str(PrincipalRefreshToken.for_user(user))
+            revoked = PrincipalRefreshToken.for_user(user)
+            revoked.blacklist()
+            revoked = str(revoked)
+
+            blacklist.reset()
+            started = time.perf_counter()
+            PrincipalRefreshToken(refresh)
+            self.stdout.write(f"Built Bloom filter in {time.perf_counter() - started:.1f}s")
+
+            cases = [
+                ('table lookup (stock)', lambda: RefreshToken(refresh)),
+                ('bloom filter', lambda: PrincipalRefreshToken(refresh)),
+                ('refresh endpoint serializer', lambda: PrincipalTokenRefreshSerializer(
+                    data={'refresh': refresh}).is_valid(raise_exception=True)),
+            ]
+            for label, fn in cases:
+                samples = measure(fn, options['repeat'])
+                self.stdout.write(f"{summarize(label, samples)} {len(samples) / sum(samples):10.0f}/s")
+
+            try:
+                PrincipalRefreshToken(revoked)
+            except Exception as exc:
+                self.stdout.write(f"Blacklisted token rejected: {exc}")
+            else:
+                self.stderr.write("Blacklisted token was accepted")
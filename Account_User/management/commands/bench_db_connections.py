@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from ._bench import percentile
+
+# mode -> connection settings applied to the default database
+MODES = {
+    'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the connection setup cost per request on the default "
+        "database with a new connection per request, persistent connections "
+        "(CONN_MAX_AGE) and, on PostgreSQL, psycopg's connection pool. Each "
+        "simulated request goes through the request_started/request_finished "
+        "signals that open and release connections, and runs one trivial "
+        "query. Nothing is written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--pool-size', type=int, default=8, help="max_size of the pool mode.")
+        parser.add_argument('--mode', choices=list(MODES), action='append')
+
+    def handle(self, *args, **options):
+        database = connections[DEFAULT_DB_ALIAS].settings_dict
+        postgres = connection.vendor == 'postgresql'
+        modes = options['mode'] or [mode for mode in MODES if postgres or mode != 'pool']
+        if 'pool' in modes and not postgres:
+            raise CommandError("Connection pooling needs PostgreSQL.")
+        original = {key: database[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+
+        try:
+            for mode in modes:
+                self.release(postgres)
+                database.update(MODES[mode])
+                database['OPTIONS'] = dict(original['OPTIONS'])
+                database['OPTIONS'].pop('pool', None)
+                if mode == 'pool':
+                    database['OPTIONS']['pool'] = {'min_size': 1, 'max_size': options['pool_size']}
+                self.run(mode, options)
+        finally:
+            self.release(postgres)
+            database.update(original)
+
+    def release(self, postgres):
+        connections.close_all()
+        if postgres:
+            connections[DEFAULT_DB_ALIAS].close_pool()
+
+    def run(self, mode, options):
+        per_thread = -(-options['requests'] // options['threads'])
+
+        def work(_):
+            setup, total = [], []
+            for _ in range(per_thread):
+                started = time.perf_counter()
+                request_started.send(sender=self.__class__)
+                try:
+                    connection.ensure_connection()
+                    connected = time.perf_counter()
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                finally:
+                    request_finished.send(sender=self.__class__)
+                finished = time.perf_counter()
+                setup.append(connected - started)
+                total.append(finished - started)
+            connections.close_all()
+            return setup, total
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = list(executor.map(work, range(options['threads'])))
+        elapsed = time.perf_counter() - started
+
+        setup = [duration for samples, _ in results for duration in samples]
+        total = [duration for _, samples in results for duration in samples]
+        self.stdout.write(
+            f"{mode:<12} {len(total) / elapsed:8.1f} req/s"
+            f"  connect mean={sum(setup) / len(setup) * 1000:6.3f}ms"
+            f" p99={percentile(setup, 99) * 1000:6.3f}ms"
+            f"  request p50={percentile(total, 50) * 1000:6.3f}ms"
+            f" p99={percentile(total, 99) * 1000:6.3f}ms"
+        )
@@ -0,0 +1,63 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from Mtambo_BackendApis.renderers import ORJSONRenderer
+from technician.models import TechnicianProfile
+from technician.serializers import TechnicianProfileSerializer
+from ._bench import rolled_back, seed_technicians
+
+EMAIL_PREFIX = 'bench-stream-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the peak Python memory (tracemalloc) and time of listing "
+        "every technician as one JSON document built in memory with "
+        "streaming it through `/api/technicians/?stream=1`, for growing row "
+        "counts. Streaming should stay flat. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--technicians', type=int, nargs='+', default=[5000, 20000])
+
+    def handle(self, *args, **options):
+        for count in sorted(options['technicians']):
+            with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver']):
+                superuser = get_user_model().objects.create_superuser(
+                    email=f'{EMAIL_PREFIX}root@example.com', phone_number='+7500000000001',
+                    first_name='Bench', last_name='Root', account_type='admin', password=None,
+                )
+                client = APIClient()
+                client.force_authenticate(superuser)
+                seed_technicians(count, prefix=EMAIL_PREFIX)
+
+                self.stdout.write(f"{count} technicians")
+                self.report('in memory', self.buffered)
+                self.report('streamed', lambda: self.streamed(client))
+
+    def buffered(self):
+        # The list as built before streaming: every row serialized, then encoded
+        queryset = TechnicianProfileSerializer.setup_eager_loading(TechnicianProfile.objects.order_by('pk'))
+        return len(ORJSONRenderer().render(TechnicianProfileSerializer(queryset, many=True).data))
+
+    def streamed(self, client):
+        response = client.get('/api/technicians/?stream=1')
+        return sum(len(part) for part in response.streaming_content)
+
+    def report(self, label, fn):
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            size = fn()
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(
+            f"  {label:<10} peak={peak / 2 ** 20:8.1f} MiB  {elapsed:6.2f}s  body={size / 2 ** 20:7.1f} MiB"
+        )
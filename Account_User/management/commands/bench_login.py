@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.client import AsyncRequestFactory, RequestFactory
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from Account_User import hashing
+from Account_User.views import UserAuthViewSet, async_user_login
+from ._bench import percentile
+
+PASSWORD = 'bench-password'
+EMAIL_PREFIX = 'bench-login-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login requests per second with password hashing inline and "
+        "in the process pool, through the sync and async login views. Seeded "
+        "users and their tokens are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=hashing.get_workers() or 1)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                email=f'{EMAIL_PREFIX}{i}@example.com', phone_number=f'+8{i:012d}',
+                first_name='Bench', last_name=f'Login{i}', account_type='technician',
+                password=password,
+            )
+            for i in range(options['users'])
+        ])
+        emails = [user.email for user in users]
+
+        try:
+            for label, workers in (('inline', 0), ('pool', options['workers'])):
+                with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                    # Warm up the pool so worker start-up is not measured
+                    hashing.hash_password(PASSWORD)
+                    self.report(f"sync {label}", *self.run_sync(emails, options))
+                    self.report(f"async {label}", *asyncio.run(self.run_async(emails, options)))
+        finally:
+            pool = hashing.get_pool()
+            if pool is not None:
+                pool.shutdown()
+            OutstandingToken.objects.filter(user__email__startswith=EMAIL_PREFIX).delete()
+            User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+
+    def run_sync(self, emails, options):
+        factory = RequestFactory()
+        view = UserAuthViewSet.as_view({'post': 'user_login'})
+
+        def login(i):
+            request = factory.post(
+                '/auth/login/', {'email': emails[i % len(emails)], 'password': PASSWORD},
+                content_type='application/json',
+            )
+            started = time.perf_counter()
+            response = view(request)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(login, range(options['requests'])))
+        return results, time.perf_counter() - started
+
+    async def run_async(self, emails, options):
+        factory = AsyncRequestFactory()
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def login(i):
+            request = factory.post(
+                '/auth/login/async/', {'email': emails[i % len(emails)], 'password': PASSWORD},
+                content_type='application/json',
+            )
+            async with limit:
+                started = time.perf_counter()
+                response = await async_user_login(request)
+                return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[login(i) for i in range(options['requests'])])
+        return results, time.perf_counter() - started
+
+    def report(self, label, results, elapsed):
+        statuses = Counter(code for code, _ in results)
+        latencies = [duration for code, duration in results if code == 200]
+        line = f"{label:<14} {statuses[200] / elapsed:8.1f} logins/s  statuses={dict(statuses)}"
+        if latencies:
+            line += (
+                f"  p50={percentile(latencies, 50) * 1000:.0f}ms"
+                f"  p99={percentile(latencies, 99) * 1000:.0f}ms"
+            )
+        self.stdout.write(line)
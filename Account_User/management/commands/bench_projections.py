@@ -0,0 +1,97 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from Account_User.mixins import Fieldset
+from Account_User.projections import Projection
+from developer.models import DeveloperProfile
+from maintenance_company.models import MaintenanceCompanyProfile
+from maintenance_company.serializers import MaintenanceCompanyProfileSerializer
+from technician.models import TechnicianProfile
+from technician.serializers import TechnicianProfileSerializer
+from ._bench import rolled_back, seed_technicians
+
+EMAIL_PREFIX = 'bench-projection-'
+
+# name -> (serializer, model, fieldset query parameters)
+CASES = {
+    'technicians': (TechnicianProfileSerializer, TechnicianProfile, {}),
+    'technicians-sparse': (
+        TechnicianProfileSerializer, TechnicianProfile, {'fields': 'id,user.first_name,maintenance_company'},
+    ),
+    'companies': (MaintenanceCompanyProfileSerializer, MaintenanceCompanyProfile, {}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the .values() projections serving the "
+        "technician and company lists against their serializers (the tests "
+        "check that both render the same). Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--technicians', type=int, default=20000)
+        parser.add_argument('--companies', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.seed(options['technicians'], options['companies'])
+            for name, (serializer_class, model, params) in CASES.items():
+                fieldset = Fieldset.from_query_params(params)
+                queryset = model.objects.filter(user__email__startswith=EMAIL_PREFIX).order_by('pk')
+                projection = Projection.for_serializer(serializer_class, fieldset)
+
+                def serialize():
+                    rows = serializer_class.setup_eager_loading(queryset, fieldset)
+                    return serializer_class(rows, many=True, context={'fieldset': fieldset}).data
+
+                def project():
+                    return projection.render_many(projection.values(queryset))
+
+                rows = len(project())
+                self.stdout.write(f"{name}: {rows} rows")
+                self.report(name, 'serializer', serialize, rows, options['repeat'])
+                self.report(name, 'projection', project, rows, options['repeat'])
+
+    def seed(self, technicians, companies):
+        User = get_user_model()
+        owners = User.objects.bulk_create([
+            User(
+                email=f'{EMAIL_PREFIX}owner{i}@example.com', phone_number=f'+81{i:011d}',
+                first_name='Bench', last_name=f'Owner{i}', account_type='maintenance',
+            )
+            for i in range(companies)
+        ])
+        # Every other company is administered by someone other than its owner
+        company_rows = MaintenanceCompanyProfile.objects.bulk_create([
+            MaintenanceCompanyProfile(
+                user=owner, admin_user=owners[i - 1] if i % 2 else owner,
+                company_name=f'Bench Lifts {i}', registration_number=f'REG-{i}' if i % 3 else '',
+            )
+            for i, owner in enumerate(owners)
+        ])
+        seed_technicians(technicians, company=company_rows[0] if company_rows else None, prefix=EMAIL_PREFIX)
+        # Cover the other profile branches and technicians without a company
+        TechnicianProfile.objects.filter(user__email__startswith=EMAIL_PREFIX, user__last_name__endswith='7').update(
+            maintenance_company=None
+        )
+        developers = User.objects.filter(
+            email__startswith=EMAIL_PREFIX, account_type='technician', last_name__endswith='3'
+        )
+        developers.update(account_type='developer')
+        DeveloperProfile.objects.bulk_create(
+            [DeveloperProfile(user=user, developer_name=f'Dev {user.last_name}') for user in developers.iterator()]
+        )
+        User.objects.filter(email__startswith=EMAIL_PREFIX, last_name__endswith='5').update(account_type='admin')
+        User.objects.filter(email__startswith=EMAIL_PREFIX, last_name__endswith='9').update(account_type='maintenance')
+
+    def report(self, name, label, fn, rows, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        self.stdout.write(f"  {label:<11} {rows / best:10.0f} rows/s  ({best * 1000:.1f}ms for {rows} rows)")
@@ -0,0 +1,122 @@
+import datetime
+import decimal
+import json
+import time
+import uuid
+from io import BytesIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from Mtambo_BackendApis.parsers import MessagePackParser, ORJSONParser
+from Mtambo_BackendApis.renderers import MessagePackRenderer, ORJSONRenderer
+from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
+from technician.serializers import TechnicianProfileSerializer
+from ._bench import rolled_back, seed_technicians
+
+EMAIL_PREFIX = 'bench-renderers-'
+
+# Values whose JSON form depends on the encoder rather than the serializers
+EDGE_CASES = {
+    'utc': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+    'utc_micro': datetime.datetime(2024, 5, 1, 12, 30, 0, 120, tzinfo=datetime.timezone.utc),
+    'nairobi': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=ZoneInfo('Africa/Nairobi')),
+    'naive': datetime.datetime(2024, 5, 1, 12, 30, 5, 999999),
+    'date': datetime.date(2024, 5, 1),
+    'time': datetime.time(8, 15),
+    'duration': datetime.timedelta(hours=1, microseconds=5),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'decimal': decimal.Decimal('12.50'),
+    'lazy': gettext_lazy('Invalid cursor'),
+    'text': 'Ng\u2019ang\u2019a \u2028 \u2029 \U0001f6d7 "quoted" \\ \n\t\x00',
+    'numbers': [0, -1, 2 ** 63 - 1, 1.5, 0.1, True, False, None],
+    'tuple': (1, 'two', (3,)),
+    'set': {'only'},
+    'int_keys': {1: 'a', 2: 'b'},
+    'empty': [{}, [], ''],
+}
+
+# Equal as JSON, but orjson writes exponents without padding (1e-7, 1e+16
+# from DRF are 1e-07, 1e16 from orjson)
+FLOAT_CASES = {'floats': [1e-7, 1e16, 123456789.125, -0.0]}
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that ORJSONRenderer output is byte-identical to DRF's "
+        "JSONRenderer, and that MessagePack and both parsers round-trip to "
+        "the same data, on encoder edge cases and a technician list payload, "
+        "then compare encoding time and size. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--technicians', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.compare('edge cases', EDGE_CASES)
+        for name, value in EDGE_CASES.items():
+            self.compare(f'edge case {name}', {name: value})
+        self.compare('floats', FLOAT_CASES, exact=False)
+
+        with rolled_back():
+            company = MaintenanceCompanyProfile.objects.create(
+                user=self.create_admin(), company_name='Bench Renderer Lifts'
+            )
+            seed_technicians(options['technicians'], company=company, prefix=EMAIL_PREFIX)
+            technicians = TechnicianProfileSerializer.setup_eager_loading(
+                TechnicianProfile.objects.filter(user__email__startswith=EMAIL_PREFIX).order_by('pk')
+            )
+            payload = {'technicians': TechnicianProfileSerializer(technicians, many=True).data}
+
+        self.compare(f"{options['technicians']} technicians", payload)
+        self.stdout.write("Output equivalent.")
+
+        renderers = {
+            'json (DRF)': JSONRenderer(),
+            'json (orjson)': ORJSONRenderer(),
+            'msgpack': MessagePackRenderer(),
+        }
+        for label, renderer in renderers.items():
+            best = float('inf')
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                body = renderer.render(payload)
+                best = min(best, time.perf_counter() - started)
+            self.stdout.write(
+                f"{label:<14} {best * 1000:8.1f}ms  {len(body) / 1024:8.0f} KiB"
+                f"  {len(body) / best / 2 ** 20:7.0f} MiB/s"
+            )
+
+    def create_admin(self):
+        return get_user_model().objects.create_user(
+            email=f'{EMAIL_PREFIX}admin@example.com', phone_number='+7400000000001',
+            first_name='Bench', last_name='Admin', account_type='maintenance', password=None,
+        )
+
+    def compare(self, label, data, exact=True):
+        expected = JSONRenderer().render(data)
+        actual = ORJSONRenderer().render(data)
+        if actual != expected if exact else json.loads(actual) != json.loads(expected):
+            raise CommandError(f"{label}: orjson output differs\n  DRF:    {expected[:500]!r}\n  orjson: {actual[:500]!r}")
+
+        decoded = json.loads(expected)
+        parsed = {
+            'ORJSONParser(orjson)': ORJSONParser().parse(BytesIO(actual)),
+            'ORJSONParser(json)': ORJSONParser().parse(BytesIO(expected)),
+            'JSONParser(json)': JSONParser().parse(BytesIO(expected)),
+        }
+        for name, value in parsed.items():
+            if value != decoded:
+                raise CommandError(f"{label}: {name} does not match the JSON data")
+
+        # MessagePack keeps the integer keys that JSON turns into strings
+        data = {key: value for key, value in data.items() if key != 'int_keys'}
+        unpacked = MessagePackParser().parse(BytesIO(MessagePackRenderer().render(data)))
+        if unpacked != json.loads(JSONRenderer().render(data)):
+            raise CommandError(f"{label}: MessagePack does not match the JSON data")
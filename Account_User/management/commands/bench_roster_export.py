@@ -0,0 +1,79 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from maintenance_company.models import MaintenanceCompanyProfile
+from ._bench import rolled_back, seed_technicians
+
+EMAIL_PREFIX = 'bench-export-'
+
+# label -> (query string, extra request headers)
+VARIANTS = {
+    'csv': ('', {}),
+    'csv+gzip': ('', {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+    'ndjson': ('?format=ndjson', {}),
+    'ndjson+gzip': ('?format=ndjson', {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Export a company roster of --technicians rows through "
+        "`/api/companies/<id>/technicians/export/` as CSV and NDJSON, with "
+        "and without gzip, and report rows per second, time to first byte, "
+        "body size and, with --memory, peak Python memory (tracemalloc, "
+        "which slows the run down). Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--technicians', type=int, default=1_000_000)
+        parser.add_argument('--variant', choices=list(VARIANTS), action='append')
+        parser.add_argument('--memory', action='store_true')
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver']):
+            admin = get_user_model().objects.create_user(
+                email=f'{EMAIL_PREFIX}admin@example.com', phone_number='+7600000000001',
+                first_name='Bench', last_name='Admin', account_type='maintenance', password=None,
+            )
+            company = MaintenanceCompanyProfile.objects.create(
+                user=admin, admin_user=admin, company_name='Bench Export Lifts'
+            )
+            started = time.perf_counter()
+            seed_technicians(options['technicians'], company=company, prefix=EMAIL_PREFIX)
+            self.stdout.write(f"Seeded {options['technicians']} technicians in {time.perf_counter() - started:.1f}s")
+
+            client = APIClient()
+            client.force_authenticate(admin)
+            url = f'/api/companies/{company.pk}/technicians/export/'
+            for label in options['variant'] or VARIANTS:
+                query, headers = VARIANTS[label]
+                self.run(label, client, url + query, headers, options)
+
+    def run(self, label, client, url, headers, options):
+        if options['memory']:
+            tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            response = client.get(url, **headers)
+            first_byte, size = None, 0
+            for part in response.streaming_content:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(part)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if options['memory'] else None
+        finally:
+            if options['memory']:
+                tracemalloc.stop()
+
+        rows = options['technicians']
+        self.stdout.write(
+            f"{label:<12} {rows / elapsed:10.0f} rows/s  {elapsed:6.1f}s  first byte {first_byte * 1000:6.1f}ms"
+            f"  body {size / 2 ** 20:7.1f} MiB"
+            + (f"  peak {peak / 2 ** 20:6.1f} MiB" if peak is not None else "")
+        )
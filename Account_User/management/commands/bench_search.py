@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from Account_User import search
+from technician.models import TechnicianProfile
+from technician.views import TechnicianViewSet
+from ._bench import measure, rolled_back, seed_technicians, summarize
+
+QUERIES = ['james', 'gra', 'wanjiru12', 'hvac', 'mercy kip', 'bench4242@example']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full-text search index against the icontains SearchFilter "
+        "on a synthetic technician roster. All seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = TechnicianViewSet()
+        base = TechnicianProfile.objects.select_related('user')
+
+        def run(backend, query):
+            request = Request(factory.get('/', {'search': query}))
+            queryset = backend.filter_queryset(request, base, view)
+            if backend.__class__ is filters.SearchFilter:
+                queryset = queryset.order_by(*view.ordering)
+            return list(queryset[:10])
+
+        with rolled_back():
+            started = time.perf_counter()
+            seed_technicians(options['users'])
+            self.stdout.write(f"Seeded {options['users']} technicians in {time.perf_counter() - started:.1f}s")
+
+            started = time.perf_counter()
+            search.rebuild()
+            self.stdout.write(f"Built search index in {time.perf_counter() - started:.1f}s")
+
+            for query in QUERIES:
+                for backend in (filters.SearchFilter(), search.FullTextSearchFilter()):
+                    samples = measure(lambda: run(backend, query), options['repeat'])
+                    self.stdout.write(summarize(f"{backend.__class__.__name__} {query!r}", samples))
@@ -0,0 +1,161 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from Mtambo_BackendApis import write_queue
+from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
+from ._bench import percentile, seed_technicians
+
+EMAIL_PREFIX = 'bench-sqlite-'
+MODES = {
+    'default': {},
+    'production': settings.SQLITE_PRODUCTION_OPTIONS,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and 'database is locked' errors of concurrent "
+        "small writes (signups, profile updates, add_technician) with the "
+        "default SQLite configuration and in SQLite production mode. Each "
+        "mode runs against its own scratch database migrated from the "
+        "current models; the configured database is not touched. Passwords "
+        "use a fast hasher so the database writes dominate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=60, help="Writes per thread.")
+        parser.add_argument('--mode', choices=sorted(MODES), action='append')
+
+    def handle(self, *args, **options):
+        database = connections[DEFAULT_DB_ALIAS].settings_dict
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("The default database is not SQLite.")
+        original = {'NAME': database['NAME'], 'OPTIONS': database['OPTIONS']}
+        directory = tempfile.mkdtemp(prefix='bench-sqlite-')
+        template = os.path.join(directory, 'template.sqlite3')
+
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                PASSWORD_HASHING_WORKERS=0,
+            ):
+                self.use_database(database, template, {})
+                call_command('migrate', verbosity=0, interactive=False)
+                targets = self.seed(options['threads'] * options['writes'])
+                connections.close_all()
+
+                for mode in options['mode'] or ['default', 'production']:
+                    path = os.path.join(directory, f'{mode}.sqlite3')
+                    shutil.copyfile(template, path)
+                    self.use_database(database, path, MODES[mode])
+                    with override_settings(WRITE_QUEUE_ENABLED=mode == 'production'):
+                        self.run(mode, targets, options)
+                    connections.close_all()
+        finally:
+            connections.close_all()
+            database.update(original)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def use_database(self, database, path, options):
+        # New connections in every thread read this dict
+        connections.close_all()
+        database['NAME'] = path
+        database['OPTIONS'] = options
+
+    def seed(self, count):
+        User = get_user_model()
+        superuser = User.objects.create_superuser(
+            email=f'{EMAIL_PREFIX}root@example.com', phone_number='+7200000000001',
+            first_name='Bench', last_name='Root', account_type='admin', password=None,
+        )
+        admin = User.objects.create_user(
+            email=f'{EMAIL_PREFIX}admin@example.com', phone_number='+7200000000002',
+            first_name='Bench', last_name='Admin', account_type='maintenance', password=None,
+        )
+        company = MaintenanceCompanyProfile.objects.create(
+            user=admin, admin_user=admin, company_name='Bench SQLite Lifts'
+        )
+        seed_technicians(count, prefix=EMAIL_PREFIX)
+        users = list(
+            TechnicianProfile.objects.filter(user__email__startswith=EMAIL_PREFIX)
+            .order_by('user__email').values_list('user_id', flat=True)
+        )
+        return {'superuser': superuser, 'admin': admin, 'company': company.pk, 'users': users}
+
+    def run(self, mode, targets, options):
+        threads, writes = options['threads'], options['writes']
+        start = threading.Barrier(threads)
+        before = write_queue.get_write_queue().stats()
+
+        def work(index):
+            client, company_admin = APIClient(), APIClient()
+            client.force_authenticate(targets['superuser'])
+            company_admin.force_authenticate(targets['admin'])
+            outcomes, latencies = Counter(), []
+            start.wait()
+            for step in range(writes):
+                n = index * writes + step
+                user_id = targets['users'][n]
+                kind = ('signup', 'profile', 'add_technician')[n % 3]
+                started = time.perf_counter()
+                try:
+                    if kind == 'signup':
+                        response = client.post('/api/users/', {
+                            'email': f'{EMAIL_PREFIX}{mode}-signup-{n}@example.com',
+                            'phone_number': f'+73{n:010d}', 'first_name': 'New', 'last_name': f'Signup{n}',
+                            'account_type': 'technician', 'password': 'Bench-password-1',
+                        }, format='json')
+                    elif kind == 'profile':
+                        response = client.patch(f'/api/users/{user_id}/', {'first_name': f'Renamed{n}'}, format='json')
+                    else:
+                        response = company_admin.post(
+                            f"/api/companies/{targets['company']}/add_technician/", {'user_id': str(user_id)}, format='json'
+                        )
+                    outcomes['ok' if response.status_code < 400 else 'failed'] += 1
+                except OperationalError as exc:
+                    outcomes['locked' if 'locked' in str(exc) else 'failed'] += 1
+                latencies.append(time.perf_counter() - started)
+            return outcomes, latencies
+
+        # Lock errors are counted below rather than logged with tracebacks
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(work, range(threads)))
+            elapsed = time.perf_counter() - started
+        finally:
+            request_logger.disabled = False
+
+        outcomes = sum((counts for counts, _ in results), Counter())
+        latencies = [duration for _, samples in results for duration in samples]
+        after = write_queue.get_write_queue().stats()
+        total = sum(outcomes.values())
+        batches = after['batches'] - before['batches']
+        queued = after['writes'] - before['writes']
+        self.stdout.write(
+            f"{mode:<11} {outcomes['ok'] / elapsed:8.1f} writes/s"
+            f"  locked={outcomes['locked']}/{total} ({outcomes['locked'] / total:.1%})"
+            f"  failed={outcomes['failed']}"
+            f"  p50={percentile(latencies, 50) * 1000:7.1f}ms"
+            f"  p99={percentile(latencies, 99) * 1000:7.1f}ms"
+            + (f"  queued={queued} batches={batches} mean_batch={queued / batches:.1f}" if batches else "")
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from Account_User.models import PrincipalRevocation
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist entries "
+        "in batches, and principal revocations older than any access token. "
+        "Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only count the expired tokens.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        # Every access token issued before these has expired on its own
+        stale_revocations = PrincipalRevocation.objects.filter(
+            revoked_at__lt=time.time() - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired token(s) would be deleted.")
+            self.stdout.write(f"{stale_revocations.count()} stale revocation(s) would be deleted.")
+            return
+
+        deleted = blacklisted = 0
+        while True:
+            # Each batch is its own short transaction so writers are never
+            # blocked for the length of the whole purge
+            with transaction.atomic():
+                ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                _, counts = OutstandingToken.objects.filter(id__in=ids).only('id').delete()
+            deleted += counts.get(OutstandingToken._meta.label, 0)
+            blacklisted += counts.get('token_blacklist.BlacklistedToken', 0)
+
+        revocations, _ = stale_revocations.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired token(s), {blacklisted} of them blacklisted, "
+            f"and {revocations} stale revocation(s)."
+        ))
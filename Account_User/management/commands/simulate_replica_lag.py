@@ -0,0 +1,119 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from Account_User.tokens import PrincipalRefreshToken
+from Mtambo_BackendApis import db_router
+from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
+
+EMAIL_PREFIX = 'replica-lag-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Check replica routing and read-your-writes stickiness against real "
+        "databases. Replicas are not replicated to: rows are copied to them "
+        "by hand after --lag seconds, so reads served by a replica in between "
+        "see the lag. Every replica must have been migrated. Seeded rows are "
+        "deleted from all databases afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lag', type=float, default=1.0, help="Simulated replication delay in seconds.")
+        parser.add_argument('--sticky-seconds', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        self.replicas = db_router.get_replicas()
+        if not self.replicas:
+            raise CommandError(
+                "No replicas configured; set DATABASE_REPLICA_PATHS or DATABASE_REPLICAS."
+            )
+        self.failures = 0
+
+        User = get_user_model()
+        admin = User.objects.create_user(
+            email=f'{EMAIL_PREFIX}admin@example.com', phone_number='+7100000000001',
+            first_name='Replica', last_name='Admin', account_type='maintenance', password=None,
+        )
+        superuser = User.objects.create_superuser(
+            email=f'{EMAIL_PREFIX}root@example.com', phone_number='+7100000000002',
+            first_name='Replica', last_name='Root', account_type='admin', password=None,
+        )
+        company = MaintenanceCompanyProfile.objects.create(
+            user=admin, admin_user=admin, company_name='Replica Lag Lifts'
+        )
+        # The starting point is fully replicated
+        self.replicate(User, [admin, superuser])
+        self.replicate(MaintenanceCompanyProfile, [company])
+
+        writer = self.client_for(admin)
+        reader = self.client_for(superuser)
+        listing = f'/api/technicians/?maintenance_company={company.pk}'
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver'], DATABASE_STICKY_SECONDS=options['sticky_seconds']):
+                response = writer.post(f'/api/companies/{company.pk}/create_technician/', {
+                    'email': f'{EMAIL_PREFIX}tech@example.com', 'phone_number': '+7100000000003',
+                    'first_name': 'Replica', 'last_name': 'Tech', 'password': 'Lag-test-123',
+                }, format='json')
+                if response.status_code != 201:
+                    raise CommandError(f"Creating the technician failed: {response.status_code} {response.data}")
+                technician = TechnicianProfile.objects.select_related('user').get(user__email=f'{EMAIL_PREFIX}tech@example.com')
+
+                self.expect("writer reads its write from the primary", writer, listing, rows=1, alias='default')
+                self.expect("other client reads the lagging replica", reader, listing, rows=0, alias='replica')
+
+                time.sleep(options['lag'])
+                self.replicate(User, [technician.user])
+                self.replicate(TechnicianProfile, [technician])
+                self.expect("other client sees the write once replicated", reader, listing, rows=1, alias='replica')
+
+                time.sleep(options['sticky_seconds'])
+                self.expect("writer returns to the replica after the window", writer, listing, rows=1, alias='replica')
+        finally:
+            for alias in ['default', *self.replicas]:
+                OutstandingToken.objects.using(alias).filter(user__email__startswith=EMAIL_PREFIX).delete()
+                User.objects.using(alias).filter(email__startswith=EMAIL_PREFIX).delete()
+
+        if self.failures:
+            raise CommandError(f"{self.failures} check(s) failed.")
+        self.stdout.write(self.style.SUCCESS("Replica routing behaves as expected."))
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {PrincipalRefreshToken.for_user(user).access_token}')
+        return client
+
+    def replicate(self, model, objs):
+        for alias in self.replicas:
+            model.objects.using(alias).bulk_create(objs)
+
+    def expect(self, label, client, url, rows, alias):
+        contexts = {name: CaptureQueriesContext(connections[name]) for name in ['default', *self.replicas]}
+        for context in contexts.values():
+            context.__enter__()
+        try:
+            response = client.get(url)
+        finally:
+            for context in contexts.values():
+                context.__exit__(None, None, None)
+
+        served_by = [
+            name for name, context in contexts.items()
+            if any('technician_technicianprofile' in query['sql'] for query in context.captured_queries)
+        ]
+        count = len(response.data['results']) if response.status_code == 200 else None
+        on_replica = bool(served_by) and all(name in self.replicas for name in served_by)
+        ok = count == rows and (on_replica if alias == 'replica' else served_by == [alias])
+        self.failures += not ok
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(
+            f"{'ok  ' if ok else 'FAIL'} {label}: {count} row(s) from {', '.join(served_by) or 'nowhere'}"
+        ))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:22
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    table = apps.get_model('Account_User', 'SearchDocument')._meta.db_table
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        # External-content FTS5 table over the document body, synced by triggers
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE "{table}_fts" USING fts5('
+            f"body, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{table}_fts_ai" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{table}_fts"(rowid, body) VALUES (new.id, new.body); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{table}_fts_ad" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{table}_fts"("{table}_fts", rowid, body) VALUES (\'delete\', old.id, old.body); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{table}_fts_au" AFTER UPDATE ON "{table}" BEGIN '
+            f'INSERT INTO "{table}_fts"("{table}_fts", rowid, body) VALUES (\'delete\', old.id, old.body); '
+            f'INSERT INTO "{table}_fts"(rowid, body) VALUES (new.id, new.body); END'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX "{table}_body_tsv_idx" ON "{table}" '
+            f"USING GIN (to_tsvector('simple', body))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    table = apps.get_model('Account_User', 'SearchDocument')._meta.db_table
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{table}_fts_{trigger}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{table}_fts"')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_body_tsv_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Account_User', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('technician', 'Technician'), ('company', 'Maintenance Company')], max_length=20)),
+                ('entity_id', models.UUIDField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('entity_type', 'entity_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:05
+
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Account_User', 'SearchDocument')._meta.db_table
+    # A stored tsvector is computed once per write instead of once per
+    # matching row when ranking, and is what the GIN index now covers
+    schema_editor.execute(
+        f'ALTER TABLE "{table}" ADD COLUMN "body_tsv" tsvector '
+        f"GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED"
+    )
+    schema_editor.execute(f'CREATE INDEX "{table}_body_tsv_gin" ON "{table}" USING GIN ("body_tsv")')
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_body_tsv_idx"')
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Account_User', 'SearchDocument')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX "{table}_body_tsv_idx" ON "{table}" '
+        f"USING GIN (to_tsvector('simple', body))"
+    )
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_body_tsv_gin"')
+    schema_editor.execute(f'ALTER TABLE "{table}" DROP COLUMN IF EXISTS "body_tsv"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Account_User', '0004_versioning'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Account_User', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrincipalRevocation',
+            fields=[
+                ('user_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('revoked_at', models.FloatField()),
+            ],
+        ),
+    ]
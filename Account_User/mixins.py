@@ -0,0 +1,492 @@
+"""
+Serializer and viewset mixins shared by the user, technician and company
+APIs.
+
+Viewsets list the viewset mixins they use in this order, before
+viewsets.ModelViewSet, since each overrides the same DRF hooks as the
+mixins after it and defers to them with super():
+
+    ReplicaReadViewSetMixin      initial(): route reads before anything runs
+    QueuedWriteViewSetMixin      perform_update()
+    StreamingListViewSetMixin    list(): answers ?stream=1, else falls through
+    ProjectedListViewSetMixin    list(): paginated projection
+    EagerLoadingViewSetMixin     get_queryset(): joins, which projections skip
+    MultiGetViewSetMixin         the `batch` route
+"""
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from Mtambo_BackendApis import db_router, write_queue
+from Mtambo_BackendApis.lru import MISSING, LRUCache
+from Mtambo_BackendApis.renderers import iter_json_array
+from .projections import Projection
+
+
+class Fieldset:
+    """
+    The fields a client asked for with `?fields=` and the relations it asked
+    to expand with `?expand=`, each held as a tree of dotted names.
+
+    `?fields=id,user.first_name` renders `id` and the nested `user` with only
+    its `first_name`. A nested relation named in `fields` without a
+    sub-selection is rendered as its primary key, unless it is also named in
+    `expand`. Without `fields` every field is rendered, as before.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @staticmethod
+    def parse(value):
+        tree = {}
+        for path in value.split(','):
+            node = tree
+            for name in filter(None, (part.strip() for part in path.split('.'))):
+                node = node.setdefault(name, {})
+        return tree
+
+    @classmethod
+    def from_query_params(cls, query_params, fields_param='fields', expand_param='expand'):
+        """
+        Return the requested Fieldset, or None when neither parameter is given.
+        """
+        fields = cls.parse(query_params.get(fields_param, ''))
+        expand = cls.parse(query_params.get(expand_param, ''))
+        if not fields and not expand:
+            return None
+        return cls(fields or None, expand)
+
+    def unknown(self, serializer_class):
+        """
+        Return the dotted names in `fields` and in `expand` that
+        `serializer_class` cannot render, or cannot expand, as two lists.
+        """
+        fields = serializer_class().fields
+        return (
+            sorted(_unknown_names(self.fields or {}, fields)),
+            sorted(_unknown_names(self.expand, fields, relations=True)),
+        )
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def nested(self, name):
+        """
+        Return the Fieldset of the nested relation `name`, or None when it is
+        to be rendered as its primary key.
+        """
+        expand = self.expand.get(name)
+        selected = self.fields.get(name) if self.fields is not None else None
+        if self.fields is None or selected:
+            return Fieldset(selected or None, expand)
+        if expand is not None:
+            return Fieldset(None, expand)
+        return None
+
+    def __str__(self):
+        def paths(tree, prefix=''):
+            for name in sorted(tree):
+                if tree[name]:
+                    yield from paths(tree[name], f'{prefix}{name}.')
+                else:
+                    yield prefix + name
+
+        fields = ','.join(paths(self.fields)) if self.fields is not None else '*'
+        return f"fields={fields};expand={','.join(paths(self.expand))}"
+
+
+def _unknown_names(tree, fields, relations=False, prefix=''):
+    """
+    Yield the dotted names in `tree` that are not readable fields, or (with
+    `relations`) not nested serializers, of the serializer `fields`.
+    """
+    for name, subtree in tree.items():
+        field = fields.get(name)
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        is_serializer = isinstance(nested, serializers.Serializer)
+        if field is None or field.write_only or (relations and not is_serializer):
+            yield prefix + name
+        elif subtree and not is_serializer:
+            # Only nested serializers take a sub-selection
+            yield from (f'{prefix}{name}.{child}' for child in subtree)
+        elif subtree:
+            yield from _unknown_names(subtree, nested.fields, relations, f'{prefix}{name}.')
+
+
+def _resolve_fields(model, attrs):
+    """
+    Return the model fields named by a chain of attributes, or None if any
+    of them is not a model field (e.g. a property).
+    """
+    fields = []
+    for attr in attrs:
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        fields.append(field)
+        model = field.related_model
+    return fields
+
+
+# (serializer class, fieldset) -> lookups, see EagerLoadingMixin.get_lookups
+_lookups = LRUCache(maxsize=256)
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin that works out the relations and columns its fields
+    read, so the queryset feeding it can join or prefetch them up front and,
+    for a sparse Fieldset, load nothing else.
+
+    Relations come from nested serializers that also use this mixin (followed
+    recursively, prefixed by the nested field's source) and from dotted field
+    sources such as `maintenance_company.company_name`. Computed fields
+    declare what they read in `field_dependencies`; a lookup there that names
+    a to-one relation is joined and loaded in full. A computed field without
+    an entry keeps every column loaded.
+
+    The Fieldset in the serializer context (set by EagerLoadingViewSetMixin)
+    also prunes the rendered fields.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    field_dependencies = {}
+
+    @property
+    def fieldset(self):
+        # Nested serializers are handed their part of the parent's fieldset
+        return getattr(self, '_fieldset', None) or self.context.get('fieldset')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset or Fieldset()
+        if fieldset.fields is not None:
+            fields = {name: field for name, field in fields.items() if name in fieldset.fields}
+
+        for name, field in fields.items():
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if field.write_only or not isinstance(nested, EagerLoadingMixin):
+                continue
+            nested_fieldset = fieldset.nested(name)
+            if nested_fieldset is None and not many:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+            else:
+                nested._fieldset = nested_fieldset or Fieldset()
+        return fields
+
+    def get_lookups(self, prefix=''):
+        """
+        Return the (select_related, prefetch_related, only) lookups the
+        rendered fields need; `only` is None when the columns cannot be
+        narrowed down.
+        """
+        model = self.Meta.model
+        select_related = [prefix + name for name in self.select_related_fields]
+        prefetch_related = [prefix + name for name in self.prefetch_related_fields]
+        only = list(select_related)
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if isinstance(nested, EagerLoadingMixin):
+                path = prefix + '__'.join(field.source_attrs)
+                nested_select, nested_prefetch, nested_only = nested.get_lookups(f"{path}__")
+                relation = (_resolve_fields(model, field.source_attrs) or [None])[-1]
+                if not many and relation is not None and relation.is_relation:
+                    # Django fills a one-to-one pointing back at this row with
+                    # this very instance, so it needs every column loaded here
+                    name = relation.remote_field.get_accessor_name() if relation.concrete else relation.field.name
+                    back = f"{path}__{name}"
+                    if back in nested_select:
+                        nested_select = [lookup for lookup in nested_select if lookup != back]
+                        only = None
+                if many:
+                    # Joins across a to-many relation must become prefetches
+                    prefetch_related.append(path)
+                    prefetch_related.extend(nested_select)
+                else:
+                    select_related.append(path)
+                    select_related.extend(nested_select)
+                    only = None if only is None or nested_only is None else only + [path] + nested_only
+                prefetch_related.extend(nested_prefetch)
+                continue
+
+            if name in self.field_dependencies:
+                dependencies = [lookup.split('__') for lookup in self.field_dependencies[name]]
+                join_last = True
+            elif field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                only = None
+                continue
+            else:
+                dependencies = [field.source_attrs]
+                # A primary key field reads the foreign key column, not the row
+                join_last = False
+
+            for attrs in dependencies:
+                resolved = _resolve_fields(model, attrs)
+                if resolved is None:
+                    only = None
+                    continue
+                joined = resolved if join_last and resolved[-1].is_relation else resolved[:-1]
+                for index, relation in enumerate(joined):
+                    if relation.many_to_many or relation.one_to_many:
+                        only = None
+                        break
+                    select_related.append(prefix + '__'.join(attrs[:index + 1]))
+                if only is not None:
+                    only.append(prefix + '__'.join(attrs))
+
+        # Keep the first occurrence of each lookup
+        return (
+            list(dict.fromkeys(select_related)),
+            list(dict.fromkeys(prefetch_related)),
+            list(dict.fromkeys(only)) if only is not None else None,
+        )
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fieldset=None):
+        """
+        Apply the select_related/prefetch_related lookups this serializer
+        needs and, for a sparse fieldset, load only the columns it renders.
+        """
+        key = (cls, str(fieldset) if fieldset is not None else None)
+        lookups = _lookups.get(key)
+        if lookups is MISSING:
+            lookups = cls(context={'fieldset': fieldset}).get_lookups()
+            _lookups.set(key, lookups)
+
+        select_related, prefetch_related, only = lookups
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if fieldset is not None and only is not None:
+            queryset = queryset.only(*only)
+        return queryset
+
+
+class EagerLoadingViewSetMixin:
+    """
+    ViewSet mixin that applies the eager loading declared by the serializer
+    used for the current action, narrowed to the Fieldset requested with
+    `?fields=`/`?expand=` on reads.
+
+    Set `eager_loading = False` to look objects up without it, e.g. when only
+    permissions are checked before a conditional response.
+    """
+    eager_loading = True
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def get_fieldset(self, serializer_class=None):
+        """
+        Return the Fieldset requested for this read, or None for every field.
+        Names `serializer_class` (by default the action's serializer) does
+        not render are rejected with a 400.
+        """
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        fieldset = Fieldset.from_query_params(self.request.query_params, self.fields_param, self.expand_param)
+        if fieldset is None:
+            return None
+
+        serializer_class = serializer_class or self.get_serializer_class()
+        checked = self.__dict__.setdefault('_checked_fieldsets', set())
+        if serializer_class not in checked:
+            unknown_fields, unknown_expand = fieldset.unknown(serializer_class)
+            errors = {
+                param: [f"Unknown field: {name}" for name in names]
+                for param, names in ((self.fields_param, unknown_fields), (self.expand_param, unknown_expand))
+                if names
+            }
+            if errors:
+                raise serializers.ValidationError(errors)
+            checked.add(serializer_class)
+        return fieldset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if self.eager_loading and issubclass(serializer_class, EagerLoadingMixin):
+            queryset = serializer_class.setup_eager_loading(queryset, self.get_fieldset())
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+
+class ProjectedListViewSetMixin:
+    """
+    ViewSet mixin that serves `list` from a `.values()` projection of the
+    serializer (see Account_User.projections) instead of model instances,
+    with the same output. Set `projected_list = False` to serialize instances.
+
+    Goes before EagerLoadingViewSetMixin, whose joins the projection replaces.
+    """
+    projected_list = True
+
+    def get_projection(self, serializer_class=None):
+        """
+        Return the projection of `serializer_class` (by default the action's
+        serializer) for the requested Fieldset.
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        return Projection.for_serializer(serializer_class, self.get_fieldset(serializer_class))
+
+    def list(self, request, *args, **kwargs):
+        if not self.projected_list:
+            return super().list(request, *args, **kwargs)
+
+        projection = self.get_projection()
+        self.eager_loading = False
+        queryset = projection.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.render_many(page))
+        return Response(projection.render_many(queryset))
+
+
+class StreamingListViewSetMixin:
+    """
+    ViewSet mixin letting superusers fetch a whole listing with `?stream=1`.
+    Rows are read with `.iterator()` and written out as one JSON array
+    through a StreamingHttpResponse, `stream_chunk_size` rows at a time, so
+    memory stays bounded however many rows there are. Filters, search and
+    ordering apply as usual; pagination does not.
+
+    Rows go through the ProjectedListViewSetMixin projection when the view
+    has one, and through the serializer otherwise.
+    """
+    stream_param = 'stream'
+    stream_chunk_size = 1000
+
+    def can_stream(self, request):
+        return request.user.is_superuser
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_param) not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        if not self.can_stream(request):
+            raise PermissionDenied('Only superusers can stream a full listing.')
+
+        if getattr(self, 'projected_list', False):
+            projection = self.get_projection()
+            self.eager_loading = False
+            queryset = projection.values(self.filter_queryset(self.get_queryset()))
+            render = projection.render_many
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+
+            def render(rows):
+                return self.get_serializer(rows, many=True).data
+
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        if get_ordering is not None:
+            # The order of the paginated listing, tiebreaker included
+            queryset = queryset.order_by(*get_ordering(queryset, self))
+
+        # Route now: the rows are read after the view, and the routing
+        # middleware, have returned
+        rows = queryset.using(queryset.db).iterator(chunk_size=self.stream_chunk_size)
+        chunks = (render(chunk) for chunk in iter(lambda: list(islice(rows, self.stream_chunk_size)), []))
+        return StreamingHttpResponse(iter_json_array(chunks), content_type='application/json')
+
+
+class ReplicaReadViewSetMixin:
+    """
+    ViewSet mixin that serves `replica_actions` from a read replica, unless
+    the caller wrote recently (see Mtambo_BackendApis.db_router).
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and not db_router.is_sticky(request.user):
+            db_router.read_from_replica()
+
+
+class QueuedWriteViewSetMixin:
+    """
+    ViewSet mixin that runs updates through the write queue (see
+    Mtambo_BackendApis.write_queue), so concurrent profile edits are
+    serialized and committed in batches instead of contending for the
+    database lock.
+    """
+
+    def perform_update(self, serializer):
+        write_queue.run(super().perform_update, serializer)
+
+
+class MultiGetViewSetMixin:
+    """
+    ViewSet mixin adding a `batch` route that returns the objects named by
+    `?ids=` (comma-separated and/or repeated) with a single IN query.
+
+    Visibility comes from get_queryset(), not per-object permission checks.
+    Results follow the requested order; ids that do not resolve to a visible
+    object are returned as `{"id": ..., "error": "not_found" | "forbidden"}`.
+    """
+    multi_get_max_ids = 500
+
+    def get_requested_ids(self, request):
+        ids = []
+        for value in request.query_params.getlist('ids'):
+            ids.extend(part.strip() for part in value.split(',') if part.strip())
+        # Drop duplicates, keeping the first position of each id
+        return list(dict.fromkeys(ids))
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Retrieve many objects at once, in the order given by `?ids=`.
+        """
+        raw_ids = self.get_requested_ids(request)
+        if not raw_ids:
+            raise serializers.ValidationError({'ids': ['This query parameter is required.']})
+        if len(raw_ids) > self.multi_get_max_ids:
+            raise serializers.ValidationError(
+                {'ids': [f'At most {self.multi_get_max_ids} ids can be requested at once.']}
+            )
+
+        queryset = self.get_queryset()
+        pk_field = queryset.model._meta.pk
+        ids = {}
+        for raw_id in raw_ids:
+            try:
+                ids[raw_id] = pk_field.to_python(raw_id)
+            except ValidationError:
+                ids[raw_id] = None
+
+        wanted = [pk for pk in ids.values() if pk is not None]
+        objects = {obj.pk: obj for obj in queryset.filter(pk__in=wanted)}
+        data = dict(zip(objects, self.get_serializer(list(objects.values()), many=True).data))
+
+        # Only ids that are not visible need the existence check
+        hidden = [pk for pk in wanted if pk not in objects]
+        existing = set(
+            queryset.model._default_manager.filter(pk__in=hidden).values_list('pk', flat=True)
+        ) if hidden else set()
+
+        results = []
+        for raw_id, pk in ids.items():
+            if pk in objects:
+                results.append(data[pk])
+            else:
+                results.append({'id': raw_id, 'error': 'forbidden' if pk in existing else 'not_found'})
+        return Response({'results': results})
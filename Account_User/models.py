@@ -2,6 +2,39 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 import uuid
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import hashing
+
+class VersionedModel(models.Model):
+    """
+    Adds `updated_at` and a `version` counter that every save() bumps, so read
+    endpoints can derive ETags from an aggregate query instead of the payload.
+
+    Queryset update() and bulk_create() bypass save(); code that changes rows
+    that way must bump both fields itself (see bump_version()).
+    """
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = {*update_fields, 'updated_at', 'version'}
+        super().save(*args, **kwargs)
+
+
+def bump_version():
+    """
+    Field values for queryset.update() calls that change VersionedModel rows.
+    """
+    return {'updated_at': timezone.now(), 'version': models.F('version') + 1}
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, phone_number, password=None, **extra_fields):
@@ -34,7 +67,7 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, phone_number, password, **extra_fields)
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(AbstractBaseUser, PermissionsMixin, VersionedModel):
     ACCOUNT_TYPE_CHOICES = [
         ('developer', 'Developer'), 
         ('maintenance', 'Maintenance'), 
@@ -66,5 +99,94 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta(VersionedModel.Meta):
+        abstract = False
+        indexes = [
+            # Keyset pagination orders on these with the primary key as tiebreaker
+            models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+            models.Index(fields=['first_name', 'id'], name='user_first_name_id_idx'),
+        ]
+
+    # Attributes embedded in JWTs as principal claims (see Account_User.tokens)
+    PRINCIPAL_FIELDS = ('account_type', 'is_superuser', 'is_staff', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored principal so Account_User.signals can detect changes
+        instance._persisted_principal = instance.principal_state()
+        return instance
+
+    def principal_state(self):
+        return tuple(self.__dict__.get(name) for name in self.PRINCIPAL_FIELDS)
+
+    @cached_property
+    def administered_company_id(self):
+        """
+        Id of the maintenance company this user administers, if any.
+        """
+        return self.administered_maintenance_companies.values_list('id', flat=True).first()
+
+    # Hashing and verification run in the shared pool (see Account_User.hashing)
+    def set_password(self, raw_password):
+        self.password = hashing.hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            # Upgrade the stored hash without firing password_changed
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await hashing.averify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = await hashing.ahash_password(raw_password)
+            await self.asave(update_fields=['password'])
+        return is_correct
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} ({self.email})"
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search text for a technician or maintenance company.
+
+    The body is indexed with FTS5 on SQLite and a GIN index over a stored
+    tsvector column on PostgreSQL (see migrations 0003 and 0005);
+    Account_User.search keeps it in sync.
+    """
+    ENTITY_TYPE_CHOICES = [
+        ('technician', 'Technician'),
+        ('company', 'Maintenance Company'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPE_CHOICES)
+    entity_id = models.UUIDField()
+    body = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'entity_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_type_display()} {self.entity_id}"
+
+
+class PrincipalRevocation(models.Model):
+    """
+    When a user's access tokens were last revoked, as a Unix timestamp
+    comparable with their sub-second `iat` (see Account_User.authentication).
+
+    Keyed by the bare user id rather than a foreign key, so the revocation
+    of a deleted user outlives their row.
+    """
+    user_id = models.UUIDField(primary_key=True)
+    revoked_at = models.FloatField()
+
     def __str__(self):
-        return f"{self.first_name} {self.last_name} ({self.email})"
\ No newline at end of file
+        return f"Principal {self.user_id} revoked at {self.revoked_at}"
@@ -24,7 +24,7 @@ class UserPermission(permissions.BasePermission):
             return True
         
         # Allow specific actions for authenticated users
-        allowed_actions = ['retrieve', 'update', 'partial_update', 'destroy', 'profile', 'change_password']
+        allowed_actions = ['retrieve', 'update', 'partial_update', 'destroy', 'profile', 'change_password', 'batch']
         return view.action in allowed_actions
 
     def has_object_permission(self, request, view, obj):
@@ -0,0 +1,99 @@
+"""
+Read-only `.values()` projections of serializers.
+
+A Projection is compiled once from a serializer's fields into the list of
+`.values()` lookups they read and a renderer turning each row dict into the
+serializer's output, formatted by the same fields' `to_representation`. List
+endpoints can then skip building model instances and walking the serializer
+for every row.
+
+Supported fields are plain and dotted model sources, primary key related
+fields and nested to-one serializers (followed recursively). A
+SerializerMethodField needs a `project_<name>(prefix)` classmethod on its
+serializer returning `(lookups, render)`, where `render(row)` returns what
+the `get_<name>` method would. Anything else raises ImproperlyConfigured
+when the projection is compiled.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+from Mtambo_BackendApis.lru import MISSING, LRUCache
+
+# (serializer class, fieldset) -> Projection, see Projection.for_serializer
+_projections = LRUCache(maxsize=128)
+
+
+class Projection:
+
+    def __init__(self, serializer, prefix=''):
+        self.lookups = []
+        self.renderers = []
+        for name, field in serializer.fields.items():
+            if not field.write_only:
+                self.renderers.append((field.field_name, self.compile(serializer, name, field, prefix)))
+        self.lookups = list(dict.fromkeys(self.lookups))
+
+    @classmethod
+    def for_serializer(cls, serializer_class, fieldset=None):
+        """
+        Return the (cached) projection of `serializer_class`, narrowed to a
+        Fieldset like the serializer itself.
+        """
+        key = (serializer_class, str(fieldset) if fieldset is not None else None)
+        projection = _projections.get(key)
+        if projection is MISSING:
+            projection = cls(serializer_class(context={'fieldset': fieldset}))
+            _projections.set(key, projection)
+        return projection
+
+    def compile(self, serializer, name, field, prefix):
+        """
+        Return the function rendering `field` from a row, registering the
+        lookups it reads.
+        """
+        if isinstance(field, serializers.SerializerMethodField):
+            project = getattr(serializer, f'project_{name}', None)
+            if project is None:
+                raise ImproperlyConfigured(
+                    f"{serializer.__class__.__name__}.{name} needs a project_{name}() to be projected."
+                )
+            lookups, render = project(prefix)
+            self.lookups.extend(lookups)
+            return render
+
+        if isinstance(field, serializers.ListSerializer) or field.source == '*':
+            raise ImproperlyConfigured(
+                f"{serializer.__class__.__name__}.{name} cannot be projected with .values()."
+            )
+
+        lookup = prefix + '__'.join(field.source_attrs)
+        if isinstance(field, serializers.BaseSerializer):
+            nested = Projection(field, f'{lookup}__')
+            self.lookups.append(lookup)
+            self.lookups.extend(nested.lookups)
+            # A missing related row renders as None, as the serializer does
+            return lambda row: None if row[lookup] is None else nested.render(row)
+
+        self.lookups.append(lookup)
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            # .values() already returns the related primary key
+            return lambda row: row[lookup]
+        if type(field) in (serializers.CharField, serializers.EmailField):
+            # Text columns come back as str
+            return lambda row: row[lookup]
+        to_representation = field.to_representation
+        return lambda row: None if (value := row[lookup]) is None else to_representation(value)
+
+    def values(self, queryset):
+        """
+        Return `queryset` as rows for render(), keeping its annotations (e.g.
+        a search rank the ordering refers to).
+        """
+        return queryset.values(*self.lookups, *queryset.query.annotations)
+
+    def render(self, row):
+        return {key: render(row) for key, render in self.renderers}
+
+    def render_many(self, rows):
+        render = self.render
+        return [render(row) for row in rows]
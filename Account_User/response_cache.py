@@ -0,0 +1,221 @@
+"""
+Read-through cache for serialized detail responses.
+
+User detail and profile, and company detail, are read far more often than
+they change. Their serialized payloads are cached under
+
+    response:<entity>:<id>:<variant>:<visibility>
+
+where `variant` names the serializer/endpoint and `visibility` the class of
+caller (superuser, the user themselves, the company owner). Entries hold
+serializer data, not rendered bytes, so one entry serves every format the
+client can negotiate (JSON, MessagePack) and keys need no media type; the
+responses carry Vary: Accept. Every key an
+entity can have is declared in VARIANTS, so invalidation deletes exactly
+those keys; Account_User.signals does so when users, profiles or technician
+membership change, and the bulk paths that bypass signals call invalidate()
+themselves.
+
+Invalidation only reaches the backend it runs against, so with several
+worker processes the backend must be shared (system check
+Account_User.E002); an in-process LRU suits a single process.
+
+Settings:
+    RESPONSE_CACHE_BACKEND      the alias of a Django cache to share entries
+                                between processes (default: 'default'),
+                                'locmem' for an in-process LRU, or None to
+                                disable
+    RESPONSE_CACHE_MAX_ENTRIES  size bound of the in-process LRU (default: 10000)
+    RESPONSE_CACHE_TTL          seconds an entry lives (default: 300)
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from Mtambo_BackendApis.lru import MISSING, LRUCache
+
+KEY_PREFIX = 'response'
+
+USER = 'user'
+COMPANY = 'company'
+
+# entity -> variant -> visibility classes it is cached for
+VARIANTS = {
+    USER: {'detail': ('superuser', 'self'), 'profile': ('superuser', 'self')},
+    COMPANY: {'detail': ('superuser', 'owner')},
+}
+
+
+def get_backend_name():
+    return getattr(settings, 'RESPONSE_CACHE_BACKEND', 'default')
+
+
+def get_max_entries():
+    return getattr(settings, 'RESPONSE_CACHE_MAX_ENTRIES', 10000)
+
+
+def get_ttl():
+    return getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+
+class LocMemBackend:
+    """
+    Per-process LRU; invalidation only reaches the process it runs in.
+    """
+    name = 'locmem'
+
+    def __init__(self, max_entries, ttl):
+        self._cache = LRUCache(maxsize=max_entries, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete_many(self, keys):
+        self._cache.delete(*keys)
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class DjangoCacheBackend:
+    """
+    A configured Django cache, shared by every process that uses it.
+    """
+
+    def __init__(self, alias, ttl):
+        self.name = alias
+        self.ttl = ttl
+        self._cache = caches[alias]
+
+    def get(self, key):
+        return self._cache.get(key, MISSING)
+
+    def set(self, key, value):
+        self._cache.set(key, value, timeout=self.ttl)
+
+    def delete_many(self, keys):
+        self._cache.delete_many(keys)
+
+
+class NullBackend:
+    name = None
+
+    def get(self, key):
+        return MISSING
+
+    def set(self, key, value):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+
+class ResponseCache:
+    """
+    Cache of response payloads with hit/miss counters per entity.
+    """
+
+    def __init__(self, backend, variants=VARIANTS):
+        self.backend = backend
+        self.variants = variants
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def key(self, entity, pk, variant, visibility):
+        return f'{KEY_PREFIX}:{entity}:{pk}:{variant}:{visibility}'
+
+    def get(self, entity, pk, variant, visibility):
+        """
+        Return the cached value, or MISSING.
+        """
+        value = self.backend.get(self.key(entity, pk, variant, visibility))
+        self._count(entity, 'misses' if value is MISSING else 'hits')
+        return value
+
+    def peek(self, entity, pk, variant, visibility):
+        """
+        get() without touching the counters, for repeated polling.
+        """
+        return self.backend.get(self.key(entity, pk, variant, visibility))
+
+    def set(self, entity, pk, variant, visibility, value):
+        self.backend.set(self.key(entity, pk, variant, visibility), value)
+        self._count(entity, 'sets')
+
+    def invalidate(self, entity, *pks):
+        """
+        Drop every cached response for the given ids of `entity`.
+
+        Keys are deleted at once and again when the current transaction
+        commits, so a read that raced the write cannot leave a stale entry.
+        """
+        keys = [
+            self.key(entity, pk, variant, visibility)
+            for pk in filter(None, pks)
+            for variant, visibilities in self.variants[entity].items()
+            for visibility in visibilities
+        ]
+        if not keys:
+            return
+        self.backend.delete_many(keys)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self.backend.delete_many(keys))
+        self._count(entity, 'invalidations', len(keys))
+
+    def _count(self, entity, event, n=1):
+        with self._lock:
+            self._counts[entity, event] += n
+
+    def stats(self):
+        """
+        Counters since process start, overall and per entity.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        events = ('hits', 'misses', 'sets', 'invalidations')
+        entities = {
+            entity: {event: counts.get((entity, event), 0) for event in events}
+            for entity in self.variants
+        }
+        totals = {event: sum(entity[event] for entity in entities.values()) for event in events}
+        lookups = totals['hits'] + totals['misses']
+        return {
+            'backend': self.backend.name,
+            'entries': len(self.backend) if hasattr(self.backend, '__len__') else None,
+            **totals,
+            'hit_rate': round(totals['hits'] / lookups, 4) if lookups else None,
+            'entities': entities,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Return the shared ResponseCache configured by the settings.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                name = get_backend_name()
+                if name is None:
+                    backend = NullBackend()
+                elif name == 'locmem':
+                    backend = LocMemBackend(get_max_entries(), get_ttl())
+                else:
+                    backend = DjangoCacheBackend(name, get_ttl())
+                _cache = ResponseCache(backend)
+    return _cache
+
+
+def invalidate(entity, *pks):
+    get_cache().invalidate(entity, *pks)
@@ -0,0 +1,235 @@
+"""
+Full-text search over technicians and maintenance companies.
+
+Each technician and company has one SearchDocument row whose body is
+indexed by FTS5 (SQLite) or a GIN index over a stored tsvector
+(PostgreSQL). Queries are ranked (bm25 / ts_rank) and every term is matched
+as a prefix, so partial input from a typeahead box matches as the user
+types.
+
+FullTextSearchFilter matches and ranks within the view's own queryset, so
+permission scoping and pagination apply to every match. Only the best
+SEARCH_RESULT_LIMIT (default 100) matches are scored.
+"""
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import SearchDocument
+
+TECHNICIAN = 'technician'
+COMPANY = 'company'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_result_limit():
+    return getattr(settings, 'SEARCH_RESULT_LIMIT', 100)
+
+
+def technician_document(technician):
+    user = technician.user
+    return ' '.join(filter(None, [
+        user.first_name, user.last_name, user.email, technician.specialization,
+    ]))
+
+
+def company_document(company):
+    user = company.user
+    return ' '.join(filter(None, [
+        company.company_name, company.registration_number,
+        user.email, user.first_name, user.last_name,
+    ]))
+
+
+def _upsert(entity_type, documents):
+    """
+    Insert or replace the bodies for a list of (entity_id, body) pairs.
+    """
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(entity_type=entity_type, entity_id=pk, body=body) for pk, body in documents],
+        update_conflicts=True,
+        unique_fields=['entity_type', 'entity_id'],
+        update_fields=['body'],
+    )
+
+
+def index_technicians(technicians):
+    """
+    (Re)index technicians; expects `user` to be loaded or cheap to load.
+    """
+    _upsert(TECHNICIAN, [(t.pk, technician_document(t)) for t in technicians])
+
+
+def index_companies(companies):
+    """
+    (Re)index companies; expects `user` to be loaded or cheap to load.
+    """
+    _upsert(COMPANY, [(c.pk, company_document(c)) for c in companies])
+
+
+def remove(entity_type, entity_ids):
+    SearchDocument.objects.filter(entity_type=entity_type, entity_id__in=entity_ids).delete()
+
+
+def rebuild(batch_size=5000):
+    """
+    Rebuild every document from the source tables. Returns the number indexed.
+    """
+    from maintenance_company.models import MaintenanceCompanyProfile
+    from technician.models import TechnicianProfile
+
+    SearchDocument.objects.all().delete()
+    total = 0
+    sources = [
+        (TECHNICIAN, TechnicianProfile.objects.select_related('user'), technician_document),
+        (COMPANY, MaintenanceCompanyProfile.objects.select_related('user'), company_document),
+    ]
+    for entity_type, queryset, build in sources:
+        batch = []
+        for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(entity_type=entity_type, entity_id=obj.pk, body=build(obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+    return total
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+def fts5_match(tokens):
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def tsquery_match(tokens):
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def search(entity_type, query, limit=None, within=None):
+    """
+    Return [(entity_id, score), ...] best match first, at most `limit`
+    (SEARCH_RESULT_LIMIT) of them. Every term must match the start of an
+    indexed word. `within`, a queryset of the entity's model, restricts the
+    matches to its rows before the limit applies.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    limit = limit or get_result_limit()
+    table = SearchDocument._meta.db_table
+    using = within.db if within is not None else 'default'
+    vendor = connections[using].vendor
+
+    scope_sql, scope_params = '', []
+    if within is not None and within.query.has_filters():
+        sql, scope_params = within.order_by().values('pk').query.sql_with_params()
+        scope_sql = f' AND d.entity_id IN ({sql})'
+
+    if vendor == 'sqlite':
+        # CROSS JOIN keeps the FTS scan outermost; otherwise SQLite may run the
+        # MATCH again for every document of the entity type
+        sql = (
+            f'SELECT d.entity_id, -bm25("{table}_fts") AS score '
+            f'FROM "{table}_fts" CROSS JOIN "{table}" d ON d.id = "{table}_fts".rowid '
+            f'WHERE "{table}_fts" MATCH %s AND d.entity_type = %s{scope_sql} '
+            f'ORDER BY score DESC LIMIT %s'
+        )
+        params = [fts5_match(tokens), entity_type, *scope_params, limit]
+    elif vendor == 'postgresql':
+        # body_tsv is the stored to_tsvector('simple', body) (migration 0005)
+        sql = (
+            f"SELECT d.entity_id, ts_rank(d.body_tsv, q) AS score "
+            f"FROM \"{table}\" d, to_tsquery('simple', %s) q "
+            f"WHERE d.body_tsv @@ q AND d.entity_type = %s{scope_sql} "
+            f"ORDER BY score DESC LIMIT %s"
+        )
+        params = [tsquery_match(tokens), entity_type, *scope_params, limit]
+    else:
+        # No native full-text index on this backend; fall back to substring matching
+        documents = SearchDocument.objects.using(using).filter(_substring_condition(entity_type, tokens))
+        if within is not None:
+            documents = documents.filter(entity_id__in=within.order_by().values('pk'))
+        return [(entity_id, 0.0) for entity_id in documents.values_list('entity_id', flat=True)[:limit]]
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(uuid.UUID(str(entity_id)), float(score)) for entity_id, score in cursor.fetchall()]
+
+
+def match_ids(entity_type, query, using='default'):
+    """
+    Return an expression for the ids of every `entity_type` matching
+    `query`, however many, to filter with `pk__in`.
+    """
+    tokens = tokenize(query)
+    table = SearchDocument._meta.db_table
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        return RawSQL(
+            f'SELECT d.entity_id FROM "{table}_fts" CROSS JOIN "{table}" d ON d.id = "{table}_fts".rowid '
+            f'WHERE "{table}_fts" MATCH %s AND d.entity_type = %s',
+            [fts5_match(tokens), entity_type],
+        )
+    if vendor == 'postgresql':
+        return RawSQL(
+            f"SELECT entity_id FROM \"{table}\" "
+            f"WHERE body_tsv @@ to_tsquery('simple', %s) AND entity_type = %s",
+            [tsquery_match(tokens), entity_type],
+        )
+    return SearchDocument.objects.filter(_substring_condition(entity_type, tokens)).values('entity_id')
+
+
+def _substring_condition(entity_type, tokens):
+    condition = Q(entity_type=entity_type)
+    for token in tokens:
+        condition &= Q(body__icontains=token)
+    return condition
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the search index.
+
+    Views opt in by setting `search_entity_type`; every matching row of the
+    view's queryset is returned, annotated with `search_rank` and, unless the
+    client asked for an explicit ordering, best match first. The best
+    SEARCH_RESULT_LIMIT matches are scored; any further ones follow with a
+    rank of 0, in primary key order. Views without an index keep the stock
+    `search_fields` behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        entity_type = getattr(view, 'search_entity_type', None)
+        query = request.query_params.get(self.search_param, '')
+        if entity_type is None:
+            return super().filter_queryset(request, queryset, view)
+        if not tokenize(query):
+            return queryset
+
+        # Both run against the view's queryset, so its scoping applies to the
+        # ranking and no match is lost to other rows ranking higher
+        matches = search(entity_type, query, within=queryset)
+        score = Case(*[When(pk=pk, then=Value(score)) for pk, score in matches], output_field=FloatField())
+        # Testing membership first spares the unscored rows the CASE's branches
+        rank = Case(
+            When(pk__in=[pk for pk, _ in matches], then=score),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        queryset = queryset.filter(pk__in=match_ids(entity_type, query, queryset.db)).annotate(search_rank=rank)
+
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank')
+        return queryset
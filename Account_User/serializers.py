@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from maintenance_company.models import MaintenanceCompanyProfile
 from technician.models import TechnicianProfile
 from developer.models import DeveloperProfile
+from .mixins import EagerLoadingMixin
+from .projections import Projection
 
 User = get_user_model()
 
@@ -137,9 +139,14 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 # ✅ User Detail Serializer (for fetching user data)
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
 
+    # get_profile reads whichever of these matches the account type
+    field_dependencies = {
+        'profile': ('account_type', 'technician_profile', 'maintenance_profile', 'developer_profile'),
+    }
+
     class Meta:
         model = User
         fields = [
@@ -147,26 +154,27 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'account_type', 'profile'
         ]
 
-    def get_profile(self, obj):
-        # Mapping of account types to human-readable profile names
-        PROFILE_NAMES = {
-            'technician': 'Technician Profile',
-            'maintenance': 'Maintenance Company Profile',
-            'developer': 'Developer Profile',
-            'admin': 'Administrator Profile'
-        }
+    # Mapping of account types to human-readable profile names
+    PROFILE_NAMES = {
+        'technician': 'Technician Profile',
+        'maintenance': 'Maintenance Company Profile',
+        'developer': 'Developer Profile',
+        'admin': 'Administrator Profile'
+    }
+
+    # The profile serializer for each account type that has one
+    PROFILE_SERIALIZERS = {
+        'technician': BaseTechnicianProfileSerializer,
+        'maintenance': BaseMaintenanceProfileSerializer,
+        'developer': BaseDeveloperProfileSerializer
+    }
 
+    def get_profile(self, obj):
         # Get the appropriate profile serializer
-        profile_map = {
-            'technician': BaseTechnicianProfileSerializer,
-            'maintenance': BaseMaintenanceProfileSerializer,
-            'developer': BaseDeveloperProfileSerializer
-        }
-
-        profile_serializer = profile_map.get(obj.account_type)
+        profile_serializer = self.PROFILE_SERIALIZERS.get(obj.account_type)
         if not profile_serializer:
             return {
-                'type': PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
+                'type': self.PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
                 'details': None
             }
 
@@ -175,15 +183,41 @@ class UserDetailSerializer(serializers.ModelSerializer):
             profile_data = profile_serializer(profile).data
             
             return {
-                'type': PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
+                'type': self.PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
                 'details': profile_data
             }
         except Exception:
             return {
-                'type': PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
+                'type': self.PROFILE_NAMES.get(obj.account_type, 'Unknown Profile'),
                 'details': None
             }
 
+    @classmethod
+    def project_profile(cls, prefix):
+        """
+        get_profile() for .values() rows (see Account_User.projections).
+        """
+        account_type_lookup = f'{prefix}account_type'
+        profiles = {
+            account_type: (f'{prefix}{account_type}_profile', Projection(serializer_class(), f'{prefix}{account_type}_profile__'))
+            for account_type, serializer_class in cls.PROFILE_SERIALIZERS.items()
+        }
+        lookups = [account_type_lookup]
+        for lookup, projection in profiles.values():
+            lookups.append(lookup)
+            lookups.extend(projection.lookups)
+
+        def render(row):
+            account_type = row[account_type_lookup]
+            details = None
+            if account_type in profiles:
+                lookup, projection = profiles[account_type]
+                if row[lookup] is not None:
+                    details = projection.render(row)
+            return {'type': cls.PROFILE_NAMES.get(account_type, 'Unknown Profile'), 'details': details}
+
+        return lookups, render
+
 class UserPasswordChangeSerializer(serializers.Serializer):
     old_password = serializers.CharField(write_only=True, required=True)
     new_password = serializers.CharField(write_only=True, required=True)
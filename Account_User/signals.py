@@ -0,0 +1,163 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from developer.models import DeveloperProfile
+from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
+from . import blacklist, response_cache, search
+from .authentication import revoke_principal
+
+User = get_user_model()
+
+# User fields that appear in technician or company search documents
+SEARCHABLE_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+# User fields that appear in cached user and company responses
+CACHED_USER_FIELDS = {'email', 'phone_number', 'first_name', 'last_name', 'account_type'}
+
+
+@receiver(post_save, sender=TechnicianProfile)
+def index_technician(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_technicians([instance])
+
+
+@receiver(post_delete, sender=TechnicianProfile)
+def unindex_technician(sender, instance, **kwargs):
+    search.remove(search.TECHNICIAN, [instance.pk])
+
+
+@receiver(post_save, sender=MaintenanceCompanyProfile)
+def index_company(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_companies([instance])
+
+
+@receiver(post_delete, sender=MaintenanceCompanyProfile)
+def unindex_company(sender, instance, **kwargs):
+    search.remove(search.COMPANY, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def reindex_user_documents(sender, instance, created, raw, update_fields, **kwargs):
+    """
+    Refresh the documents that embed this user's name or email.
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not SEARCHABLE_USER_FIELDS & set(update_fields):
+        return
+
+    technicians = TechnicianProfile.objects.filter(user=instance)
+    if technicians:
+        search.index_technicians([_with_user(t, instance) for t in technicians])
+
+    companies = MaintenanceCompanyProfile.objects.filter(user=instance)
+    if companies:
+        search.index_companies([_with_user(c, instance) for c in companies])
+
+
+def _with_user(profile, user):
+    profile.user = user
+    return profile
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_principal(sender, instance, created, raw, **kwargs):
+    """
+    Revoke access tokens whose principal claims no longer match the user.
+    """
+    if raw or created:
+        return
+
+    persisted = getattr(instance, '_persisted_principal', None)
+    current = instance.principal_state()
+    if persisted is not None and persisted != current:
+        revoke_principal(instance.pk)
+    instance._persisted_principal = current
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_principal(sender, instance, **kwargs):
+    # Principal tokens authenticate without the row, so they outlive it otherwise
+    revoke_principal(instance.pk)
+
+
+@receiver(post_save, sender=MaintenanceCompanyProfile)
+def revoke_company_admins(sender, instance, created, raw, **kwargs):
+    """
+    Revoke the company_id claim of admins gained or lost by this save.
+    """
+    if raw:
+        return
+
+    previous = None if created else getattr(instance, '_persisted_admin_user_id', None)
+    current = instance.admin_user_id
+    if previous != current:
+        for user_id in filter(None, (previous, current)):
+            revoke_principal(user_id)
+
+
+@receiver(post_delete, sender=MaintenanceCompanyProfile)
+def revoke_deleted_company_admin(sender, instance, **kwargs):
+    if instance.admin_user_id:
+        revoke_principal(instance.admin_user_id)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def record_blacklisted_token(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        blacklist.record(instance.token.jti)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, created, raw, update_fields, **kwargs):
+    """
+    Drop cached responses that embed this user: their own, and those of the
+    companies they own, administer or work for.
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not CACHED_USER_FIELDS & set(update_fields):
+        return
+    _invalidate_user(instance)
+
+
+@receiver(pre_delete, sender=User)
+def invalidate_deleted_user_responses(sender, instance, **kwargs):
+    # Before the delete, while the company links can still be queried
+    _invalidate_user(instance)
+
+
+def _invalidate_user(user):
+    response_cache.invalidate(response_cache.USER, user.pk)
+    companies = MaintenanceCompanyProfile.objects.filter(
+        Q(user=user) | Q(admin_user=user) | Q(technicians__user=user)
+    ).values_list('pk', flat=True).distinct()
+    response_cache.invalidate(response_cache.COMPANY, *companies)
+
+
+@receiver(post_save, sender=TechnicianProfile)
+@receiver(post_delete, sender=TechnicianProfile)
+def invalidate_technician_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.USER, instance.user_id)
+    response_cache.invalidate(
+        response_cache.COMPANY,
+        instance.maintenance_company_id, getattr(instance, '_previous_company_id', None),
+    )
+
+
+@receiver(post_save, sender=MaintenanceCompanyProfile)
+@receiver(post_delete, sender=MaintenanceCompanyProfile)
+def invalidate_company_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.COMPANY, instance.pk)
+    response_cache.invalidate(response_cache.USER, instance.user_id)
+
+
+@receiver(post_save, sender=DeveloperProfile)
+@receiver(post_delete, sender=DeveloperProfile)
+def invalidate_developer_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.USER, instance.user_id)
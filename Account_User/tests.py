@@ -1,3 +1,601 @@
-from django.test import TestCase
+import asyncio
+import json
+import uuid
+from concurrent.futures import Future
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from developer.models import DeveloperProfile
+from maintenance_company.models import MaintenanceCompanyProfile
+from maintenance_company.serializers import MaintenanceCompanyProfileSerializer
+from maintenance_company.views import MaintenanceCompanyViewSet
+from technician.models import TechnicianProfile
+from technician.serializers import TechnicianProfileSerializer
+from .authentication import REVOCATION_KEY, revoke_principal
+from .blacklist import GENERATION_KEY, BlacklistFilter
+from .checks import check_response_cache, check_revocation_cache
+from .hashing import PasswordHashingUnavailable, PasswordHashPool
+from .mixins import Fieldset
+from .projections import Projection
+from .serializers import UserDetailSerializer
+from .views import UserViewSet
+from .tokens import PrincipalRefreshToken
+
+User = get_user_model()
+
+_sequence = count()
+
+
+def create_user(account_type='technician', **extra_fields):
+    i = next(_sequence)
+    create = User.objects.create_superuser if extra_fields.pop('superuser', False) else User.objects.create_user
+    return create(
+        email=f'user{i}@example.com', phone_number=f'+2547{i:08d}', first_name=f'First{i}',
+        last_name=f'Last{i}', account_type=account_type, password=None, **extra_fields
+    )
+
+
+def create_profiled_users(n, company=None):
+    """
+    Create n users of every account type, each with its profile.
+    """
+    for _ in range(n):
+        TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+        admin = create_user('maintenance')
+        MaintenanceCompanyProfile.objects.create(
+            user=admin, admin_user=admin, company_name=f'Company {admin.first_name}'
+        )
+        DeveloperProfile.objects.create(user=create_user('developer'), developer_name=f'Dev {next(_sequence)}')
+        create_user('admin')
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {PrincipalRefreshToken.for_user(user).access_token}')
+    return client
+
+
+class QueryCountTestCase(TestCase):
+    """
+    Requests made as a superuser, whose query count is compared between
+    fixtures of N and 2N related rows.
+    """
+
+    def setUp(self):
+        self.client = client_for(create_user('admin', superuser=True))
+
+    def count_queries(self, url):
+        # The caller's revocation state is read once, then cached
+        self.client.get('/api/me/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class UserQueryCountTests(QueryCountTestCase):
+    """
+    Listing and retrieving users costs the same number of queries however
+    many related rows there are.
+    """
+
+    def test_list(self):
+        create_profiled_users(3)
+        queries = self.count_queries('/api/users/?page_size=100')
+        create_profiled_users(3)
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/users/?page_size=100')
+        self.assertEqual(len(response.data['results']), 6 * 4 + 1)
+
+    def test_retrieve(self):
+        # The profile of a company admin is the company, whatever the size of its roster
+        admins = []
+        for n in (3, 6):
+            admin = create_user('maintenance')
+            company = MaintenanceCompanyProfile.objects.create(user=admin, admin_user=admin, company_name='Lifts')
+            for _ in range(n):
+                TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+            admins.append(admin)
+
+        with self.assertNumQueries(self.count_queries(f'/api/users/{admins[0].pk}/')):
+            response = self.client.get(f'/api/users/{admins[1].pk}/')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SEARCH_RESULT_LIMIT=2)
+class FullTextSearchScopeTests(TestCase):
+    """
+    Search matches within the caller's queryset, with no cap on the matches.
+    """
+
+    def setUp(self):
+        self.companies = []
+        for _ in range(3):
+            admin = create_user('maintenance')
+            company = MaintenanceCompanyProfile.objects.create(user=admin, admin_user=admin, company_name='Lifts')
+            for _ in range(2):
+                TechnicianProfile.objects.create(
+                    user=create_user('technician'), maintenance_company=company, specialization='escalators'
+                )
+            self.companies.append(company)
+
+    def test_company_admin_sees_own_matches(self):
+        company = self.companies[-1]
+        response = client_for(company.admin_user).get('/api/technicians/?search=escal')
+        self.assertEqual(
+            {row['id'] for row in response.data['results']},
+            {str(pk) for pk in company.technicians.values_list('pk', flat=True)},
+        )
+
+    def test_pages_past_result_limit(self):
+        client = client_for(create_user('admin', superuser=True))
+        url, seen = '/api/technicians/?search=escal&page_size=4', []
+        while url:
+            response = client.get(url)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+
+class PrincipalRevocationTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user('technician')
+
+    def test_revocation_rejects_tokens_from_the_same_second(self):
+        client = client_for(self.user)
+        revoke_principal(self.user.pk)
+        self.assertEqual(client.get(f'/api/users/{self.user.pk}/').status_code, 401)
+        self.assertEqual(client_for(self.user).get(f'/api/users/{self.user.pk}/').status_code, 200)
+
+    def test_deleting_the_user_revokes_their_tokens(self):
+        client = client_for(self.user)
+        self.user.delete()
+        response = client.get('/api/technicians/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+    def test_revocation_survives_cache_eviction(self):
+        client = client_for(self.user)
+        self.assertEqual(client.get('/api/me/').status_code, 200)
+        revoke_principal(self.user.pk)
+        cache.delete(REVOCATION_KEY.format(self.user.pk))
+        self.assertEqual(client.get(f'/api/async/users/{self.user.pk}/').status_code, 401)
+        self.assertEqual(client.get('/api/me/').status_code, 401)
+
+    def test_deleted_user_stays_revoked_after_cache_eviction(self):
+        client = client_for(self.user)
+        self.user.delete()
+        cache.delete(REVOCATION_KEY.format(self.user.pk))
+        self.assertEqual(client.get('/api/technicians/').status_code, 401)
+
+    def test_process_local_cache_fails_the_check(self):
+        self.assertEqual(check_revocation_cache(None), [])
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_revocation_cache(None)], ['Account_User.E001'])
+
+
+class BlacklistFilterTests(TestCase):
+    """
+    The Bloom filter only answers "absent" when the shared generation
+    confirms it has seen every blacklisting.
+    """
+
+    def setUp(self):
+        self.token = PrincipalRefreshToken.for_user(create_user('technician'))
+        self.jti = self.token['jti']
+
+    def blacklist_elsewhere(self):
+        # bulk_create sends no post_save, as if another process had blacklisted it
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=self.jti))])
+
+    def test_missing_generation_resyncs(self):
+        # Evicted at both checks, so no change of generation is ever seen
+        bloom = BlacklistFilter()
+        cache.delete(GENERATION_KEY)
+        self.assertFalse(bloom.might_contain(self.jti))
+        self.blacklist_elsewhere()
+        cache.delete(GENERATION_KEY)
+        self.assertTrue(bloom.might_contain(self.jti))
+
+    def test_process_local_cache_checks_the_database(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertTrue(BlacklistFilter().might_contain(self.jti))
+            self.blacklist_elsewhere()
+            response = APIClient().post('/auth/token/refresh/', {'refresh': str(self.token)})
+        self.assertEqual(response.status_code, 401)
+
+
+class PasswordHashPoolTests(SimpleTestCase):
+
+    def test_async_timeout_cancels_the_job(self):
+        pool, future = PasswordHashPool(workers=1, max_pending=1, timeout=0.01), Future()
+        with mock.patch.object(pool, 'submit', return_value=future):
+            with self.assertRaises(PasswordHashingUnavailable):
+                asyncio.run(pool.arun(len, 'password'))
+        self.assertTrue(future.cancelled())
+
+
+class ProjectionTests(TestCase):
+    """
+    Projections render exactly what their serializers do.
+    """
+
+    def setUp(self):
+        admin = create_user('maintenance')
+        company = MaintenanceCompanyProfile.objects.create(user=admin, admin_user=admin, company_name='Lifts')
+        # Every account type, technicians with and without a company
+        create_profiled_users(2, company=company)
+        create_profiled_users(1)
+        # Account types with a profile serializer, but no profile
+        for account_type in ('technician', 'maintenance', 'developer'):
+            create_user(account_type)
+
+    def assertProjected(self, serializer_class, queryset, fieldset=None):
+        queryset = queryset.order_by('pk')
+        projection = Projection.for_serializer(serializer_class, fieldset)
+        self.assertEqual(
+            projection.render_many(projection.values(queryset)),
+            serializer_class(queryset, many=True, context={'fieldset': fieldset}).data,
+        )
+
+    def test_users(self):
+        self.assertEqual(set(User.objects.values_list('account_type', flat=True)), {
+            'technician', 'maintenance', 'developer', 'admin',
+        })
+        self.assertProjected(UserDetailSerializer, User.objects.all())
+
+    def test_technicians(self):
+        self.assertTrue(TechnicianProfile.objects.filter(maintenance_company=None).exists())
+        self.assertProjected(TechnicianProfileSerializer, TechnicianProfile.objects.all())
+
+    def test_sparse_fieldset(self):
+        fieldset = Fieldset.from_query_params({'fields': 'id,user.first_name,maintenance_company'})
+        self.assertProjected(TechnicianProfileSerializer, TechnicianProfile.objects.all(), fieldset)
+
+    def test_companies(self):
+        self.assertProjected(MaintenanceCompanyProfileSerializer, MaintenanceCompanyProfile.objects.all())
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Cached user, profile and company responses are dropped when the rows
+    behind them change, and only served to the caller they were cached for.
+    """
+
+    def setUp(self):
+        self.admin = create_user('maintenance')
+        self.company = MaintenanceCompanyProfile.objects.create(
+            user=self.admin, admin_user=self.admin, company_name='Lifts'
+        )
+        self.technician = TechnicianProfile.objects.create(
+            user=create_user('technician'), maintenance_company=self.company, specialization='Hydraulics'
+        )
+        self.user = self.technician.user
+
+    def get(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_patch_refreshes_user_detail_and_profile(self):
+        client = client_for(self.user)
+        detail_url, profile_url = f'/api/users/{self.user.pk}/', f'/api/users/{self.user.pk}/profile/'
+        self.get(client, detail_url)
+        self.get(client, profile_url)
+
+        response = client.patch(detail_url, {'first_name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get(client, detail_url)['first_name'], 'Renamed')
+        self.assertEqual(self.get(client, profile_url)['user']['first_name'], 'Renamed')
+
+    def test_profile_change_refreshes_user_profile(self):
+        client = client_for(self.user)
+        profile_url = f'/api/users/{self.user.pk}/profile/'
+        self.assertEqual(self.get(client, profile_url)['profile']['specialization'], 'Hydraulics')
+
+        self.technician.specialization = 'Traction'
+        self.technician.save()
+
+        self.assertEqual(self.get(client, profile_url)['profile']['specialization'], 'Traction')
+
+    def test_company_changes_refresh_company_detail(self):
+        client = client_for(self.admin)
+        company_url = f'/api/companies/{self.company.pk}/'
+        self.get(client, company_url)
+
+        response = client.patch(company_url, {'company_name': 'Escalators'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(client, company_url)['company_name'], 'Escalators')
+        profile = self.get(client, f'/api/users/{self.admin.pk}/profile/')['profile']
+        self.assertEqual(profile['company_name'], 'Escalators')
+
+        # A technician's own change reaches the roster cached on the company
+        response = client_for(self.user).patch(f'/api/users/{self.user.pk}/', {'last_name': 'Moved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        roster = self.get(client, company_url)['technicians']
+        self.assertEqual([t['user']['last_name'] for t in roster], ['Moved'])
+
+    def test_entries_are_scoped_to_the_caller(self):
+        detail_url, profile_url = f'/api/users/{self.user.pk}/', f'/api/users/{self.user.pk}/profile/'
+        owner = client_for(self.user)
+        self.get(owner, detail_url)
+        self.get(owner, profile_url)
+
+        # Another user's request for the same ids is not answered from the cache
+        other = client_for(create_user('technician'))
+        self.assertEqual(other.get(detail_url).status_code, 404)
+        self.assertEqual(other.get(profile_url).status_code, 403)
+
+        # Nor is a technician's request for the company their admin cached
+        company_url = f'/api/companies/{self.company.pk}/'
+        self.get(client_for(self.admin), company_url)
+        self.assertEqual(owner.get(company_url).status_code, 404)
+
+    def test_process_local_backend_fails_the_check(self):
+        self.assertEqual(check_response_cache(None), [])
+        with override_settings(RESPONSE_CACHE_BACKEND='locmem'):
+            self.assertEqual([error.id for error in check_response_cache(None)], ['Account_User.E002'])
+        with override_settings(RESPONSE_CACHE_BACKEND=None):
+            self.assertEqual(check_response_cache(None), [])
+
+
+class StreamingListTests(TestCase):
+    """
+    `?stream=1` returns the same rows as paging through the listing, as one
+    JSON array, and only to superusers.
+    """
+
+    def setUp(self):
+        self.client = client_for(create_user('admin', superuser=True))
+        create_profiled_users(3)
+
+    def paginated(self, url):
+        rows, url = [], f'{url}?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+            rows += page['results']
+            url = page['next']
+        return rows
+
+    def streamed(self, url):
+        response = self.client.get(url, {'stream': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_serialized_listing(self):
+        with mock.patch.object(UserViewSet, 'stream_chunk_size', 3):
+            rows = self.streamed('/api/users/')
+        self.assertEqual(len(rows), User.objects.count())
+        self.assertEqual(rows, self.paginated('/api/users/'))
+
+    def test_projected_listing(self):
+        with mock.patch.object(MaintenanceCompanyViewSet, 'stream_chunk_size', 2):
+            rows = self.streamed('/api/companies/')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows, self.paginated('/api/companies/'))
+
+    def test_empty_listing(self):
+        MaintenanceCompanyProfile.objects.all().delete()
+        self.assertEqual(self.streamed('/api/companies/'), [])
+
+    def test_only_superusers_stream(self):
+        admin = MaintenanceCompanyProfile.objects.first().admin_user
+        for user in (admin, create_user('technician')):
+            client = client_for(user)
+            for url in ('/api/users/', '/api/companies/'):
+                self.assertEqual(client.get(url, {'stream': '1'}).status_code, 403)
+        # The paginated listing stays open to them
+        self.assertEqual(client_for(admin).get('/api/companies/').status_code, 200)
+
+
+class MultiGetTests(TestCase):
+    """
+    `batch` answers every requested id, in order, with the object or with
+    why it is missing.
+    """
+
+    def setUp(self):
+        self.admin = create_user('maintenance')
+        self.company = MaintenanceCompanyProfile.objects.create(
+            user=self.admin, admin_user=self.admin, company_name='Lifts'
+        )
+        self.own, self.foreign = (
+            TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+            for company in (self.company, None)
+        )
+
+    def batch(self, client, url, ids):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'ids': ','.join(map(str, ids))})
+        return response, queries
+
+    def test_order_and_markers(self):
+        missing = uuid.uuid4()
+        ids = [self.foreign.pk, 'not-a-uuid', self.own.pk, missing, self.own.pk]
+        response, _ = self.batch(client_for(self.admin), '/api/technicians/batch/', ids)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results[0], {'id': str(self.foreign.pk), 'error': 'forbidden'})
+        self.assertEqual(results[1], {'id': 'not-a-uuid', 'error': 'not_found'})
+        self.assertEqual(results[2]['id'], str(self.own.pk))
+        self.assertEqual(results[3], {'id': str(missing), 'error': 'not_found'})
+        # Repeated ids are answered once
+        self.assertEqual(len(results), 4)
+
+    def test_users_see_only_themselves(self):
+        user, other = self.own.user, self.foreign.user
+        response, _ = self.batch(client_for(user), '/api/users/batch/', [other.pk, user.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {'id': str(other.pk), 'error': 'forbidden'})
+        self.assertEqual(response.data['results'][1]['id'], str(user.pk))
+
+    def test_id_cap(self):
+        client = client_for(create_user('admin', superuser=True))
+        ids = [uuid.uuid4() for _ in range(UserViewSet.multi_get_max_ids)]
+        # The caller's revocation state is read once, then cached
+        client.get('/api/me/')
+        _, queries_for_one = self.batch(client, '/api/users/batch/', ids[:1])
+        response, queries = self.batch(client, '/api/users/batch/', ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['error'] for row in response.data['results']}, {'not_found'})
+        # One IN query for the objects and one for the existence of the rest, however many
+        self.assertEqual(len(queries), len(queries_for_one))
+
+        response, _ = self.batch(client, '/api/users/batch/', ids + [uuid.uuid4()])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.data)
+
+    def test_ids_are_required(self):
+        response = client_for(self.admin).get('/api/technicians/batch/')
+        self.assertEqual(response.status_code, 400)
+
+
+class MeViewTests(TestCase):
+    """
+    /api/me/ returns what each role's home screen needs, and 304 while it
+    is unchanged.
+    """
+
+    def setUp(self):
+        self.admin = create_user('maintenance')
+        self.company = MaintenanceCompanyProfile.objects.create(
+            user=self.admin, admin_user=self.admin, company_name='Lifts'
+        )
+        self.technicians = [
+            TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=self.company)
+            for _ in range(12)
+        ]
+
+    def me(self, user, **extra):
+        return client_for(user).get('/api/me/', **extra)
+
+    def test_company_admin(self):
+        response = self.me(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['id'], str(self.admin.pk))
+        self.assertEqual(response.data['company']['id'], str(self.company.pk))
+        roster = response.data['technicians']
+        self.assertEqual(len(roster['results']), 10)
+        # The rest of the roster continues on the technician list
+        self.assertIn('/api/technicians/?cursor=', roster['next'])
+        self.assertEqual(len(client_for(self.admin).get(roster['next']).data['results']), 2)
+
+    def test_technician(self):
+        user = self.technicians[0].user
+        response = self.me(user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['id'], str(user.pk))
+        self.assertEqual(response.data['company']['id'], str(self.company.pk))
+        self.assertIsNone(response.data['technicians'])
+
+    def test_without_company(self):
+        for user in (create_user('developer'), create_user('technician'), create_user('admin', superuser=True)):
+            with self.subTest(user.account_type):
+                response = self.me(user)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['user']['id'], str(user.pk))
+                self.assertIsNone(response.data['company'])
+                self.assertIsNone(response.data['technicians'])
+
+    def test_not_modified(self):
+        etag = self.me(self.admin)['ETag']
+        response = self.me(self.admin, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.company.company_name = 'Escalators'
+        self.company.save()
+        response = self.me(self.admin, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get('/api/me/').status_code, 401)
+
+
+class SparseFieldsetTests(TestCase):
+    """
+    `?fields=` narrows the SQL as well as the payload, and names the
+    serializer does not render are rejected.
+    """
+
+    def setUp(self):
+        self.admin = create_user('maintenance')
+        self.company = MaintenanceCompanyProfile.objects.create(
+            user=self.admin, admin_user=self.admin, company_name='Lifts'
+        )
+        for _ in range(2):
+            TechnicianProfile.objects.create(
+                user=create_user('technician'), maintenance_company=self.company, specialization='Hydraulics'
+            )
+        self.client = client_for(self.admin)
+        self.client.get('/api/me/')
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_narrow_the_select(self):
+        data, sql = self.get('/api/technicians/')
+        self.assertIn('"specialization"', sql)
+        self.assertIn('"email"', sql)
+
+        data, sql = self.get('/api/technicians/?fields=id,user.first_name')
+        self.assertEqual([set(row) for row in data['results']], [{'id', 'user'}] * 2)
+        self.assertEqual([set(row['user']) for row in data['results']], [{'first_name'}] * 2)
+        self.assertIn('"first_name"', sql)
+        self.assertNotIn('"specialization"', sql)
+        self.assertNotIn('"email"', sql)
+
+    def test_unrequested_relations_are_not_joined(self):
+        _, sql = self.get(f'/api/companies/{self.company.pk}/')
+        self.assertIn('FROM "technician_technicianprofile"', sql)
+
+        data, sql = self.get(f'/api/companies/{self.company.pk}/?fields=id,company_name')
+        self.assertEqual(set(data), {'id', 'company_name'})
+        # The roster is only read by the ETag's version query, never loaded
+        self.assertNotIn('FROM "technician_technicianprofile"', sql)
+
+    def test_unknown_names_are_rejected(self):
+        for url, param in [
+            ('/api/technicians/?fields=id,salary', 'fields'),
+            ('/api/technicians/?fields=user.salary', 'fields'),
+            ('/api/technicians/?fields=specialization.name', 'fields'),
+            ('/api/technicians/?expand=specialization', 'expand'),
+            (f'/api/companies/{self.company.pk}/?fields=technicians.user', 'fields'),
+            (f'/api/companies/{self.company.pk}/technicians/?fields=company_name', 'fields'),
+        ]:
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [param])
+        response = self.client.get('/api/technicians/?fields=id,user.salary,bonus')
+        self.assertEqual(response.data['fields'], ['Unknown field: bonus', 'Unknown field: user.salary'])
+
+    def test_known_names_are_accepted(self):
+        for url in [
+            f'/api/companies/{self.company.pk}/?fields=id,technicians',
+            f'/api/companies/{self.company.pk}/technicians/?fields=id,specialization',
+            '/api/technicians/?fields=id,maintenance_company&expand=user',
+        ]:
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 200)
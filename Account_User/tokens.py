@@ -0,0 +1,101 @@
+"""
+JWTs that carry the caller's principal as signed claims.
+
+Access tokens issued here embed the attributes the permission checks and
+queryset filters need, so PrincipalJWTAuthentication can authenticate a
+request without loading the User row. Refreshing a token re-reads the user
+and re-stamps the claims.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework import exceptions
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import blacklist
+
+User = get_user_model()
+
+PRINCIPAL_CLAIMS = ('account_type', 'is_superuser', 'is_staff', 'is_active', 'company_id')
+
+
+def principal_claims(user):
+    """
+    Return the claims describing `user` as a principal.
+    """
+    company_id = user.administered_company_id
+    return {
+        'account_type': user.account_type,
+        'is_superuser': user.is_superuser,
+        'is_staff': user.is_staff,
+        'is_active': user.is_active,
+        'company_id': str(company_id) if company_id else None,
+    }
+
+
+class PrincipalAccessToken(AccessToken):
+    """
+    Access token whose `iat` keeps sub-second precision, so it can be
+    ordered against a revocation made within the same second.
+    """
+
+    def set_iat(self, claim='iat', at_time=None):
+        self.payload[claim] = (at_time or self.current_time).timestamp()
+
+
+class PrincipalRefreshToken(RefreshToken):
+    """
+    Refresh token whose claims (and so its access tokens') describe the user.
+    """
+    access_token_class = PrincipalAccessToken
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(principal_claims(user))
+        return token
+
+    def check_blacklist(self):
+        # Only tokens the in-memory filter may have seen are looked up
+        if blacklist.might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = PrincipalRefreshToken
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issue access tokens with claims re-read from the user, so a refresh picks
+    up any change that revoked the previous access token.
+    """
+    token_class = PrincipalRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.filter(**{
+            api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)
+        }).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+
+        refresh.payload.update(principal_claims(user))
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
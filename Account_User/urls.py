@@ -1,6 +1,8 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import UserViewSet
+from .views import (
+    AsyncUserDetailView, AsyncUserProfileView, MeView, ResponseCacheStatsView, UserViewSet
+)
 from rest_framework.authtoken.views import obtain_auth_token
 
 router = DefaultRouter()
@@ -8,5 +10,10 @@ router.register(r'users', UserViewSet, basename='user')
 
 urlpatterns = [
     path('api/auth/login/', obtain_auth_token, name='api_token_auth'),
+    path('me/', MeView.as_view(), name='me'),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    # Async read paths for ASGI deployments
+    path('async/users/<uuid:pk>/', AsyncUserDetailView.as_view(), name='user-detail-async'),
+    path('async/users/<uuid:pk>/profile/', AsyncUserProfileView.as_view(), name='user-profile-async'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,16 +1,36 @@
 
 
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django.contrib.auth import authenticate, get_user_model
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from Mtambo_BackendApis import db_router
+from Mtambo_BackendApis.etags import content_etag, not_modified, set_etag
+from Mtambo_BackendApis.lru import MISSING
+from Mtambo_BackendApis.pagination import KeysetPagination
+from Mtambo_BackendApis.singleflight import get_single_flight
 
+from maintenance_company import context
 from maintenance_company.models import MaintenanceCompanyProfile
+from maintenance_company.permissions import IsSuperUser
+from maintenance_company.serializers import MaintenanceCompanyProfileSerializer
 from developer.models import DeveloperProfile
 from technician.models import TechnicianProfile
+from technician.serializers import TechnicianProfileSerializer
+from technician.views import TechnicianViewSet
 
 from .serializers import (
     UserCreateSerializer, 
@@ -18,24 +38,75 @@ from .serializers import (
     UserUpdateSerializer,
     UserPasswordChangeSerializer
 )
+from . import response_cache
+from .async_views import AsyncAPIView
+from .authentication import PrincipalJWTAuthentication, load_user
 from .factory import UserProfileFactory
+from .hashing import PasswordHashingUnavailable, ahash_password
+from .mixins import (
+    EagerLoadingViewSetMixin, MultiGetViewSetMixin, QueuedWriteViewSetMixin, ReplicaReadViewSetMixin,
+    StreamingListViewSetMixin
+)
 from .permissions import UserPermission
+from .tokens import PrincipalRefreshToken, PrincipalTokenRefreshSerializer
 import logging
 
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+PROFILE_MODELS = {
+    "technician": TechnicianProfile,
+    "maintenance": MaintenanceCompanyProfile,
+    "developer": DeveloperProfile,
+}
+
+
+def serialize_profile(account_type, profile):
+    """
+    Return `profile` as the profile endpoints report it, or None.
+    """
+    if profile is None:
+        return None
+    return UserDetailSerializer.PROFILE_SERIALIZERS[account_type](profile).data
+
+
+def get_user_cache_scope(request, pk):
+    """
+    Return (pk, visibility) for the response cache, with the pk in its
+    canonical form, or (pk, None) when the caller may not read the user
+    and the regular lookup must answer.
+    """
+    try:
+        pk = str(User._meta.pk.to_python(pk))
+    except ValidationError:
+        return pk, None
+    if request.user.is_superuser:
+        return pk, 'superuser'
+    if pk == str(request.user.pk):
+        return pk, 'self'
+    return pk, None
+
+
+class UserViewSet(
+    ReplicaReadViewSetMixin,
+    QueuedWriteViewSetMixin,
+    StreamingListViewSetMixin,
+    EagerLoadingViewSetMixin,
+    MultiGetViewSetMixin,
+    viewsets.ModelViewSet,
+):
     """
     Comprehensive User Profile Management ViewSet
     Supports full CRUD operations with fine-grained permissions
     """
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [PrincipalJWTAuthentication]
     permission_classes = [UserPermission]
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
+    pagination_class = KeysetPagination
+    ordering = ['-created_at']
 
     def get_queryset(self):
         """
@@ -44,12 +115,13 @@ class UserViewSet(viewsets.ModelViewSet):
         - Regular users see only themselves
         """
         user = self.request.user
+        queryset = super().get_queryset()
 
         # Superusers can see all users, regular users only see themselves
         if user.is_superuser:
-            return self.queryset
+            return queryset
         
-        return self.queryset.filter(pk=user.pk)
+        return queryset.filter(pk=user.pk)
 
     def get_serializer_class(self):
         """Return different serializers based on action"""
@@ -60,6 +132,25 @@ class UserViewSet(viewsets.ModelViewSet):
         }
         return serializer_map.get(self.action, UserDetailSerializer)
 
+    def retrieve(self, request, *args, **kwargs):
+        """User detail, served from the response cache when possible."""
+        cache = response_cache.get_cache()
+        pk, visibility = get_user_cache_scope(request, kwargs['pk'])
+        if self.get_fieldset() is not None:
+            # Only full representations are cached
+            visibility = None
+        if visibility is not None:
+            data = cache.get(response_cache.USER, pk, 'detail', visibility)
+            if data is not MISSING:
+                return Response(data)
+
+        # A lagging replica must not refill the shared cache with stale data
+        with db_router.primary():
+            response = super().retrieve(request, *args, **kwargs)
+        if visibility is not None:
+            cache.set(response_cache.USER, pk, 'detail', visibility, response.data)
+        return response
+
     def perform_create(self, serializer):
         """Handle user creation and associated profile setup"""
         # Extract profile data if it exists
@@ -86,7 +177,13 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserPasswordChangeSerializer(data=request.data, context={"request": request})
         
         if serializer.is_valid():
-            serializer.save()
+            user = load_user(request.user)
+            if not user.check_password(serializer.validated_data['old_password']):
+                return Response(
+                    {"old_password": ["Current password is incorrect."]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer.update_password(user)
             return Response({"message": "Password changed successfully"}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -94,6 +191,13 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["GET"])
     def profile(self, request, pk=None):
         """Retrieve detailed user profile"""
+        cache = response_cache.get_cache()
+        cache_pk, visibility = get_user_cache_scope(request, pk)
+        if visibility is not None:
+            data = cache.get(response_cache.USER, cache_pk, 'profile', visibility)
+            if data is not MISSING:
+                return Response(data)
+
         user = get_object_or_404(User, pk=pk)
         
         # Ensure user can only access their own profile or is a superuser
@@ -106,19 +210,164 @@ class UserViewSet(viewsets.ModelViewSet):
         profile_model = self.get_profile_model(user.account_type)
 
         profile = profile_model.objects.filter(user=user).first() if profile_model else None
-        profile_data = profile.additional_data if profile else None
+        profile_data = serialize_profile(user.account_type, profile)
 
-        return Response({"user": UserDetailSerializer(user).data, "profile": profile_data})
+        data = {"user": UserDetailSerializer(user).data, "profile": profile_data}
+        if visibility is not None:
+            cache.set(response_cache.USER, cache_pk, 'profile', visibility, data)
+        return Response(data)
 
     def get_profile_model(self, account_type):
         """Return the appropriate profile model based on account type"""
-        profile_map = {
-            "technician": TechnicianProfile,
-            "maintenance": MaintenanceCompanyProfile,
-            "developer": DeveloperProfile,
-        }
-        return profile_map.get(account_type)
+        return PROFILE_MODELS.get(account_type)
+
+
+class AsyncUserDetailView(AsyncAPIView):
+    """
+    UserViewSet.retrieve on the async ORM, sharing its response cache entries.
+    """
+    permission_classes = [UserPermission]
+    action = 'retrieve'
+
+    async def get(self, request, pk):
+        cache = response_cache.get_cache()
+        cache_pk, visibility = get_user_cache_scope(request, pk)
+        if visibility is not None:
+            data = cache.get(response_cache.USER, cache_pk, 'detail', visibility)
+            if data is not MISSING:
+                return Response(data)
+
+        queryset = UserDetailSerializer.setup_eager_loading(User.objects.all())
+        if not request.user.is_superuser:
+            queryset = queryset.filter(pk=request.user.pk)
+        user = await aget_object_or_404(queryset, pk=pk)
+        await self.acheck_object_permissions(request, user)
+
+        data = UserDetailSerializer(user, context={'request': request}).data
+        if visibility is not None:
+            cache.set(response_cache.USER, cache_pk, 'detail', visibility, data)
+        return Response(data)
+
+
+class AsyncUserProfileView(AsyncAPIView):
+    """
+    UserViewSet.profile on the async ORM, sharing its response cache entries.
+    """
+    permission_classes = [UserPermission]
+    action = 'profile'
+
+    async def get(self, request, pk):
+        cache = response_cache.get_cache()
+        cache_pk, visibility = get_user_cache_scope(request, pk)
+        if visibility is not None:
+            data = cache.get(response_cache.USER, cache_pk, 'profile', visibility)
+            if data is not MISSING:
+                return Response(data)
+
+        # The serializer reads the typed profile, so it must be loaded up front
+        user = await aget_object_or_404(UserDetailSerializer.setup_eager_loading(User.objects.all()), pk=pk)
+
+        # Ensure user can only access their own profile or is a superuser
+        if user != request.user and not request.user.is_superuser:
+            return Response(
+                {"detail": "You do not have permission to view this profile"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        profile_model = PROFILE_MODELS.get(user.account_type)
+
+        profile = await profile_model.objects.filter(user=user).afirst() if profile_model else None
+        profile_data = serialize_profile(user.account_type, profile)
+
+        data = {"user": UserDetailSerializer(user).data, "profile": profile_data}
+        if visibility is not None:
+            cache.set(response_cache.USER, cache_pk, 'profile', visibility, data)
+        return Response(data)
+
     
+class ResponseCacheStatsView(APIView):
+    """
+    Hit/miss counters of this process's response cache, and how many reads
+    were coalesced onto another request's computation, for monitoring.
+    """
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    def get(self, request):
+        flight = get_single_flight()
+        return Response({
+            **response_cache.get_cache().stats(),
+            'single_flight': {'leaders': flight.leaders, 'shared': flight.shared},
+        })
+
+
+class MeView(APIView):
+    """
+    Home screen bootstrap in one round trip: the user with their typed
+    profile, their maintenance company and, for company admins, the first
+    page of its technician roster (continued through /api/technicians/).
+
+    Runs a fixed number of queries whatever the roster size, and answers a
+    matching If-None-Match with 304 Not Modified.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = UserDetailSerializer.setup_eager_loading(User.objects.all()).get(pk=request.user.pk)
+
+        technician_profile = getattr(user, 'technician_profile', None)
+        if technician_profile is not None:
+            company_id = technician_profile.maintenance_company_id
+        else:
+            company_id = context.get_company_id(request)
+
+        company = None
+        if company_id is not None:
+            company = MaintenanceCompanyProfileSerializer.setup_eager_loading(
+                MaintenanceCompanyProfile.objects.filter(pk=company_id)
+            ).first()
+
+        data = {
+            'user': UserDetailSerializer(user).data,
+            'company': MaintenanceCompanyProfileSerializer(company).data if company else None,
+            'technicians': None,
+        }
+
+        # Only company admins may list the roster (see TechnicianViewSet.get_queryset)
+        if company is not None and company.admin_user_id == user.pk:
+            roster = TechnicianProfileSerializer.setup_eager_loading(
+                TechnicianProfile.objects.filter(maintenance_company_id=company.pk)
+            ).order_by(*TechnicianViewSet.ordering)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(roster, request)
+            # Further pages come from the technician list endpoint
+            paginator.base_url = reverse('technicianprofile-list', request=request)
+            data['technicians'] = {
+                'next': paginator.get_next_link(),
+                'results': TechnicianProfileSerializer(page, many=True).data,
+            }
+
+        etag = content_etag(data)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_etag(Response(data), etag)
+
+
+def login_response_data(user, refresh):
+    """Body returned by both login views"""
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'account_type': user.account_type
+        }
+    }
+
+
 class UserAuthViewSet(viewsets.ViewSet):
     """
     Comprehensive Authentication ViewSet
@@ -147,18 +396,8 @@ class UserAuthViewSet(viewsets.ViewSet):
         if user is not None:
             # Generate tokens
             try:
-                refresh = RefreshToken.for_user(user)
-                return Response({
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                   'user': {
-                        'id': user.id,
-                        'email': user.email,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name,
-                        'account_type': user.account_type
-                    }
-                }, status=status.HTTP_200_OK)
+                refresh = PrincipalRefreshToken.for_user(user)
+                return Response(login_response_data(user, refresh), status=status.HTTP_200_OK)
             except Exception as e:
                 return Response({
                     'error': 'Token generation failed',
@@ -183,10 +422,11 @@ class UserAuthViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Attempt to refresh the token
-            refresh = RefreshToken(refresh_token)
+            # Attempt to refresh the token, re-reading the principal claims
+            serializer = PrincipalTokenRefreshSerializer(data={'refresh': refresh_token})
+            serializer.is_valid(raise_exception=True)
             return Response({
-                'access': str(refresh.access_token)
+                'access': serializer.validated_data['access']
             }, status=status.HTTP_200_OK)
         except (TokenError, InvalidToken):
             return Response({
@@ -207,7 +447,7 @@ class UserAuthViewSet(viewsets.ViewSet):
 
         try:
             # Blacklist the refresh token
-            token = RefreshToken(refresh_token)
+            token = PrincipalRefreshToken(refresh_token)
             token.blacklist()
             return Response({
                 'message': 'Successfully logged out'
@@ -215,4 +455,54 @@ class UserAuthViewSet(viewsets.ViewSet):
         except (TokenError, InvalidToken):
             return Response({
                 'error': 'Invalid refresh token'
-            }, status=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@csrf_exempt
+@require_POST
+async def async_user_login(request):
+    """
+    Async variant of UserAuthViewSet.user_login for ASGI deployments.
+    Password verification is awaited, so no worker thread is held meanwhile.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = request.POST
+    email = data.get('email')
+    password = data.get('password')
+
+    # Validate input
+    if not email or not password:
+        return JsonResponse({
+            'error': 'Both email and password are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        try:
+            user = await User.objects.aget_by_natural_key(email)
+        except User.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            await ahash_password(password)
+            user = None
+        else:
+            if not (await user.acheck_password(password) and user.is_active):
+                user = None
+    except PasswordHashingUnavailable as exc:
+        response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+        response['Retry-After'] = str(exc.wait)
+        return response
+
+    if user is None:
+        return JsonResponse({
+            'error': 'Invalid credentials'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        refresh = await sync_to_async(PrincipalRefreshToken.for_user)(user)
+        return JsonResponse(login_response_data(user, refresh), status=status.HTTP_200_OK)
+    except Exception as e:
+        return JsonResponse({
+            'error': 'Token generation failed',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
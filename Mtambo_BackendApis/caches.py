@@ -0,0 +1,17 @@
+"""
+Whether a Django cache is shared between worker processes.
+
+Principal revocations and the token blacklist generation are written by one
+process and must be seen by every other; they only are when the cache they
+go through is not process-local.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries never leave the process that wrote them
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias='default'):
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -0,0 +1,165 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Writes always go to the primary (`default`). Reads go to a replica only
+while a view has opted in with read_from_replica() (see
+Account_User.mixins.ReplicaReadViewSetMixin), and never:
+
+* inside transaction.atomic() on the primary, so a transaction reads what
+  it has written;
+* after the current request has written anything;
+* for a caller who wrote within the last DATABASE_STICKY_SECONDS, recorded
+  by ReplicaRoutingMiddleware in the Django cache (which must be shared
+  between processes for stickiness to reach every worker).
+
+Settings:
+    DATABASE_REPLICAS        aliases to read from (default: every alias in
+                             DATABASES other than `default`)
+    DATABASE_STICKY_SECONDS  how long a writer's reads stay on the primary
+                             (default: 5)
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+PRIMARY = DEFAULT_DB_ALIAS
+STICKY_KEY = 'db-sticky:{}'
+
+
+def get_replicas():
+    replicas = getattr(settings, 'DATABASE_REPLICAS', None)
+    if replicas is None:
+        replicas = [alias for alias in settings.DATABASES if alias != PRIMARY]
+    return replicas
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'DATABASE_STICKY_SECONDS', 5)
+
+
+class RoutingState:
+    """
+    Per-request routing flags, shared by every context copied from it.
+    """
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def get_state():
+    return _state.get()
+
+
+def read_from_replica():
+    """
+    Let the rest of the current request read from a replica, unless the
+    caller is stuck to the primary.
+    """
+    state = _state.get()
+    if state is not None:
+        state.use_replica = True
+
+
+@contextmanager
+def primary():
+    """
+    Read from the primary inside the block, e.g. to fill a shared cache.
+    """
+    state = _state.get()
+    previous = state.use_replica if state is not None else False
+    if state is not None:
+        state.use_replica = False
+    try:
+        yield
+    finally:
+        if state is not None:
+            state.use_replica = previous
+
+
+def stick(user_id):
+    """
+    Keep this user's reads on the primary for the sticky window.
+    """
+    cache.set(STICKY_KEY.format(user_id), True, timeout=get_sticky_seconds())
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and cache.get(STICKY_KEY.format(user.pk)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        replicas = get_replicas()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Give each request its own routing state, and make callers who wrote
+    sticky to the primary for the next DATABASE_STICKY_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                stick(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            user = getattr(request, 'user', None)
+            if isinstance(user, SimpleLazyObject):
+                # Not replaced by an API authenticator; resolve the session user without blocking
+                user = await request.auser()
+            if user is not None and user.is_authenticated:
+                await cache.aset(STICKY_KEY.format(user.pk), True, timeout=get_sticky_seconds())
+        return response
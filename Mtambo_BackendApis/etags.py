@@ -0,0 +1,76 @@
+import hashlib
+import json
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def content_etag(data):
+    """
+    Strong ETag over the JSON form of `data`.
+    """
+    encoded = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return quote_etag(hashlib.md5(encoded.encode(), usedforsecurity=False).hexdigest())
+
+
+def version_validators(queryset, *relations, scope=''):
+    """
+    Return (etag, last_modified) for the rows of `queryset` and the given
+    relations of them, from one aggregate query over their `version` and
+    `updated_at` columns. Nothing is loaded or serialized.
+
+    Every model involved must be a VersionedModel. The row count of each
+    relation is part of the tag, so removals change it too. `scope` keeps
+    endpoints over the same rows from sharing tags.
+    """
+    values = queryset.order_by().aggregate(**_version_aggregates(relations))
+    return _validators(values, scope)
+
+
+async def aversion_validators(queryset, *relations, scope=''):
+    """
+    version_validators() for async views.
+    """
+    values = await queryset.order_by().aaggregate(**_version_aggregates(relations))
+    return _validators(values, scope)
+
+
+def _version_aggregates(relations):
+    aggregates = {}
+    for index, prefix in enumerate(('',) + tuple(f'{relation}__' for relation in relations)):
+        aggregates[f'count_{index}'] = Count(f'{prefix}pk')
+        aggregates[f'version_{index}'] = Sum(f'{prefix}version')
+        aggregates[f'updated_{index}'] = Max(f'{prefix}updated_at')
+    return aggregates
+
+
+def _validators(values, scope):
+    updated = [value for key, value in values.items() if key.startswith('updated_') and value]
+    last_modified = int(max(updated).timestamp()) if updated else None
+    return content_etag([scope, sorted(values.items())]), last_modified
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the client already holds `etag` (or, without
+    If-None-Match, a copy no older than `last_modified`), else None.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_etag(response, etag, last_modified)
+    return response
+
+
+def set_etag(response, etag, last_modified=None):
+    """
+    Attach `etag` to a per-user response that clients must revalidate.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    # JSON and MessagePack representations carry the same tag
+    patch_vary_headers(response, ['Authorization', 'Accept'])
+    return response
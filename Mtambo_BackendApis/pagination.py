@@ -0,0 +1,273 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from collections.abc import Mapping
+from functools import lru_cache, reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db.models import F, Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination with opaque cursors.
+
+    Rows are ordered by the queryset's ordering (or the view's `ordering`),
+    always followed by the primary key as a unique tiebreaker. A cursor holds
+    the ordering values of the row it points at, so every page is a single
+    indexed range scan with no OFFSET and no COUNT(*), however deep it is.
+
+    Ordering fields, and the relations leading to them, must be
+    non-nullable: NULL compares as neither greater nor less than a cursor
+    value. get_ordering() rejects nullable ones, and any in the view's
+    `ordering_fields`, with ImproperlyConfigured.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    tiebreaker = 'pk'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.get_page_queryset(queryset, request, view)
+        try:
+            rows = list(page)
+        except (ValueError, ValidationError):
+            # Cursor values that cannot be coerced to the ordering fields
+            raise NotFound(self.invalid_cursor_message)
+        return self.set_page(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, fetching with the async ORM.
+        """
+        page = self.get_page_queryset(queryset, request, view)
+        try:
+            rows = [row async for row in page]
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return self.set_page(rows)
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the unevaluated queryset for the requested page plus one row.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        position, self.reverse = self.decode_cursor(request)
+        self.position = position
+        ordering = [self.invert(term) for term in self.ordering] if self.reverse else self.ordering
+        try:
+            if position is not None:
+                queryset = queryset.filter(self.build_seek_filter(position, self.reverse))
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # Select related ordering values with the rows, so encoding a cursor
+        # never loads a relation that a sparse fieldset left out
+        related = {
+            self.keyset_alias(index): F(term.lstrip('-'))
+            for index, term in enumerate(self.ordering) if '__' in term
+        }
+        if related:
+            queryset = queryset.annotate(**related)
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                requested = int(request.query_params[self.page_size_query_param])
+                if requested > 0:
+                    return min(requested, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset, view):
+        """
+        Resolve the ordering terms, always ending with the unique tiebreaker.
+        """
+        ordering = list(queryset.query.order_by) or list(getattr(view, 'ordering', None) or [])
+        if not ordering:
+            ordering = list(queryset.model._meta.ordering)
+
+        if not all(isinstance(term, str) for term in ordering):
+            raise ImproperlyConfigured(
+                f'{self.__class__.__name__} only supports ordering by field names.'
+            )
+
+        for field in {term.lstrip('-') for term in ordering} | set(self.get_orderable_fields(view)):
+            if is_nullable(queryset.model, field):
+                raise ImproperlyConfigured(
+                    f'{self.__class__.__name__} cannot order by {field!r}, which can be NULL.'
+                )
+
+        pk_names = {'pk', queryset.model._meta.pk.name}
+        if not any(term.lstrip('-') in pk_names for term in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append(f"-{self.tiebreaker}" if descending else self.tiebreaker)
+        return ordering
+
+    @staticmethod
+    def get_orderable_fields(view):
+        fields = getattr(view, 'ordering_fields', None)
+        if not isinstance(fields, (list, tuple)):
+            # None or '__all__': only the resolved ordering is known
+            return []
+        return [field.lstrip('-') for field in fields]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(term):
+        return term[1:] if term.startswith('-') else f"-{term}"
+
+    def build_seek_filter(self, position, reverse):
+        """
+        Build `(a, b, pk) > (x, y, z)` as an OR of equality prefixes, honouring
+        the direction of each ordering term.
+        """
+        clauses = []
+        for index, term in enumerate(self.ordering):
+            field = term.lstrip('-')
+            descending = term.startswith('-') != reverse
+            equal = [Q(**{t.lstrip('-'): position[i]}) for i, t in enumerate(self.ordering[:index])]
+            seek = Q(**{f"{field}__{'lt' if descending else 'gt'}": position[index]})
+            clauses.append(reduce(and_, equal + [seek]))
+
+        # Implied by every clause, but only as a plain range can it start an
+        # index scan at the cursor (PostgreSQL will not derive it from the OR)
+        field = self.ordering[0].lstrip('-')
+        descending = self.ordering[0].startswith('-') != reverse
+        bound = Q(**{f"{field}__{'lte' if descending else 'gte'}": position[0]})
+        return bound & reduce(or_, clauses)
+
+    @staticmethod
+    def keyset_alias(index):
+        return f'keyset_{index}'
+
+    def get_position(self, row):
+        position = []
+        for index, term in enumerate(self.ordering):
+            field = term.lstrip('-')
+            alias = self.keyset_alias(index)
+            if isinstance(row, Mapping):
+                if alias in row:
+                    value = row[alias]
+                else:
+                    value = row['id'] if field == 'pk' and 'pk' not in row else row[field]
+            elif hasattr(row, alias):
+                value = getattr(row, alias)
+            else:
+                value = row
+                for attr in field.split('__'):
+                    value = getattr(value, attr)
+            position.append(self.encode_value(value))
+        return position
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, (uuid.UUID, decimal.Decimal)):
+            return str(value)
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, row, reverse):
+        payload = {'p': self.get_position(row)}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode()
+        ).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+@lru_cache(maxsize=None)
+def is_nullable(model, path):
+    """
+    Whether `path` (a field name or a `__`-separated lookup through
+    relations) can be NULL on rows of `model`. Names that are not fields,
+    such as annotations, are not checked.
+    """
+    for name in path.split('__'):
+        if name == 'pk':
+            return False
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        # Reverse relations are nullable too: a row may have no related rows
+        if field.null:
+            return True
+        model = field.related_model
+        if model is None:
+            return False
+    return False
@@ -0,0 +1,145 @@
+"""
+Faster renderers for the API.
+
+ORJSONRenderer produces the same bytes as DRF's JSONRenderer (compact,
+UTF-8, U+2028/U+2029 escaped, datetimes ending in "Z", UUIDs as strings),
+encoding with orjson when it is installed. Only floats in exponent notation
+are written differently (1e-7 rather than 1e-07), with the same value.
+Indented or ASCII-only output, and any payload orjson cannot encode, goes
+through the stock renderer.
+
+iter_json_array() writes a JSON array one chunk of items at a time, for
+responses streamed without holding the whole list; iter_csv() and
+iter_ndjson() do the same for exports. CSVRenderer and NDJSONRenderer give
+export actions their media types and render their other responses (errors).
+
+MessagePackRenderer encodes the same data as the JSON renderers, for clients
+that send `Accept: application/msgpack`. Values without a MessagePack type
+(UUIDs, datetimes, decimals, ...) are converted as in JSON; integer map
+keys stay integers.
+"""
+import csv
+from collections.abc import Mapping
+from io import StringIO
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Converts what neither orjson nor msgpack encode natively (lazy strings,
+# decimals, querysets, ...) the way DRF's JSON output does
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            # e.g. non-string keys or integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # As in JSONRenderer: not valid in JavaScript string literals
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
+
+
+def iter_json_array(chunks, renderer=None):
+    """
+    Yield the bytes of one JSON array holding the items of every chunk (a
+    list of items), rendering a chunk at a time.
+    """
+    renderer = renderer or ORJSONRenderer()
+    yield b'['
+    separator = b''
+    for chunk in chunks:
+        if chunk:
+            # Render the chunk as an array and splice its items in
+            yield separator + renderer.render(chunk)[1:-1]
+            separator = b','
+    yield b']'
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, size)), [])
+
+
+def iter_csv(header, rows, batch_size=1000):
+    """
+    Yield UTF-8 CSV for `header` and `rows` (sequences of values, None
+    written as an empty cell), `batch_size` rows at a time.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(rows, batch_size=1000, renderer=None):
+    """
+    Yield one JSON document per line for `rows`, `batch_size` rows at a time.
+    """
+    render = (renderer or ORJSONRenderer()).render
+    for batch in _batches(rows, batch_size):
+        yield b'\n'.join(render(row) for row in batch) + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        rows = [row if isinstance(row, Mapping) else {'detail': row} for row in rows]
+        header = list(dict.fromkeys(key for row in rows for key in row))
+        return b''.join(iter_csv(header, ([row.get(key) for key in header] for row in rows)))
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(iter_ndjson(data if isinstance(data, list) else [data]))
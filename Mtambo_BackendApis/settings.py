@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -57,7 +59,9 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     
     # Token type configuration
-    'TOKEN_OBTAIN_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenObtainPairSerializer',
+    # Tokens carry the principal claims read by Account_User.authentication
+    'TOKEN_OBTAIN_SERIALIZER': 'Account_User.tokens.PrincipalTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'Account_User.tokens.PrincipalTokenRefreshSerializer',
     
     # Authentication settings
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -87,11 +91,24 @@ SIMPLE_JWT = {
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Account_User.authentication.PrincipalJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON (same output as DRF's JSONRenderer), plus
+    # MessagePack for clients that send Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': [
+        'Mtambo_BackendApis.renderers.ORJSONRenderer',
+        *(['Mtambo_BackendApis.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'Mtambo_BackendApis.parsers.ORJSONParser',
+        *(['Mtambo_BackendApis.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     # Additional global settings
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -106,6 +123,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Mtambo_BackendApis.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -141,6 +159,108 @@ DATABASES = {
     }
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_PATHS=replica1.sqlite3 to try routing
+# locally against a second SQLite file (migrate it with --database replica1).
+# Tests use the primary for every alias.
+for index, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_PATHS', '').split(','))):
+    DATABASES[f'replica{index + 1}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# PostgreSQL, used instead of SQLite when POSTGRES_DB is set. Connections
+# come from psycopg's pool (POSTGRES_POOL=1, the default; needs
+# psycopg[pool]), or else stay open for CONN_MAX_AGE seconds with a health
+# check before reuse. Replicas listed in POSTGRES_REPLICA_HOSTS
+# (host[:port], comma-separated) become replica1, replica2, ...
+if os.environ.get('POSTGRES_DB'):
+    POSTGRES = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Named cursors do not survive PgBouncer's transaction pooling
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_DISABLE_SERVER_SIDE_CURSORS') == '1',
+        'OPTIONS': {},
+    }
+    if os.environ.get('POSTGRES_POOL', '1') == '1':
+        POSTGRES['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', '10')),
+        }
+    else:
+        POSTGRES['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', '60'))
+        POSTGRES['CONN_HEALTH_CHECKS'] = True
+
+    DATABASES = {'default': POSTGRES}
+    for index, address in enumerate(filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(','))):
+        host, _, port = address.partition(':')
+        DATABASES[f'replica{index + 1}'] = {
+            **POSTGRES,
+            'HOST': host,
+            'PORT': port or POSTGRES['PORT'],
+            'OPTIONS': dict(POSTGRES['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['Mtambo_BackendApis.db_router.ReplicaRouter']
+
+# Shared by every worker process: principal revocation lookups, the token
+# blacklist generation and cached API responses go through it (checked as
+# Account_User.E001 and E002). All are copies of database state, so an
+# evicted entry only costs a query.
+# Redis when REDIS_URL is set (needs redis-py), otherwise files under
+# CACHE_DIR (default: .cache in the project), which the processes of one
+# host share.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))},
+        }
+    }
+
+# SQLite production mode (SQLITE_PRODUCTION=1). WAL lets readers run while
+# a write is in progress; write transactions take the lock when they begin
+# (BEGIN IMMEDIATE) rather than failing on the read-to-write upgrade; busy
+# connections wait up to `timeout` seconds for the lock instead of raising
+# "database is locked"; small writes go through the in-process write queue
+# (Mtambo_BackendApis.write_queue). WAL is recorded in the database file.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRODUCTION_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        # Durable at checkpoints rather than every commit; safe with WAL
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA cache_size=-20000',
+        'PRAGMA mmap_size=134217728',
+        'PRAGMA journal_size_limit=67108864',
+    ]),
+}
+
+if SQLITE_PRODUCTION:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            database['OPTIONS'] = SQLITE_PRODUCTION_OPTIONS
+
+WRITE_QUEUE_ENABLED = SQLITE_PRODUCTION
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,154 @@
+"""
+Single-flight execution: concurrent calls for the same key share one run.
+
+The first caller for a key (the leader) runs the computation; callers that
+arrive while it is in flight wait for it and receive the same result. If
+the leader fails or the wait times out, each waiter computes for itself, so
+an error is never handed to a caller it did not happen to.
+
+With SINGLE_FLIGHT_CACHE set to the alias of a shared Django cache, leaders
+in different processes are elected through a lock key in that cache too.
+Waiters in other processes cannot receive the leader's return value; they
+poll a `lookup` callable (typically a read of a shared cache the leader
+fills) until it yields a value or the lock is released.
+
+Settings:
+    SINGLE_FLIGHT_CACHE          cache alias for cross-process locks (default: None)
+    SINGLE_FLIGHT_TIMEOUT        seconds a waiter waits for the leader (default: 10)
+    SINGLE_FLIGHT_LOCK_TIMEOUT   seconds before an abandoned lock expires (default: 30)
+    SINGLE_FLIGHT_POLL_INTERVAL  seconds between cross-process polls (default: 0.05)
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .lru import MISSING
+
+
+def get_cache_alias():
+    return getattr(settings, 'SINGLE_FLIGHT_CACHE', None)
+
+
+def get_timeout():
+    return getattr(settings, 'SINGLE_FLIGHT_TIMEOUT', 10)
+
+
+def get_lock_timeout():
+    return getattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', 30)
+
+
+def get_poll_interval():
+    return getattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.05)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls across the threads of one process.
+    """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.leaders = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, lookup=None):
+        """
+        Return fn(), computed at most once at a time per key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+
+        if not leader:
+            if call.done.wait(self.timeout) and call.error is None:
+                with self._lock:
+                    self.shared += 1
+                return call.result
+            return self.run(key, fn, lookup)
+
+        try:
+            call.result = self.run(key, fn, lookup)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def run(self, key, fn, lookup):
+        return fn()
+
+
+class CacheLockSingleFlight(SingleFlight):
+    """
+    Also coalesces across processes through a lock key in a shared cache.
+    """
+
+    def __init__(self, cache, timeout=10, lock_timeout=30, poll_interval=0.05):
+        super().__init__(timeout)
+        self.cache = cache
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    def run(self, key, fn, lookup):
+        lock_key = f'singleflight:{key}'
+        token = uuid.uuid4().hex
+        if self.cache.add(lock_key, token, self.lock_timeout):
+            try:
+                return fn()
+            finally:
+                # Leave a lock that expired and was taken over in place
+                if self.cache.get(lock_key) == token:
+                    self.cache.delete(lock_key)
+
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            value = lookup() if lookup is not None else MISSING
+            if value is not MISSING:
+                return value
+            if self.cache.get(lock_key) is None:
+                break
+            time.sleep(self.poll_interval)
+
+        # The leader finished, failed or is too slow; look once more, then compute
+        value = lookup() if lookup is not None else MISSING
+        return fn() if value is MISSING else value
+
+
+_flight = None
+_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """
+    Return the shared SingleFlight configured by the settings.
+    """
+    global _flight
+    if _flight is None:
+        with _flight_lock:
+            if _flight is None:
+                alias = get_cache_alias()
+                if alias is None:
+                    _flight = SingleFlight(get_timeout())
+                else:
+                    _flight = CacheLockSingleFlight(
+                        caches[alias], get_timeout(), get_lock_timeout(), get_poll_interval()
+                    )
+    return _flight
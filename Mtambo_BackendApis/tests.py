@@ -0,0 +1,452 @@
+import contextvars
+import datetime
+import decimal
+import json
+import os
+import runpy
+import time
+import threading
+import uuid
+from contextlib import contextmanager
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from Account_User.models import User
+from Account_User.tests import client_for, create_user
+
+from technician.models import TechnicianProfile
+from technician.tests import create_company
+from technician.views import TechnicianViewSet
+from . import db_router, singleflight, write_queue
+from .pagination import KeysetPagination
+from .parsers import MessagePackParser, ORJSONParser
+from .renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+
+
+class KeysetPaginationOrderingTests(SimpleTestCase):
+
+    def test_nullable_ordering_is_rejected(self):
+        # A technician without a company has no company name to seek past
+        queryset = TechnicianProfile.objects.order_by('maintenance_company__company_name')
+        with self.assertRaisesMessage(ImproperlyConfigured, "'maintenance_company__company_name'"):
+            KeysetPagination().get_ordering(queryset, None)
+
+    def test_view_ordering_fields_are_checked(self):
+        view = TechnicianViewSet()
+        self.assertEqual(
+            KeysetPagination().get_ordering(TechnicianProfile.objects.all(), view),
+            ['user__first_name', 'pk'],
+        )
+        view.ordering_fields = [*TechnicianViewSet.ordering_fields, 'maintenance_company__company_name']
+        with self.assertRaises(ImproperlyConfigured):
+            KeysetPagination().get_ordering(TechnicianProfile.objects.all(), view)
+
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Routing against `replica1`, a second connection to the test database
+    added for these tests. TestCase would hold every read on the primary,
+    since its tests run inside atomic().
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The alias only exists from here on, so the runner neither creates
+        # a database for it nor, being a mirror, flushes it
+        default = connections['default'].settings_dict
+        connections.settings['replica1'] = {**default, 'TEST': {**default['TEST'], 'MIRROR': 'default'}}
+        cls.databases = {'default', 'replica1'}
+        cls.enterClassContext(override_settings(DATABASE_REPLICAS=['replica1']))
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+        super().tearDownClass()
+
+    @contextmanager
+    def capture(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            yield primary, replica
+
+    def test_writer_reads_from_primary(self):
+        company, other = create_company(), create_company()
+        technician = TechnicianProfile.objects.create(user=create_user('technician'))
+        writer, reader = client_for(company.admin_user), client_for(other.admin_user)
+
+        response = writer.post(f'/api/companies/{company.pk}/add_technicians/', {'user_ids': [technician.user_id]})
+        self.assertEqual(response.data['added'], [technician.user_id])
+        with self.capture() as (primary, replica):
+            self.assertEqual(len(writer.get('/api/technicians/').data['results']), 1)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+
+        with self.capture() as (primary, replica):
+            self.assertEqual(reader.get('/api/technicians/').status_code, 200)
+        self.assertTrue(replica)
+
+    def test_atomic_reads_from_primary(self):
+        token = db_router._state.set(db_router.RoutingState())
+        try:
+            db_router.read_from_replica()
+            with self.capture() as (primary, replica):
+                User.objects.exists()
+            self.assertEqual((len(primary), len(replica)), (0, 1))
+            with self.capture() as (primary, replica), transaction.atomic():
+                User.objects.exists()
+            self.assertEqual(len(replica), 0)
+        finally:
+            db_router._state.reset(token)
+
+    def test_response_cache_is_filled_from_primary(self):
+        client = client_for(create_user('admin', superuser=True))
+        user, company = create_user('technician'), create_company(technicians=2)
+
+        with self.capture() as (primary, replica):
+            self.assertEqual(client.get(f'/api/users/{user.pk}/').status_code, 200)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+
+        with self.capture() as (primary, replica):
+            response = client.get(f'/api/companies/{company.pk}/')
+        self.assertEqual(response.status_code, 200)
+        # The tag the entry is cached under is computed on the primary too
+        self.assertTrue(any('SUM(' in query['sql'] for query in primary))
+        self.assertEqual(client.get(f'/api/companies/{company.pk}/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+PAYLOAD = {
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'created_at': datetime.datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'local_at': datetime.datetime(2024, 5, 1, 11, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+    'day': datetime.date(2024, 5, 1),
+    'rate': decimal.Decimal('1250.75'),
+    'label': gettext_lazy('Technician Profile'),
+    'results': [
+        {'id': uuid.UUID(int=1), 'name': 'Wanjirũ\u2028', 'score': 0.5, 'company': None, 'active': True},
+        {'id': uuid.UUID(int=2), 'tags': ['lifts', 'hvac'], 'nested': {'depth': [1, {'deeper': 2}]}},
+    ],
+}
+
+
+class RendererTests(SimpleTestCase):
+    """
+    The faster renderers and parsers agree with DRF's JSON ones.
+    """
+
+    def test_orjson_renders_drf_json(self):
+        self.assertEqual(ORJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_msgpack_round_trips_drf_json(self):
+        expected = json.loads(JSONRenderer().render(PAYLOAD))
+        packed = MessagePackRenderer().render(PAYLOAD)
+        self.assertEqual(msgpack.unpackb(packed, raw=False), expected)
+        self.assertEqual(MessagePackParser().parse(BytesIO(packed)), expected)
+
+    def test_orjson_parses_drf_json(self):
+        body = JSONRenderer().render(PAYLOAD)
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+
+class ResponseFormatTests(TestCase):
+    """
+    Cached payloads are data, not rendered bytes, so an entry filled for
+    one format serves the others; responses vary on Accept.
+    """
+
+    def setUp(self):
+        self.client = client_for(create_user('admin', superuser=True))
+        self.company = create_company(technicians=2)
+
+    def assertServedInEachFormat(self, url):
+        first = self.client.get(url)
+        packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        again = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(packed.content, raw=False), json.loads(first.content))
+        self.assertEqual(again.content, first.content)
+        for response in (first, packed, again):
+            self.assertIn('Accept', response['Vary'])
+        return first, packed
+
+    def test_user_detail(self):
+        user = self.company.admin_user
+        for url in (f'/api/users/{user.pk}/', f'/api/async/users/{user.pk}/'):
+            self.assertServedInEachFormat(url)
+
+    def test_user_profile(self):
+        # With and without a profile
+        for user in (create_user('technician'), self.company.admin_user):
+            for url in (f'/api/users/{user.pk}/profile/', f'/api/async/users/{user.pk}/profile/'):
+                first, _ = self.assertServedInEachFormat(url)
+                self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['profile'], {'company_name': 'Lifts', 'registration_number': ''})
+
+    def test_company_detail(self):
+        first, packed = self.assertServedInEachFormat(f'/api/companies/{self.company.pk}/')
+        self.assertEqual(packed['ETag'], first['ETag'])
+
+
+class SingleFlightTests(SimpleTestCase):
+    """
+    Concurrent calls for a key share the leader's run; a failed run is
+    neither shared nor left holding the key.
+    """
+
+    def run_concurrently(self, flight, fn, waiters=3, lookup=None):
+        """
+        Call flight.do() from a leader and `waiters` threads that arrive
+        while it runs; return the results (or exceptions) and fn's run count.
+        """
+        started, release, waiting = threading.Event(), threading.Event(), threading.Semaphore(0)
+        runs = []
+
+        def leader_fn():
+            runs.append(1)
+            if len(runs) == 1:
+                started.set()
+                release.wait(5)
+            return fn(len(runs))
+
+        class CountingEvent(threading.Event):
+            def wait(self, timeout=None):
+                waiting.release()
+                return super().wait(timeout)
+
+        class CountedCall(singleflight._Call):
+            def __init__(self):
+                super().__init__()
+                self.done = CountingEvent()
+
+        results = []
+
+        def call():
+            try:
+                results.append(flight.do('key', leader_fn, lookup))
+            except Exception as exc:
+                results.append(exc)
+
+        with mock.patch.object(singleflight, '_Call', CountedCall):
+            leader = threading.Thread(target=call)
+            leader.start()
+            started.wait(5)
+            threads = [threading.Thread(target=call) for _ in range(waiters)]
+            for thread in threads:
+                thread.start()
+            for _ in threads:
+                self.assertTrue(waiting.acquire(timeout=5))
+        release.set()
+        for thread in [leader, *threads]:
+            thread.join(5)
+        return results, len(runs)
+
+    def test_callers_share_one_run(self):
+        flight = singleflight.SingleFlight()
+        results, runs = self.run_concurrently(flight, lambda run: {'run': run})
+        self.assertEqual(runs, 1)
+        self.assertEqual(results, [{'run': 1}] * 4)
+        self.assertEqual((flight.leaders, flight.shared), (1, 3))
+        self.assertEqual(flight._calls, {})
+
+    def test_error_is_not_shared_and_releases_the_key(self):
+        flight = singleflight.SingleFlight()
+
+        def fn(run):
+            if run == 1:
+                raise ValueError('leader failed')
+            return run
+
+        results, runs = self.run_concurrently(flight, fn)
+        # The leader sees its error; each waiter computes for itself
+        self.assertEqual(runs, 4)
+        self.assertEqual(sum(isinstance(result, ValueError) for result in results), 1)
+        self.assertEqual(sorted(result for result in results if not isinstance(result, ValueError)), [2, 3, 4])
+        self.assertEqual(flight._calls, {})
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    def test_cache_lock_is_released_on_error(self):
+        cache = LocMemCache('single-flight-tests', {})
+        flight = singleflight.CacheLockSingleFlight(cache, timeout=1, poll_interval=0.01)
+
+        def fail():
+            raise ValueError('leader failed')
+
+        with self.assertRaises(ValueError):
+            flight.do('key', fail)
+        self.assertIsNone(cache.get('singleflight:key'))
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    def test_cache_lock_waiter_reads_the_leaders_result(self):
+        cache = LocMemCache('single-flight-tests', {})
+        flight = singleflight.CacheLockSingleFlight(cache, timeout=1, poll_interval=0.01)
+        # Another process holds the lock and has published its result
+        cache.add('singleflight:key', 'other-process')
+        published = iter([singleflight.MISSING, 'shared'])
+        self.assertEqual(flight.do('key', lambda: 'computed', lambda: next(published)), 'shared')
+
+
+class WriteQueueTests(TransactionTestCase):
+    """
+    Writes queued while the writer is busy commit together, each in its own
+    savepoint; writes from inside a transaction run inline.
+    """
+
+    def setUp(self):
+        self.queue = write_queue.WriteQueue(max_batch=10, max_delay=0)
+
+    def submit(self, fn, *args):
+        """
+        Run `fn` through the queue on a new thread; return the thread and a
+        list that receives the result or the exception.
+        """
+        outcome = []
+
+        def call():
+            try:
+                outcome.append(self.queue.run(fn, *args))
+            except Exception as exc:
+                outcome.append(exc)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        return thread, outcome
+
+    def run_batch(self, writes):
+        """
+        Queue `writes` (fn, *args) while the writer is held by another write,
+        so they are committed as one batch; return their outcomes.
+        """
+        busy, release = threading.Event(), threading.Event()
+
+        def hold():
+            busy.set()
+            release.wait(5)
+
+        holder, _ = self.submit(hold)
+        self.assertTrue(busy.wait(5))
+        submitted = [self.submit(*write) for write in writes]
+        deadline = time.monotonic() + 5
+        while self.queue._queue.qsize() < len(writes) and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        for thread in [holder, *(thread for thread, _ in submitted)]:
+            thread.join(5)
+        return [outcome[0] for _, outcome in submitted]
+
+    def create(self, email):
+        return User.objects.create_user(
+            email=email, phone_number=email.split('@')[0], first_name='Queued', last_name='Writer',
+            account_type='technician', password=None,
+        ).email
+
+    def test_writes_are_batched(self):
+        emails = [f'queued{i}@example.com' for i in range(5)]
+        self.assertEqual(self.run_batch([(self.create, email) for email in emails]), emails)
+        self.assertEqual(self.queue.stats(), {'batches': 2, 'writes': 6, 'failures': 0, 'mean_batch': 3.0})
+        self.assertEqual(User.objects.filter(email__in=emails).count(), 5)
+
+    def test_failing_write_is_rolled_back_alone(self):
+        def create_then_fail():
+            self.create('rolled-back@example.com')
+            raise IntegrityError('conflict')
+
+        outcomes = self.run_batch([
+            (self.create, 'first@example.com'), (create_then_fail,), (self.create, 'last@example.com'),
+        ])
+        self.assertEqual(outcomes[0], 'first@example.com')
+        self.assertIsInstance(outcomes[1], IntegrityError)
+        self.assertEqual(outcomes[2], 'last@example.com')
+        self.assertEqual(self.queue.stats()['failures'], 1)
+        self.assertEqual(
+            set(User.objects.values_list('email', flat=True)), {'first@example.com', 'last@example.com'}
+        )
+
+    def test_writes_keep_the_callers_context(self):
+        var = contextvars.ContextVar('write_queue_test')
+        var.set('caller')
+        self.assertEqual(self.queue.run(var.get), 'caller')
+        self.assertIsNotNone(self.queue._thread)
+
+    def test_inside_atomic_runs_inline(self):
+        with transaction.atomic():
+            email = self.create('outer@example.com')
+            # The writer thread could not see the uncommitted row
+            self.assertTrue(self.queue.run(User.objects.filter(email=email).exists))
+            self.assertIs(self.queue.run(threading.current_thread), threading.current_thread())
+        self.assertIsNone(self.queue._thread)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """
+    The environment selects the DATABASES options settings.py builds.
+    """
+
+    def load(self, **environ):
+        cleared = {
+            name: value for name, value in os.environ.items()
+            if not name.startswith(('POSTGRES_', 'SQLITE_', 'DATABASE_', 'CONN_'))
+        }
+        with mock.patch.dict(os.environ, {**cleared, **environ}, clear=True):
+            return runpy.run_module('Mtambo_BackendApis.settings')
+
+    def test_sqlite_defaults(self):
+        settings = self.load()
+        self.assertEqual(list(settings['DATABASES']), ['default'])
+        self.assertNotIn('OPTIONS', settings['DATABASES']['default'])
+        self.assertFalse(settings['WRITE_QUEUE_ENABLED'])
+
+    def test_sqlite_production(self):
+        settings = self.load(SQLITE_PRODUCTION='1', DATABASE_REPLICA_PATHS='replica.sqlite3')
+        for alias in ('default', 'replica1'):
+            options = settings['DATABASES'][alias]['OPTIONS']
+            self.assertEqual(options['transaction_mode'], 'IMMEDIATE')
+            self.assertEqual(options['timeout'], 20)
+            self.assertIn('PRAGMA journal_mode=WAL', options['init_command'])
+        self.assertEqual(settings['DATABASES']['replica1']['TEST'], {'MIRROR': 'default'})
+        self.assertTrue(settings['WRITE_QUEUE_ENABLED'])
+
+    def test_postgres_pool(self):
+        settings = self.load(
+            POSTGRES_DB='mtambo', POSTGRES_HOST='db', POSTGRES_POOL_MAX_SIZE='20',
+            POSTGRES_REPLICA_HOSTS='replica-a,replica-b:6432',
+        )
+        databases = settings['DATABASES']
+        self.assertEqual(list(databases), ['default', 'replica1', 'replica2'])
+        default = databases['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((default['NAME'], default['HOST'], default['PORT']), ('mtambo', 'db', '5432'))
+        self.assertEqual(default['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10})
+        self.assertNotIn('CONN_MAX_AGE', default)
+        self.assertFalse(default['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertEqual((databases['replica1']['HOST'], databases['replica1']['PORT']), ('replica-a', '5432'))
+        self.assertEqual((databases['replica2']['HOST'], databases['replica2']['PORT']), ('replica-b', '6432'))
+        self.assertEqual(databases['replica2']['TEST'], {'MIRROR': 'default'})
+        # Each replica has its own pool settings
+        self.assertIsNot(databases['replica1']['OPTIONS'], default['OPTIONS'])
+        self.assertFalse(settings['WRITE_QUEUE_ENABLED'])
+
+    def test_postgres_without_pool(self):
+        settings = self.load(
+            POSTGRES_DB='mtambo', POSTGRES_POOL='0', CONN_MAX_AGE='120', POSTGRES_DISABLE_SERVER_SIDE_CURSORS='1',
+        )
+        default = settings['DATABASES']['default']
+        self.assertEqual(default['OPTIONS'], {})
+        self.assertEqual((default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), (120, True))
+        self.assertTrue(default['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_sqlite_production_leaves_postgres_alone(self):
+        settings = self.load(POSTGRES_DB='mtambo', SQLITE_PRODUCTION='1')
+        self.assertNotIn('transaction_mode', settings['DATABASES']['default']['OPTIONS'])
@@ -21,12 +21,14 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView
 )
-from Account_User.views import UserAuthViewSet
+from Account_User.views import UserAuthViewSet, async_user_login
 
 urlpatterns = [
     # Authentication Endpoints (JWT)
     path('admin/', admin.site.urls),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('auth/login/', UserAuthViewSet.as_view({'post': 'user_login'}), name='login'),
+    path('auth/login/async/', async_user_login, name='login_async'),
     path('auth/token/logout/', UserAuthViewSet.as_view({'post': 'user_logout'}), name='token_logout'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
@@ -34,6 +36,7 @@ urlpatterns = [
     # Include user-related URLs
     path('api/', include('Account_User.urls')),  # 🔥 Add this and remove direct `UserViewSet` registration
     path('api/', include('maintenance_company.urls')),
+    path('api/', include('technician.urls')),
 
     # Additional Authentication Endpoints
     path('auth/change-password/', 
@@ -0,0 +1,172 @@
+"""
+In-process write queue: small writes from many request threads are run by
+one writer thread, several to a transaction.
+
+SQLite allows one writer per database. Request threads that write at the
+same time queue up on the file lock, and with deferred transactions the
+loser of a read-to-write upgrade fails at once with "database is locked".
+Writes submitted through run() never contend with each other inside a
+process: the writer thread drains the queue in batches of up to
+WRITE_QUEUE_MAX_BATCH, waiting at most WRITE_QUEUE_MAX_DELAY for a batch
+to fill, and commits each batch as one transaction. Every write runs in its
+own savepoint, so a failing write is rolled back and raised to its caller
+without affecting the rest of the batch.
+
+The caller blocks until its batch has committed and receives the write's
+return value. Writes run with a copy of the caller's context variables, so
+routing state (see db_router) still sees them. A caller that is already in
+a transaction runs its write inline, since the writer thread could not see
+that transaction's rows.
+
+Settings:
+    WRITE_QUEUE_ENABLED    route writes through the queue (default: False)
+    WRITE_QUEUE_MAX_BATCH  writes committed together at most (default: 50)
+    WRITE_QUEUE_MAX_DELAY  seconds the writer waits for a batch to fill
+                           (default: 0.002)
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def is_enabled():
+    return getattr(settings, 'WRITE_QUEUE_ENABLED', False)
+
+
+def get_max_batch():
+    return getattr(settings, 'WRITE_QUEUE_MAX_BATCH', 50)
+
+
+def get_max_delay():
+    return getattr(settings, 'WRITE_QUEUE_MAX_DELAY', 0.002)
+
+
+class _Write:
+    def __init__(self, fn, args, kwargs):
+        self.context = contextvars.copy_context()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """
+    Serializes the writes of one process to one database in batches.
+    """
+
+    def __init__(self, max_batch=50, max_delay=0.002, using=DEFAULT_DB_ALIAS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.using = using
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the writer thread and return its result.
+        """
+        if threading.current_thread() is self._thread or connections[self.using].in_atomic_block:
+            return fn(*args, **kwargs)
+        write = _Write(fn, args, kwargs)
+        self._start()
+        self._queue.put(write)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def _start(self):
+        # A forked worker inherits the queue but not the thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._work, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            with transaction.atomic(using=self.using):
+                for write in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            write.result = write.context.run(write.fn, *write.args, **write.kwargs)
+                    except Exception as exc:
+                        write.error = exc
+        except Exception as exc:
+            # The commit itself failed, so none of the batch was written
+            for write in batch:
+                if write.error is None:
+                    write.error = exc
+        finally:
+            failed = sum(write.error is not None for write in batch)
+            with self._lock:
+                self._counts.update(batches=1, writes=len(batch), failures=failed)
+            for write in batch:
+                write.done.set()
+
+    def stats(self):
+        """
+        Counters since the queue was created.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        batches = counts.get('batches', 0)
+        writes = counts.get('writes', 0)
+        return {
+            'batches': batches,
+            'writes': writes,
+            'failures': counts.get('failures', 0),
+            'mean_batch': round(writes / batches, 2) if batches else None,
+        }
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    """
+    Return the shared WriteQueue configured by the settings.
+    """
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(get_max_batch(), get_max_delay())
+    return _write_queue
+
+
+def run(fn, *args, **kwargs):
+    """
+    Run a small write through the shared queue when WRITE_QUEUE_ENABLED is
+    set, or directly otherwise.
+    """
+    if not is_enabled():
+        return fn(*args, **kwargs)
+    return get_write_queue().run(fn, *args, **kwargs)
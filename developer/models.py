@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
 
-class DeveloperProfile(models.Model):
+from Account_User.models import VersionedModel
+
+class DeveloperProfile(VersionedModel):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
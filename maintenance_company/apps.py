@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MaintenanceCompanyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'maintenance_company'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,98 @@
+"""
+Resolve the maintenance company administered by the requesting user.
+
+The result is memoized on the request, so permissions, querysets and
+actions share one lookup. Principal tokens already carry the company id as
+a claim; otherwise a process-wide LRU keyed by user id avoids repeating
+the query across requests. maintenance_company.signals invalidates entries
+when a company's admin_user changes or a company is deleted, but only in
+the process that made the change, so entries also expire:
+COMPANY_CONTEXT_CACHE_TTL (default 60) seconds after they were cached, or
+COMPANY_CONTEXT_NEGATIVE_TTL (default 5) for users who administer no
+company, who may be assigned one at any moment.
+"""
+from django.conf import settings
+
+from Mtambo_BackendApis.lru import MISSING, LRUCache
+from .models import MaintenanceCompanyProfile
+
+_company_ids = LRUCache(maxsize=getattr(settings, 'COMPANY_CONTEXT_CACHE_SIZE', 10000))
+
+
+def get_ttl():
+    return getattr(settings, 'COMPANY_CONTEXT_CACHE_TTL', 60)
+
+
+def get_negative_ttl():
+    return getattr(settings, 'COMPANY_CONTEXT_NEGATIVE_TTL', 5)
+
+
+def remember(user_id, company_id):
+    _company_ids.set(user_id, company_id, ttl=get_ttl() if company_id else get_negative_ttl())
+
+
+def get_company_id(request):
+    """
+    Return the id of the company the caller administers, or None.
+    """
+    company_id = getattr(request, '_company_id', MISSING)
+    if company_id is not MISSING:
+        return company_id
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        company_id = None
+    elif 'company_id' in getattr(user, 'token', {}):
+        # Principal built from token claims
+        company_id = user.administered_company_id
+    else:
+        company_id = _company_ids.get(user.pk)
+        if company_id is MISSING:
+            company_id = MaintenanceCompanyProfile.objects.filter(
+                admin_user_id=user.pk
+            ).values_list('id', flat=True).first()
+            remember(user.pk, company_id)
+
+    request._company_id = company_id
+    return company_id
+
+
+async def aget_company_id(request):
+    """
+    get_company_id() for async views.
+    """
+    company_id = getattr(request, '_company_id', MISSING)
+    if company_id is not MISSING:
+        return company_id
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        company_id = None
+    elif 'company_id' in getattr(user, 'token', {}):
+        company_id = user.administered_company_id
+    else:
+        company_id = _company_ids.get(user.pk)
+        if company_id is MISSING:
+            company_id = await MaintenanceCompanyProfile.objects.filter(
+                admin_user_id=user.pk
+            ).values_list('id', flat=True).afirst()
+            remember(user.pk, company_id)
+
+    request._company_id = company_id
+    return company_id
+
+
+def get_company(request):
+    """
+    Return the company the caller administers, or None.
+    """
+    company = getattr(request, '_company', MISSING)
+    if company is MISSING:
+        company_id = get_company_id(request)
+        company = MaintenanceCompanyProfile.objects.filter(pk=company_id).first() if company_id else None
+        request._company = company
+    return company
+
+
+def invalidate(*user_ids):
+    _company_ids.delete(*user_ids)
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from Account_User import response_cache
+from Account_User.models import bump_version
+from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
+
+
+class Command(BaseCommand):
+    help = "Recompute MaintenanceCompanyProfile.technician_count from the technician table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report companies whose stored count has drifted.",
+        )
+
+    def handle(self, *args, **options):
+        actual = Coalesce(Subquery(
+            TechnicianProfile.objects.filter(maintenance_company=OuterRef('pk'))
+            .order_by()
+            .values('maintenance_company')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ), 0)
+
+        drifted = (
+            MaintenanceCompanyProfile.objects
+            .annotate(actual_count=actual)
+            .exclude(technician_count=F('actual_count'))
+        )
+
+        if options['dry_run']:
+            for company in drifted.only('id', 'company_name', 'technician_count').iterator(chunk_size=2000):
+                self.stdout.write(
+                    f"{company.id} {company.company_name}: "
+                    f"stored {company.technician_count}, actual {company.actual_count}"
+                )
+            return
+
+        # A single set-based UPDATE over the drifted rows only
+        with transaction.atomic():
+            company_ids = list(drifted.values_list('pk', flat=True))
+            updated = drifted.update(technician_count=actual, **bump_version())
+            response_cache.invalidate(response_cache.COMPANY, *company_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {updated} company technician counts."))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_technician_count(apps, schema_editor):
+    MaintenanceCompanyProfile = apps.get_model('maintenance_company', 'MaintenanceCompanyProfile')
+    TechnicianProfile = apps.get_model('technician', 'TechnicianProfile')
+    counts = (
+        TechnicianProfile.objects.filter(maintenance_company=OuterRef('pk'))
+        .order_by()
+        .values('maintenance_company')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    MaintenanceCompanyProfile.objects.update(technician_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance_company', '0001_initial'),
+        ('technician', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancecompanyprofile',
+            name='technician_count',
+            field=models.IntegerField(db_index=True, default=0, editable=False, help_text='Number of technicians assigned to this company'),
+        ),
+        migrations.RunPython(backfill_technician_count, migrations.RunPython.noop),
+    ]
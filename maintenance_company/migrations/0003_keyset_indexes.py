@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance_company', '0002_technician_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='maintenancecompanyprofile',
+            name='technician_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of technicians assigned to this company'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancecompanyprofile',
+            index=models.Index(fields=['company_name', 'id'], name='company_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancecompanyprofile',
+            index=models.Index(fields=['technician_count', 'id'], name='company_tech_count_id_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
 import uuid
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 
-class MaintenanceCompanyProfile(models.Model):
+from Account_User import response_cache
+from Account_User.models import VersionedModel, bump_version
+
+class MaintenanceCompanyProfile(VersionedModel):
     # Use UUID as primary key
     id = models.UUIDField(
         primary_key=True,
@@ -36,12 +40,49 @@ class MaintenanceCompanyProfile(models.Model):
         null=True, 
         blank=True
     )
+
+    # Denormalized headcount, kept in step with TechnicianProfile.maintenance_company
+    # by technician.signals and reconciled by `manage.py reconcile_technician_counts`
+    technician_count = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of technicians assigned to this company"
+    )
     
+    class Meta(VersionedModel.Meta):
+        abstract = False
+        indexes = [
+            # Keyset pagination orders on these with the primary key as tiebreaker
+            models.Index(fields=['company_name', 'id'], name='company_name_id_idx'),
+            models.Index(fields=['technician_count', 'id'], name='company_tech_count_id_idx'),
+        ]
+
+    @classmethod
+    def adjust_technician_count(cls, company_id, delta):
+        """
+        Atomically shift a company's stored technician count by delta.
+        """
+        if company_id is None or not delta:
+            return
+        cls.objects.filter(pk=company_id).update(
+            technician_count=F('technician_count') + delta, **bump_version()
+        )
+        # Queryset updates bypass the signals that drop cached company responses
+        response_cache.invalidate(response_cache.COMPANY, company_id)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored admin so signal receivers can detect admin changes
+        instance._persisted_admin_user_id = instance.__dict__.get('admin_user_id')
+        return instance
+
     def save(self, *args, **kwargs):
         # Automatically set admin user if not set
         if not self.admin_user:
             self.admin_user = self.user
         super().save(*args, **kwargs)
+        self._persisted_admin_user_id = self.admin_user_id
     
     def __str__(self):
         return f"Maintenance Company: {self.company_name}"
@@ -1,5 +1,7 @@
 from rest_framework import permissions
+from maintenance_company import context
 from maintenance_company.models import MaintenanceCompanyProfile
+from technician.models import TechnicianProfile
 
 class IsSuperUser(permissions.BasePermission):
     """
@@ -23,7 +25,7 @@ class IsMaintenanceCompanyAdmin(permissions.BasePermission):
             
         # If object is MaintenanceCompanyProfile, check if user is admin
         if isinstance(obj, MaintenanceCompanyProfile):
-            return obj.admin_user == request.user
+            return obj.admin_user_id == request.user.pk
             
         # If we're dealing with a detail action on a MaintenanceCompanyViewSet
         if hasattr(view, 'get_object') and view.basename == 'maintenance-company':
@@ -31,7 +33,7 @@ class IsMaintenanceCompanyAdmin(permissions.BasePermission):
                 # Get the company from the request
                 company = view.get_object()
                 # Check if the user is the admin of this company
-                return company.admin_user == request.user
+                return company.admin_user_id == request.user.pk
             except:
                 return False
                 
@@ -43,8 +45,11 @@ class IsAccountOwnerOrAdmin(permissions.BasePermission):
     Permission to only allow users to edit their own accounts or admins of their maintenance company.
     """
     def has_object_permission(self, request, view, obj):
+        # obj is either a User or a TechnicianProfile
+        is_profile = isinstance(obj, TechnicianProfile)
+
         # Allow if it's the user's own account
-        if obj.id == request.user.id:
+        if (obj.user_id if is_profile else obj.id) == request.user.pk:
             return True
             
         # Allow if user is superuser
@@ -53,17 +58,17 @@ class IsAccountOwnerOrAdmin(permissions.BasePermission):
             
         # Allow if user is maintenance company admin and obj is their technician
         if request.user.account_type == 'maintenance':
-            try:
-                admin_profile = MaintenanceCompanyProfile.objects.get(admin_user=request.user)
-                
-                # If obj is technician, check if they belong to admin's company
-                if obj.account_type == 'technician' and hasattr(obj, 'technician_profile'):
-                    return hasattr(obj.technician_profile, 'maintenance_company') and \
-                           obj.technician_profile.maintenance_company == admin_profile
-                           
-            except MaintenanceCompanyProfile.DoesNotExist:
+            company_id = context.get_company_id(request)
+            if company_id is None:
                 return False
                 
+            if is_profile:
+                return obj.maintenance_company_id == company_id
+                
+            # If obj is technician, check if they belong to admin's company
+            if obj.account_type == 'technician' and hasattr(obj, 'technician_profile'):
+                return obj.technician_profile.maintenance_company_id == company_id
+                
         return False
 
 
@@ -77,8 +82,8 @@ class IsOwnerOrSuperuser(permissions.BasePermission):
             return True
             
         # Allow if it's the user's own profile or account
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.pk
         elif hasattr(obj, 'id'):
             return obj.id == request.user.id
             
@@ -98,4 +103,4 @@ class IsSuperUserOrCompanyAdmin(permissions.BasePermission):
             return True
 
         # Check if the request user is the admin of the company
-        return obj.admin_user == request.user
\ No newline at end of file
+        return obj.admin_user_id == request.user.pk
\ No newline at end of file
@@ -1,14 +1,16 @@
 from rest_framework import serializers
 from django.db import transaction
+from django.db.models import Prefetch
 
 from Account_User.models import User
+from Account_User.mixins import EagerLoadingMixin
 from Account_User.serializers import UserDetailSerializer, UserCreateSerializer
 from .models import MaintenanceCompanyProfile
 from technician.models import TechnicianProfile
 from technician.serializers import TechnicianProfileSerializer
 
 
-class MaintenanceCompanyProfileSerializer(serializers.ModelSerializer):
+class MaintenanceCompanyProfileSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for the MaintenanceCompanyProfile model.
     Includes user information through a nested UserSerializer.
@@ -16,18 +18,13 @@ class MaintenanceCompanyProfileSerializer(serializers.ModelSerializer):
     user = UserDetailSerializer(read_only=True)
     user_data = UserCreateSerializer(write_only=True, required=False)
     admin_email = serializers.EmailField(source='admin_user.email', read_only=True)
-    technician_count = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = MaintenanceCompanyProfile
         fields = '__all__'
-        read_only_fields = ['id', 'user', 'admin_user', 'admin_email', 'created_at', 'updated_at']
-    
-    def get_technician_count(self, obj):
-        """
-        Get the count of technicians associated with this company.
-        """
-        return TechnicianProfile.objects.filter(maintenance_company=obj).count()
+        read_only_fields = [
+            'id', 'user', 'admin_user', 'admin_email', 'technician_count', 'created_at', 'updated_at'
+        ]
     
     @transaction.atomic
     def create(self, validated_data):
@@ -71,14 +68,45 @@ class MaintenanceCompanyDetailSerializer(MaintenanceCompanyProfileSerializer):
     """
     technicians = serializers.SerializerMethodField()
 
+    # Read from the prefetch set up below
+    field_dependencies = {'technicians': ()}
+
     class Meta:
         model = MaintenanceCompanyProfile
         fields = MaintenanceCompanyProfileSerializer.Meta.fields  # Keep '__all__'
         read_only_fields = MaintenanceCompanyProfileSerializer.Meta.read_only_fields
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, fieldset=None):
+        """
+        Also prefetch the technician roster together with its own relations,
+        unless the fieldset leaves it out.
+        """
+        queryset = super().setup_eager_loading(queryset, fieldset)
+        if fieldset is not None and not fieldset.includes('technicians'):
+            return queryset
+        technicians = TechnicianProfileSerializer.setup_eager_loading(TechnicianProfile.objects.all())
+        return queryset.prefetch_related(Prefetch('technicians', queryset=technicians))
+
     def get_technicians(self, obj):
         """
         Get a list of all technicians associated with this company.
         """
-        technicians = TechnicianProfile.objects.filter(maintenance_company=obj)
-        return TechnicianProfileSerializer(technicians, many=True).data
+        return TechnicianProfileSerializer(obj.technicians.all(), many=True).data
+
+
+class TechnicianBatchSerializer(serializers.Serializer):
+    """
+    A batch of technicians identified by user id and/or email.
+    """
+    user_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, default=list, max_length=1000
+    )
+    emails = serializers.ListField(
+        child=serializers.EmailField(), required=False, default=list, max_length=1000
+    )
+
+    def validate(self, data):
+        if not data['user_ids'] and not data['emails']:
+            raise serializers.ValidationError("Either user_ids or emails must be provided")
+        return data
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import context
+from .models import MaintenanceCompanyProfile
+
+
+@receiver(post_save, sender=MaintenanceCompanyProfile)
+def invalidate_company_context(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, '_persisted_admin_user_id', None)
+    if previous != instance.admin_user_id:
+        context.invalidate(*filter(None, (previous, instance.admin_user_id)))
+
+
+@receiver(post_delete, sender=MaintenanceCompanyProfile)
+def forget_deleted_company(sender, instance, **kwargs):
+    if instance.admin_user_id:
+        context.invalidate(instance.admin_user_id)
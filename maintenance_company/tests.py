@@ -1,3 +1,177 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from Account_User.tests import QueryCountTestCase, client_for, create_user
+from technician.models import TechnicianProfile
+from technician.tests import create_company
+from . import context
+from .models import MaintenanceCompanyProfile
+
+
+class CompanyQueryCountTests(QueryCountTestCase):
+    """
+    Listing and retrieving companies, and their rosters, costs the same
+    number of queries however many related rows there are.
+    """
+
+    def test_list(self):
+        for _ in range(3):
+            create_company(technicians=2)
+        queries = self.count_queries('/api/companies/?page_size=100')
+        for _ in range(3):
+            create_company(technicians=2)
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/companies/?page_size=100')
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_retrieve(self):
+        companies = [create_company(technicians=n) for n in (3, 6)]
+        with self.assertNumQueries(self.count_queries(f'/api/companies/{companies[0].pk}/')):
+            response = self.client.get(f'/api/companies/{companies[1].pk}/')
+        self.assertEqual(len(response.data['technicians']), 6)
+
+    def test_technicians(self):
+        # Only the company's own admin may read its roster
+        company = create_company(technicians=3)
+        self.client = client_for(company.admin_user)
+        queries = self.count_queries(f'/api/companies/{company.pk}/technicians/')
+        for _ in range(3):
+            TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+        with self.assertNumQueries(queries):
+            response = self.client.get(f'/api/companies/{company.pk}/technicians/')
+        self.assertEqual(len(response.data['technicians']), 6)
+
+
+class CompanyContextExpiryTests(TestCase):
+    """
+    Cached company ids expire, since other processes' changes never
+    invalidate them.
+    """
+
+    def get_company_id(self, user, after=0):
+        # A fresh request each time, so only the process-wide cache is reused
+        now = time.monotonic() + after
+        with mock.patch('Mtambo_BackendApis.lru.time.monotonic', return_value=now):
+            return context.get_company_id(SimpleNamespace(user=user))
+
+    def test_no_company_expires_quickly(self):
+        admin = create_user('maintenance')
+        self.assertIsNone(self.get_company_id(admin))
+        # bulk_create sends no post_save, as if another process had made it
+        company, = MaintenanceCompanyProfile.objects.bulk_create([
+            MaintenanceCompanyProfile(user=admin, admin_user=admin, company_name='Lifts')
+        ])
+        self.assertIsNone(self.get_company_id(admin))
+        self.assertEqual(self.get_company_id(admin, after=context.get_negative_ttl() + 1), company.pk)
+
+    def test_company_expires(self):
+        company = create_company()
+        admin = company.admin_user
+        self.assertEqual(self.get_company_id(admin), company.pk)
+        MaintenanceCompanyProfile.objects.filter(pk=company.pk).update(admin_user=create_user('maintenance'))
+        self.assertEqual(self.get_company_id(admin, after=context.get_negative_ttl() + 1), company.pk)
+        self.assertIsNone(self.get_company_id(admin, after=context.get_ttl() + 1))
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Company reads answer 304 while the stored versions match the client's
+    ETag, and send a new ETag once the company or its roster changes.
+    """
+
+    def setUp(self):
+        self.company = create_company(technicians=2)
+        self.client = client_for(self.company.admin_user)
+        self.urls = [f'/api/companies/{self.company.pk}/', f'/api/companies/{self.company.pk}/technicians/']
+
+    def etags(self):
+        etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            etags.append(response['ETag'])
+        return etags
+
+    def assertNotModified(self, etags):
+        for url, etag in zip(self.urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def assertChanged(self, etags, change):
+        change()
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        return self.etags()
+
+    def test_roster_changes(self):
+        etags = self.etags()
+        self.assertNotModified(etags)
+
+        joining = TechnicianProfile.objects.create(user=create_user('technician'))
+        etags = self.assertChanged(etags, lambda: self.client.post(
+            f'/api/companies/{self.company.pk}/add_technicians/', {'user_ids': [joining.user_id]}
+        ))
+        self.assertNotModified(etags)
+
+        etags = self.assertChanged(etags, lambda: self.client.post(
+            f'/api/companies/{self.company.pk}/remove_technicians/', {'user_ids': [joining.user_id]}
+        ))
+
+        # A technician's own details are part of the roster
+        user = self.company.technicians.first().user
+
+        def rename():
+            user.first_name = 'Renamed'
+            user.save()
+        self.assertChanged(etags, rename)
+
+    def test_company_change(self):
+        etags = self.etags()
+
+        def rename():
+            self.company.company_name = 'Escalators'
+            self.company.save()
+        self.assertChanged(etags[:1], rename)
+
+    def test_unrelated_change_keeps_etag(self):
+        etags = self.etags()
+        create_company(technicians=1)
+        self.assertNotModified(etags)
+
+
+class RosterAccessTests(TestCase):
+    """
+    A company's roster, sync or async, is readable by its admin and by
+    superusers only.
+    """
+
+    def setUp(self):
+        self.company = create_company(technicians=2)
+        self.urls = [
+            f'/api/companies/{self.company.pk}/technicians/',
+            f'/api/async/companies/{self.company.pk}/technicians/',
+        ]
+
+    def assertStatus(self, user, expected):
+        client = client_for(user)
+        for url in self.urls:
+            with self.subTest(url=url, user=user.account_type):
+                response = client.get(url)
+                self.assertEqual(response.status_code, expected)
+                if expected == 200:
+                    self.assertEqual(len(response.data['technicians']), 2)
+
+    def test_admin(self):
+        self.assertStatus(self.company.admin_user, 200)
+
+    def test_superuser(self):
+        self.assertStatus(create_user('admin', superuser=True), 200)
+
+    def test_others(self):
+        self.assertStatus(create_company().admin_user, 403)
+        self.assertStatus(self.company.technicians.first().user, 403)
@@ -1,11 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MaintenanceCompanyViewSet
+from .views import AsyncCompanyTechniciansView, MaintenanceCompanyViewSet
 
 router = DefaultRouter()
 router.register(r'companies', MaintenanceCompanyViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async read path for ASGI deployments
+    path(
+        'async/companies/<str:id>/technicians/',
+        AsyncCompanyTechniciansView.as_view(),
+        name='company-technicians-async',
+    ),
     # other URL patterns...
 ]
\ No newline at end of file
@@ -3,29 +3,65 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
 
+from Account_User import response_cache
 from Account_User.models import User
+from Account_User.async_views import AsyncAPIView
+from Account_User.authentication import load_user
+from Account_User.mixins import (
+    EagerLoadingViewSetMixin, ProjectedListViewSetMixin, QueuedWriteViewSetMixin, ReplicaReadViewSetMixin,
+    StreamingListViewSetMixin
+)
+from Account_User.search import FullTextSearchFilter
+from Mtambo_BackendApis import db_router, write_queue
+from Mtambo_BackendApis.etags import aversion_validators, not_modified, set_etag, version_validators
+from Mtambo_BackendApis.lru import MISSING
+from Mtambo_BackendApis.pagination import KeysetPagination
+from Mtambo_BackendApis.singleflight import get_single_flight
+from . import context
 from .permissions import IsSuperUser, IsMaintenanceCompanyAdmin, IsOwnerOrSuperuser
 from .models import MaintenanceCompanyProfile
-from .serializers import MaintenanceCompanyProfileSerializer, MaintenanceCompanyDetailSerializer
+from .serializers import (
+    MaintenanceCompanyProfileSerializer, MaintenanceCompanyDetailSerializer, TechnicianBatchSerializer
+)
+from technician import export, membership, onboarding
 from technician.models import TechnicianProfile
 from technician.serializers import TechnicianProfileSerializer, TechnicianCreateSerializer
 import uuid
 
+# Rows fetched per round trip when reading a whole roster; on PostgreSQL this
+# is the fetch size of the server-side cursor
+ROSTER_CHUNK_SIZE = 2000
 
 
-class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
+class MaintenanceCompanyViewSet(
+    ReplicaReadViewSetMixin,
+    QueuedWriteViewSetMixin,
+    StreamingListViewSetMixin,
+    ProjectedListViewSetMixin,
+    EagerLoadingViewSetMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for MaintenanceCompanyProfile model.
     Provides CRUD operations with proper permission handling.
     """
     queryset = MaintenanceCompanyProfile.objects.all()
     serializer_class = MaintenanceCompanyProfileSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    # The search filter runs last so it can rank results when no ordering is requested
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     search_fields = ['company_name', 'registration_number', 'user__email', 'user__first_name', 'user__last_name']
-    ordering_fields = ['company_name', 'user__created_at']
+    search_entity_type = 'company'
+    filterset_fields = {'technician_count': ['exact', 'gte', 'lte']}
+    ordering_fields = ['company_name', 'user__created_at', 'technician_count']
     ordering = ['-user__created_at']
+    replica_actions = ('list', 'retrieve', 'export_technicians')
     # Add this if your MaintenanceCompanyProfile uses UUIDs
     lookup_field = 'id'  # or 'uuid' if that's what your model uses
     
@@ -49,7 +85,7 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
             return queryset
             
         # Regular users can only see their own maintenance company profile
-        return queryset.filter(admin_user=self.request.user)
+        return queryset.filter(admin_user_id=self.request.user.pk)
     
     def get_permissions(self):
         """
@@ -67,9 +103,13 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         elif self.action == 'retrieve':
             # Superusers can see any, others only their own
             permission_classes = [IsAuthenticated, IsOwnerOrSuperuser]
-        elif self.action in ['technicians', 'add_technician', 'remove_technician', 'create_technician']:
+        elif self.action in ['add_technician', 'remove_technician', 'create_technician',
+                             'bulk_create_technicians', 'add_technicians', 'remove_technicians']:
             # Only company admins can manage their technicians
             permission_classes = [IsAuthenticated, IsMaintenanceCompanyAdmin]
+        elif self.action in ['technicians', 'export_technicians']:
+            # Company admins read their own roster, superusers any roster
+            permission_classes = [IsAuthenticated, IsSuperUser | IsMaintenanceCompanyAdmin]
         else:
             permission_classes = [IsAuthenticated]
             
@@ -79,25 +119,85 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         """
         When creating a new maintenance company, set the admin_user
         """
-        serializer.save(admin_user=self.request.user)
-    
-    @action(detail=True, methods=['get'])
-    def technicians(self, request, id=None):
+        serializer.save(admin_user=load_user(self.request.user))
+
+    def get_cache_scope(self, pk):
+        """
+        Return (pk, visibility) for the response cache, with the pk in its
+        canonical form, or (pk, None) when it is not a valid id.
+        """
+        try:
+            pk = str(MaintenanceCompanyProfile._meta.pk.to_python(pk))
+        except ValidationError:
+            return pk, None
+        return pk, 'superuser' if self.request.user.is_superuser else 'owner'
+
+    def retrieve(self, request, *args, **kwargs):
         """
-        List all technicians belonging to this maintenance company
+        Company detail with its roster, answered with a 304 when the client's
+        ETag still matches the stored versions, and served from the response
+        cache when possible. Concurrent misses for the same version share one
+        serialization.
         """
+        cache = response_cache.get_cache()
+        pk, visibility = self.get_cache_scope(kwargs[self.lookup_field])
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            # Only full representations are cached
+            visibility = None
+        entry = cache.get(response_cache.COMPANY, pk, 'detail', visibility) if visibility else MISSING
+        # Owner entries are only served to the user who owns and administers the company
+        if entry is not MISSING and (
+            visibility == 'superuser' or str(request.user.pk) == entry['user_id'] == entry['admin_user_id']
+        ):
+            response = not_modified(request, entry['etag'], entry['last_modified'])
+            if response is not None:
+                return response
+            return set_etag(Response(entry['data']), entry['etag'], entry['last_modified'])
+
+        # Permission checks only need the bare row
+        self.eager_loading = False
         company = self.get_object()
-        
-        # Extra security check - only admins of this company or superusers can access
-        if not request.user.is_superuser and company.admin_user != request.user:
-            return Response(
-                {"detail": "You are not authorized to view technicians for this company."},
-                status=status.HTTP_403_FORBIDDEN
+
+        def validators():
+            return version_validators(
+                MaintenanceCompanyProfile.objects.filter(pk=company.pk),
+                'user', 'admin_user', 'technicians', 'technicians__user',
+                scope='company-detail',
             )
-            
-        technicians = TechnicianProfile.objects.filter(maintenance_company=company)
-        serializer = TechnicianProfileSerializer(technicians, many=True)
-        return Response(serializer.data)
+
+        etag, last_modified = validators()
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        def load():
+            self.eager_loading = True
+            # A lagging replica must not refill the shared cache with stale
+            # data, nor tag what it caches with the replica's older versions
+            with db_router.primary():
+                # Tagged first, so the data is never older than its tag
+                current_etag, current_last_modified = validators()
+                data = self.get_serializer(self.get_object()).data
+            entry = {
+                'data': data,
+                'etag': current_etag,
+                'last_modified': current_last_modified,
+                'user_id': str(company.user_id),
+                'admin_user_id': str(company.admin_user_id),
+            }
+            if visibility is not None:
+                cache.set(response_cache.COMPANY, pk, 'detail', visibility, entry)
+            return entry
+
+        def lookup():
+            # Filled by a leader in another process when the cache is shared
+            entry = cache.peek(response_cache.COMPANY, pk, 'detail', visibility)
+            return entry if entry is not MISSING and entry['etag'] == etag else MISSING
+
+        # Every caller has passed get_object() above, so they can share one payload
+        entry = get_single_flight().do(f'company-detail:{pk}:{visibility}:{fieldset}:{etag}', load, lookup if visibility else None)
+        return set_etag(Response(entry['data']), entry['etag'], entry['last_modified'])
     
     @action(detail=True, methods=['post'])
     def add_technician(self, request, id=None):
@@ -107,7 +207,7 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         company = self.get_object()
         
         # Extra security check - only admins of this company or superusers can add technicians
-        if not request.user.is_superuser and company.admin_user != request.user:
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
             return Response(
                 {"detail": "You are not authorized to add technicians to this company."},
                 status=status.HTTP_403_FORBIDDEN
@@ -128,12 +228,16 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
-            # Get or create technician profile
-            technician, created = TechnicianProfile.objects.get_or_create(user=user)
-            
-            # Assign to this maintenance company
-            technician.maintenance_company = company
-            technician.save()
+            def assign():
+                # Get or create technician profile
+                technician, created = TechnicianProfile.objects.get_or_create(user=user)
+
+                # Assign to this maintenance company
+                technician.maintenance_company = company
+                technician.save()
+                return technician
+
+            technician = write_queue.run(assign)
             
             serializer = TechnicianProfileSerializer(technician)
             return Response(serializer.data)
@@ -152,7 +256,7 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         company = self.get_object()
         
         # Extra security check - only admins of this company or superusers can remove technicians
-        if not request.user.is_superuser and company.admin_user != request.user:
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
             return Response(
                 {"detail": "You are not authorized to remove technicians from this company."},
                 status=status.HTTP_403_FORBIDDEN
@@ -183,7 +287,7 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
                 
             # Remove from this maintenance company
             technician.maintenance_company = None
-            technician.save()
+            write_queue.run(technician.save)
             
             return Response(status=status.HTTP_204_NO_CONTENT)
             
@@ -193,6 +297,53 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=True, methods=['post'])
+    def add_technicians(self, request, id=None):
+        """
+        Add a batch of existing technicians (by user_ids and/or emails) to this
+        maintenance company and report the inputs that could not be added
+        """
+        company = self.get_object()
+        
+        # Extra security check - only admins of this company or superusers can add technicians
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
+            return Response(
+                {"detail": "You are not authorized to add technicians to this company."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = TechnicianBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            report = membership.add_to_company(company, **serializer.validated_data)
+        except IntegrityError:
+            # Profiles were created concurrently again after the batch re-read them
+            return Response(
+                {"error": "The batch conflicts with a concurrent change; please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(report)
+    
+    @action(detail=True, methods=['post'])
+    def remove_technicians(self, request, id=None):
+        """
+        Remove a batch of technicians (by user_ids and/or emails) from this
+        maintenance company and report the inputs that were not members
+        """
+        company = self.get_object()
+        
+        # Extra security check - only admins of this company or superusers can remove technicians
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
+            return Response(
+                {"detail": "You are not authorized to remove technicians from this company."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = TechnicianBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = membership.remove_from_company(company, **serializer.validated_data)
+        return Response(report)
+    
     @action(detail=True, methods=['post'])
     def create_technician(self, request, id=None):
         """
@@ -201,7 +352,7 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         company = self.get_object()
         
         # Extra security check - only admins of this company or superusers can create technicians
-        if not request.user.is_superuser and company.admin_user != request.user:
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
             return Response(
                 {"detail": "You are not authorized to create technicians for this company."},
                 status=status.HTTP_403_FORBIDDEN
@@ -221,6 +372,59 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'], url_path='technicians/bulk')
+    def bulk_create_technicians(self, request, id=None):
+        """
+        Create many technicians for this maintenance company from a CSV or
+        NDJSON upload, sent as the request body or as a multipart `file`.
+        Returns a success/error report for every row.
+        """
+        company = self.get_object()
+        
+        # Extra security check - only admins of this company or superusers can create technicians
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
+            return Response(
+                {"detail": "You are not authorized to create technicians for this company."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            report = onboarding.onboard_technicians(company, onboarding.rows_from_request(request))
+        except IntegrityError:
+            # A user with one of these emails or phone numbers was created concurrently
+            return Response(
+                {"error": "The upload conflicts with technicians created meanwhile; please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response(
+            report,
+            status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        )
+    
+    @action(detail=True, methods=['get'], url_path='technicians/export', renderer_classes=export.RENDERER_CLASSES)
+    @method_decorator(gzip_page)
+    def export_technicians(self, request, id=None):
+        """
+        Stream this company's whole technician roster as CSV (the default) or
+        NDJSON, chosen with Accept or ?format=.
+        """
+        # Permission checks only need the bare row
+        self.eager_loading = False
+        company = self.get_object()
+        
+        # Extra security check - only admins of this company or superusers can export its technicians
+        if not request.user.is_superuser and company.admin_user_id != request.user.pk:
+            return Response(
+                {"detail": "You are not authorized to export technicians for this company."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return export.export_technicians(
+            TechnicianProfile.objects.filter(maintenance_company=company), request.accepted_renderer.format,
+            f'technicians-{company.pk}'
+        )
+    
     @action(detail=False, methods=['get'], url_path='by-email')
     def get_company_by_email(self, request):
         """
@@ -236,11 +440,14 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
 
         # Try fetching the company using admin's email
         user = User.objects.filter(email=email, account_type='maintenance').first()
+        companies = MaintenanceCompanyDetailSerializer.setup_eager_loading(
+            MaintenanceCompanyProfile.objects.all()
+        )
         if user:
-            company = MaintenanceCompanyProfile.objects.filter(admin_user=user).first()
+            company = companies.filter(admin_user=user).first()
         else:
             # Try fetching using the company email
-            company = MaintenanceCompanyProfile.objects.filter(company_email=email).first()
+            company = companies.filter(company_email=email).first()
 
         if not company:
             return Response(
@@ -260,12 +467,70 @@ class MaintenanceCompanyViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Invalid UUID format."}, status=status.HTTP_400_BAD_REQUEST)
 
         # ✅ Ensure the user is authorized
-        if request.user.account_type != "superuser" and request.user.maintenance_profile != company:
+        if not request.user.is_superuser and context.get_company_id(request) != company.pk:
             return Response({"detail": "You are not authorized."}, status=status.HTTP_403_FORBIDDEN)
 
-        # ✅ Get all technicians under the company
-        technicians = TechnicianProfile.objects.filter(maintenance_company=company)
-        serializer = TechnicianProfileSerializer(technicians, many=True)
-        return Response({"technicians": serializer.data}, status=status.HTTP_200_OK)
+        etag, last_modified = version_validators(
+            MaintenanceCompanyProfile.objects.filter(pk=company.pk),
+            'technicians', 'technicians__user',
+            scope='company-technicians',
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        fieldset = self.get_fieldset(TechnicianProfileSerializer)
+
+        def load():
+            # ✅ Get all technicians under the company
+            technicians = TechnicianProfile.objects.filter(maintenance_company=company)
+            if self.projected_list:
+                projection = self.get_projection(TechnicianProfileSerializer)
+                return projection.render_many(projection.values(technicians).iterator(chunk_size=ROSTER_CHUNK_SIZE))
+            technicians = TechnicianProfileSerializer.setup_eager_loading(technicians, fieldset)
+            return TechnicianProfileSerializer(
+                technicians.iterator(chunk_size=ROSTER_CHUNK_SIZE), many=True, context={'fieldset': fieldset}
+            ).data
+
+        # Concurrent polls of the same roster version share one serialization
+        data = get_single_flight().do(f'company-technicians:{company.pk}:{fieldset}:{etag}', load)
+        response = Response({"technicians": data}, status=status.HTTP_200_OK)
+        return set_etag(response, etag, last_modified)
     
-    
\ No newline at end of file
+    
+
+
+class AsyncCompanyTechniciansView(AsyncAPIView):
+    """
+    MaintenanceCompanyViewSet.technicians on the async ORM, with the same
+    permissions and conditional GET.
+    """
+    permission_classes = [IsAuthenticated, IsSuperUser | IsMaintenanceCompanyAdmin]
+
+    async def get(self, request, id):
+        try:
+            company_uuid = uuid.UUID(id)
+        except ValueError:
+            return Response({"detail": "Invalid UUID format."}, status=status.HTTP_400_BAD_REQUEST)
+        company = await aget_object_or_404(MaintenanceCompanyProfile, id=company_uuid)
+
+        if not request.user.is_superuser and await context.aget_company_id(request) != company.pk:
+            return Response({"detail": "You are not authorized."}, status=status.HTTP_403_FORBIDDEN)
+
+        etag, last_modified = await aversion_validators(
+            MaintenanceCompanyProfile.objects.filter(pk=company.pk),
+            'technicians', 'technicians__user',
+            scope='company-technicians',
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        technicians = TechnicianProfileSerializer.setup_eager_loading(
+            TechnicianProfile.objects.filter(maintenance_company=company)
+        )
+        serializer = TechnicianProfileSerializer(
+            [technician async for technician in technicians.aiterator(chunk_size=ROSTER_CHUNK_SIZE)], many=True
+        )
+        response = Response({"technicians": serializer.data}, status=status.HTTP_200_OK)
+        return set_etag(response, etag, last_modified)
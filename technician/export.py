@@ -0,0 +1,71 @@
+"""
+Technician roster exports as CSV or NDJSON.
+
+Rows are read with values_list() through `.iterator()`, which is a
+server-side cursor on PostgreSQL, and encoded as they arrive into a
+StreamingHttpResponse, so memory use does not depend on the roster size.
+Columns use the names bulk onboarding (technician.onboarding) reads, plus
+the technician and company ids and the company name. Rows are not sorted:
+the primary key is a UUID, so ordering a company's roster by it would sort
+every row before the first one could be sent.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from Mtambo_BackendApis.renderers import CSVRenderer, NDJSONRenderer, iter_csv, iter_ndjson
+from .onboarding import CSV
+
+# (column, lookup)
+COLUMNS = (
+    ('id', 'id'),
+    ('email', 'user__email'),
+    ('phone_number', 'user__phone_number'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('specialization', 'specialization'),
+    ('maintenance_company', 'maintenance_company_id'),
+    ('maintenance_company_name', 'maintenance_company__company_name'),
+)
+
+# A leading character that makes spreadsheets read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+RENDERER_CLASSES = [CSVRenderer, NDJSONRenderer]
+
+
+def get_chunk_size():
+    return getattr(settings, 'TECHNICIAN_EXPORT_CHUNK_SIZE', 2000)
+
+
+def spreadsheet_safe(value):
+    """
+    Quote text a spreadsheet would run as a formula. Phone numbers such as
+    +254700000000 are left alone.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not value[1:].isdigit():
+        return "'" + value
+    return value
+
+
+def export_technicians(queryset, fmt, filename):
+    """
+    Return a StreamingHttpResponse with the technicians of `queryset` as a
+    `fmt` (CSV or NDJSON) attachment named `filename`.
+    """
+    header = [column for column, _ in COLUMNS]
+    queryset = queryset.order_by().values_list(*[lookup for _, lookup in COLUMNS])
+    # Route now: the rows are read after the view, and the routing
+    # middleware, have returned
+    rows = queryset.using(queryset.db).iterator(chunk_size=get_chunk_size())
+
+    if fmt == CSV:
+        content = iter_csv(header, ([spreadsheet_safe(value) for value in row] for row in rows))
+        renderer = CSVRenderer
+    else:
+        content = iter_ndjson(dict(zip(header, row)) for row in rows)
+        renderer = NDJSONRenderer
+
+    content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
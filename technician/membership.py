@@ -0,0 +1,139 @@
+"""
+Batch changes to maintenance company membership.
+
+Technicians are identified by user id and/or email. A batch is resolved
+with one query, moved with a single UPDATE ... WHERE id IN (...), and any
+missing TechnicianProfile rows are bulk-created. Profiles created or claimed
+by concurrent requests are re-read rather than failing the batch. Queryset updates and bulk
+inserts bypass model signals, so the company headcount and the search
+index are maintained here explicitly.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from Account_User import search
+from Account_User.models import User, bump_version
+from maintenance_company.models import MaintenanceCompanyProfile
+from .models import TechnicianProfile
+
+
+def _resolve(matches, user_ids, emails):
+    """
+    Pair each input with its match (or None), keeping the input order.
+    `matches` is a list of (user_id, email, match) tuples.
+    """
+    by_id = {user_id: match for user_id, _, match in matches}
+    by_email = {email: match for _, email, match in matches}
+    return [(user_id, by_id.get(user_id)) for user_id in user_ids] + \
+        [(email, by_email.get(email)) for email in emails]
+
+
+def _create_profiles(profiles):
+    """
+    Bulk-create `profiles`. Return the ones created and, as {user_id: pk},
+    the profiles other requests created meanwhile for the rest of the users.
+    """
+    try:
+        with transaction.atomic():
+            return TechnicianProfile.objects.bulk_create(profiles), {}
+    except IntegrityError:
+        existing = dict(TechnicianProfile.objects.filter(
+            user_id__in=[profile.user_id for profile in profiles]
+        ).values_list('user_id', 'pk'))
+        if not existing:
+            raise
+        profiles = [profile for profile in profiles if profile.user_id not in existing]
+        return TechnicianProfile.objects.bulk_create(profiles), existing
+
+
+def add_to_company(company, user_ids=(), emails=()):
+    """
+    Assign technicians to `company`, creating their profiles if needed.
+
+    Technicians that already belong to another company are left there and
+    reported, as are inputs that match no technician user. That includes
+    technicians another company claimed while the batch was being applied.
+    """
+    users = list(
+        User.objects.filter(Q(pk__in=user_ids) | Q(email__in=emails), account_type='technician')
+        .select_related('technician_profile')
+    )
+
+    report = {'added': [], 'already_member': [], 'missing': [], 'other_company': []}
+    # The same technician may be given twice, by id and by email
+    pending, assign, create = [], {}, {}
+    matches = [(user.pk, user.email, user) for user in users]
+    for value, user in _resolve(matches, user_ids, emails):
+        if user is None:
+            report['missing'].append(value)
+            continue
+        profile = getattr(user, 'technician_profile', None)
+        if profile is not None and profile.maintenance_company_id == company.pk:
+            report['already_member'].append(value)
+        elif profile is not None and profile.maintenance_company_id is not None:
+            report['other_company'].append(value)
+        else:
+            pending.append((value, user.pk))
+            if profile is None:
+                create.setdefault(user.pk, TechnicianProfile(user=user, maintenance_company=company))
+            else:
+                assign[user.pk] = profile.pk
+
+    with transaction.atomic():
+        created, existing = _create_profiles(list(create.values())) if create else ([], {})
+        assign.update(existing)
+        moved, members = 0, set()
+        if assign:
+            # Only unassigned profiles move, even if one was claimed meanwhile
+            moved = TechnicianProfile.objects.filter(
+                pk__in=assign.values(), maintenance_company__isnull=True
+            ).update(maintenance_company=company, **bump_version())
+            members = set(TechnicianProfile.objects.filter(
+                pk__in=assign.values(), maintenance_company=company
+            ).values_list('pk', flat=True))
+        if created:
+            search.index_technicians(created)
+        MaintenanceCompanyProfile.adjust_technician_count(company.pk, moved + len(created))
+
+    added = {profile.user_id for profile in created} | {
+        user_id for user_id, pk in assign.items() if pk in members
+    }
+    for value, user_id in pending:
+        report['added' if user_id in added else 'other_company'].append(value)
+    return report
+
+
+def remove_from_company(company, user_ids=(), emails=()):
+    """
+    Detach technicians from `company`.
+
+    Inputs that match no technician, or a technician outside this company,
+    are reported and left untouched.
+    """
+    profiles = TechnicianProfile.objects.filter(
+        Q(user_id__in=user_ids) | Q(user__email__in=emails)
+    ).values_list('user_id', 'user__email', 'pk', 'maintenance_company_id')
+    matches = [(user_id, email, (pk, company_id)) for user_id, email, pk, company_id in profiles]
+
+    report = {'removed': [], 'missing': [], 'not_member': []}
+    detach = set()
+    for value, profile in _resolve(matches, user_ids, emails):
+        if profile is None:
+            report['missing'].append(value)
+            continue
+        profile_id, company_id = profile
+        if company_id != company.pk:
+            report['not_member'].append(value)
+        else:
+            detach.add(profile_id)
+            report['removed'].append(value)
+
+    with transaction.atomic():
+        removed = 0
+        if detach:
+            removed = TechnicianProfile.objects.filter(
+                pk__in=detach, maintenance_company=company
+            ).update(maintenance_company=None, **bump_version())
+        MaintenanceCompanyProfile.adjust_technician_count(company.pk, -removed)
+
+    return report
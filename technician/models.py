@@ -1,9 +1,10 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from Account_User.models import VersionedModel
 from maintenance_company.models import MaintenanceCompanyProfile
 
-class TechnicianProfile(models.Model):
+class TechnicianProfile(VersionedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
@@ -19,5 +20,11 @@ class TechnicianProfile(models.Model):
         blank=True
     )
 
+    def save(self, *args, **kwargs):
+        # technician.signals locks the row and moves the company headcount in
+        # the same transaction as the save
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Technician: {self.user.email}"
@@ -0,0 +1,197 @@
+"""
+Bulk technician onboarding from CSV or NDJSON uploads.
+
+The upload is parsed row by row straight from the request stream (or from
+a multipart `file`), so the body is never buffered or decoded as a whole.
+Every row is validated on its own. Email and phone number uniqueness is
+checked for the whole upload with one query per key. Passwords are hashed
+in parallel in the password pool, and users and profiles are inserted with
+bulk_create in chunks inside a single transaction.
+
+Bulk inserts bypass model signals, so the company headcount and the search
+index are maintained here explicitly.
+"""
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+
+from Account_User import hashing, search
+from Account_User.models import User
+from maintenance_company.models import MaintenanceCompanyProfile
+from .models import TechnicianProfile
+from .serializers import TechnicianBulkRowSerializer
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+
+CONTENT_TYPES = {
+    'text/csv': CSV,
+    'application/csv': CSV,
+    'application/x-ndjson': NDJSON,
+    'application/ndjson': NDJSON,
+    'application/jsonl': NDJSON,
+    'application/x-jsonlines': NDJSON,
+}
+EXTENSIONS = {'.csv': CSV, '.ndjson': NDJSON, '.jsonl': NDJSON}
+
+UNIQUE_FIELDS = {
+    'email': _('A user with this email already exists.'),
+    'phone_number': _('A user with this phone number already exists.'),
+}
+
+
+def get_max_rows():
+    return getattr(settings, 'TECHNICIAN_BULK_MAX_ROWS', 10000)
+
+
+def get_chunk_size():
+    return getattr(settings, 'TECHNICIAN_BULK_CHUNK_SIZE', 1000)
+
+
+def iter_csv(lines):
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    try:
+        for row in reader:
+            # Columns beyond the header land under the None key
+            row.pop(None, None)
+            yield {key.strip(): value.strip() for key, value in row.items() if key and value is not None}
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ParseError(f'Malformed CSV on line {reader.line_num}: {exc}')
+
+
+def iter_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            raise ParseError(f'Malformed JSON on line {line_number}: {exc}')
+        if not isinstance(row, dict):
+            raise ParseError(f'Line {line_number} is not a JSON object.')
+        yield row
+
+
+def rows_from_request(request):
+    """
+    Return an iterator over the uploaded rows without reading the body up front.
+    """
+    content_type = request.content_type.split(';')[0].strip().lower()
+
+    if content_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ParseError('Upload a CSV or NDJSON file in the "file" field.')
+        extension = '.' + upload.name.rsplit('.', 1)[-1].lower() if '.' in upload.name else ''
+        fmt = EXTENSIONS.get(extension) or CONTENT_TYPES.get(upload.content_type)
+        lines = iter(upload)
+    else:
+        fmt = CONTENT_TYPES.get(content_type)
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else iter(())
+
+    if fmt is None:
+        raise UnsupportedMediaType(content_type, 'Upload text/csv or application/x-ndjson.')
+    return iter_csv(lines) if fmt == CSV else iter_ndjson(lines)
+
+
+def onboard_technicians(company, rows):
+    """
+    Validate and create technicians for `company` from an iterable of dicts.
+
+    Returns {"created": n, "failed": n, "rows": [...]} with one entry per
+    input row, in input order. Invalid rows are reported and skipped; the
+    valid ones are created together or not at all.
+    """
+    max_rows = get_max_rows()
+    chunk_size = get_chunk_size()
+    results = {}
+    accepted = []
+    first_seen = {field: {} for field in UNIQUE_FIELDS}
+
+    for number, row in enumerate(rows, start=1):
+        if number > max_rows:
+            raise ParseError(f'Uploads are limited to {max_rows} rows.')
+
+        serializer = TechnicianBulkRowSerializer(data=row)
+        if not serializer.is_valid():
+            results[number] = {'row': number, 'status': 'error', 'errors': serializer.errors}
+            continue
+
+        data = serializer.validated_data
+        errors = {}
+        for field in UNIQUE_FIELDS:
+            first = first_seen[field].setdefault(data[field], number)
+            if first != number:
+                errors[field] = [f'Duplicates row {first}.']
+        if errors:
+            results[number] = {'row': number, 'status': 'error', 'errors': errors}
+        else:
+            accepted.append((number, data))
+
+    # One query per unique key for the whole upload
+    for field, message in UNIQUE_FIELDS.items():
+        taken = set(User.objects.filter(
+            **{f'{field}__in': [data[field] for _, data in accepted]}
+        ).values_list(field, flat=True))
+        if not taken:
+            continue
+        remaining = []
+        for number, data in accepted:
+            if data[field] in taken:
+                entry = results.setdefault(number, {'row': number, 'status': 'error', 'errors': {}})
+                entry['errors'][field] = [str(message)]
+            else:
+                remaining.append((number, data))
+        accepted = remaining
+
+    passwords = hashing.hash_passwords([data.get('password') or None for _, data in accepted])
+
+    with transaction.atomic():
+        for start in range(0, len(accepted), chunk_size):
+            chunk = accepted[start:start + chunk_size]
+            users = [
+                User(
+                    email=data['email'],
+                    phone_number=data['phone_number'],
+                    first_name=data['first_name'],
+                    last_name=data['last_name'],
+                    account_type='technician',
+                    password=password,
+                )
+                for (_, data), password in zip(chunk, passwords[start:start + chunk_size])
+            ]
+            profiles = [
+                TechnicianProfile(
+                    user=user,
+                    specialization=data.get('specialization', ''),
+                    maintenance_company=company,
+                )
+                for (_, data), user in zip(chunk, users)
+            ]
+            User.objects.bulk_create(users)
+            TechnicianProfile.objects.bulk_create(profiles)
+            search.index_technicians(profiles)
+
+            for (number, _), profile in zip(chunk, profiles):
+                results[number] = {
+                    'row': number,
+                    'status': 'created',
+                    'id': profile.pk,
+                    'user_id': profile.user_id,
+                    'email': profile.user.email,
+                }
+
+        if accepted:
+            MaintenanceCompanyProfile.adjust_technician_count(company.pk, len(accepted))
+
+    return {
+        'created': len(accepted),
+        'failed': len(results) - len(accepted),
+        'rows': [results[number] for number in sorted(results)],
+    }
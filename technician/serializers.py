@@ -3,11 +3,12 @@ from django.db import transaction
 from django.contrib.auth.password_validation import validate_password
 
 from Account_User.models import User
+from Account_User.mixins import EagerLoadingMixin
 from Account_User.serializers import UserDetailSerializer, UserCreateSerializer
 from .models import TechnicianProfile
 
 
-class TechnicianProfileSerializer(serializers.ModelSerializer):
+class TechnicianProfileSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for TechnicianProfile model.
     Includes nested user information.
@@ -19,7 +20,7 @@ class TechnicianProfileSerializer(serializers.ModelSerializer):
         read_only=True,
         allow_null=True
     )
-    
+
     class Meta:
         model = TechnicianProfile
         fields = [
@@ -122,4 +123,32 @@ class TechnicianCreateSerializer(serializers.Serializer):
         return {
             'user': user,
             'technician_profile': technician
-        }
\ No newline at end of file
+        }
+
+
+class TechnicianBulkRowSerializer(TechnicianCreateSerializer):
+    """
+    Validates one row of a bulk technician upload.
+    Uniqueness is checked for the whole upload at once by
+    technician.onboarding, so the per-row queries are skipped here.
+    A blank password leaves the account without a usable password.
+    """
+    phone_number = serializers.CharField(max_length=User._meta.get_field('phone_number').max_length)
+    first_name = serializers.CharField(max_length=User._meta.get_field('first_name').max_length)
+    last_name = serializers.CharField(max_length=User._meta.get_field('last_name').max_length)
+    password = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    specialization = serializers.CharField(
+        required=False, allow_blank=True,
+        max_length=TechnicianProfile._meta.get_field('specialization').max_length
+    )
+
+    def validate_password(self, value):
+        if value:
+            validate_password(value)
+        return value
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate_phone_number(self, value):
+        return value
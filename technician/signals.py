@@ -0,0 +1,69 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from maintenance_company.models import MaintenanceCompanyProfile
+from .models import TechnicianProfile
+
+
+def _lock_stored_company(instance, using):
+    """
+    Return the company the stored row belongs to, locking the row until the
+    transaction ends so concurrent moves are applied one after the other.
+
+    The instance's own copy may be stale (another request or a queryset
+    update moved the technician since it was loaded), so the database is
+    asked every time. None if the row is gone.
+    """
+    return type(instance)._default_manager.using(using).select_for_update().filter(
+        pk=instance.pk
+    ).values_list('maintenance_company_id', flat=True).first()
+
+
+@receiver(pre_save, sender=TechnicianProfile)
+def remember_previous_company(sender, instance, raw, using, update_fields, **kwargs):
+    """
+    Record which company the technician belonged to before this save.
+    """
+    if raw:
+        return
+
+    if instance._state.adding:
+        instance._previous_company_id = None
+    elif update_fields is not None and not {'maintenance_company', 'maintenance_company_id'} & set(update_fields):
+        instance._previous_company_id = instance.maintenance_company_id
+    else:
+        # TechnicianProfile.save() runs inside atomic(), which holds the lock
+        instance._previous_company_id = _lock_stored_company(instance, using)
+
+
+@receiver(post_save, sender=TechnicianProfile)
+def update_company_technician_count(sender, instance, created, raw, update_fields, **kwargs):
+    """
+    Move the technician between company headcounts when membership changes.
+    """
+    if raw:
+        return
+
+    if update_fields is not None and not {'maintenance_company', 'maintenance_company_id'} & update_fields:
+        return
+
+    previous = getattr(instance, '_previous_company_id', None)
+    current = instance.maintenance_company_id
+    if previous != current:
+        MaintenanceCompanyProfile.adjust_technician_count(previous, -1)
+        MaintenanceCompanyProfile.adjust_technician_count(current, 1)
+
+
+@receiver(pre_delete, sender=TechnicianProfile)
+def remember_deleted_company(sender, instance, using, **kwargs):
+    # Deletion runs inside atomic(), so the row stays locked until it is gone
+    instance._previous_company_id = _lock_stored_company(instance, using)
+
+
+@receiver(post_delete, sender=TechnicianProfile)
+def release_company_technician_count(sender, instance, **kwargs):
+    """
+    Drop a deleted technician (including cascade deletes) from the headcount
+    of the company the row belonged to; nothing if it was already gone.
+    """
+    MaintenanceCompanyProfile.adjust_technician_count(getattr(instance, '_previous_company_id', None), -1)
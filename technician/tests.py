@@ -1,3 +1,370 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from Account_User.tests import QueryCountTestCase, client_for, create_user
+from maintenance_company.models import MaintenanceCompanyProfile
+from Account_User import search
+from Account_User.models import User
+from . import export, membership, onboarding
+from .models import TechnicianProfile
+
+
+def create_company(technicians=0):
+    admin = create_user('maintenance')
+    company = MaintenanceCompanyProfile.objects.create(user=admin, admin_user=admin, company_name='Lifts')
+    for _ in range(technicians):
+        TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+    return company
+
+
+class TechnicianQueryCountTests(QueryCountTestCase):
+    """
+    Listing and retrieving technicians costs the same number of queries
+    however many related rows there are.
+    """
+
+    def test_list(self):
+        # Each technician in a company of their own, plus one without a company
+        def create_technicians(n):
+            for _ in range(n):
+                create_company(technicians=1)
+            TechnicianProfile.objects.create(user=create_user('technician'))
+
+        create_technicians(3)
+        queries = self.count_queries('/api/technicians/?page_size=100')
+        create_technicians(3)
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/technicians/?page_size=100')
+        self.assertEqual(len(response.data['results']), 8)
+
+    def test_list_for_company_admin(self):
+        company = create_company(technicians=3)
+        self.client = client_for(company.admin_user)
+        queries = self.count_queries('/api/technicians/?page_size=100')
+        for _ in range(3):
+            TechnicianProfile.objects.create(user=create_user('technician'), maintenance_company=company)
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/technicians/?page_size=100')
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_retrieve(self):
+        technicians = [create_company(technicians=n).technicians.first() for n in (3, 6)]
+        with self.assertNumQueries(self.count_queries(f'/api/technicians/{technicians[0].pk}/')):
+            response = self.client.get(f'/api/technicians/{technicians[1].pk}/')
+        self.assertEqual(response.status_code, 200)
+
+
+class AddToCompanyRaceTests(TestCase):
+    """
+    Changes other requests make between resolving a batch and applying it
+    are reported, not lost or turned into errors.
+    """
+
+    def add_meanwhile(self, change, **batch):
+        resolve = membership._resolve
+
+        def resolve_then_change(*args):
+            resolved = resolve(*args)
+            change()
+            return resolved
+
+        with mock.patch.object(membership, '_resolve', side_effect=resolve_then_change):
+            return membership.add_to_company(self.company, **batch)
+
+    def setUp(self):
+        self.company, self.other = create_company(), create_company()
+
+    def test_profile_claimed_meanwhile(self):
+        claimed, free = (TechnicianProfile.objects.create(user=create_user('technician')) for _ in range(2))
+        report = self.add_meanwhile(
+            lambda: TechnicianProfile.objects.filter(pk=claimed.pk).update(maintenance_company=self.other),
+            user_ids=[claimed.user_id, free.user_id],
+        )
+        self.assertEqual(report['added'], [free.user_id])
+        self.assertEqual(report['other_company'], [claimed.user_id])
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.technician_count, 1)
+
+    def test_profile_created_meanwhile(self):
+        users = [create_user('technician') for _ in range(3)]
+        elsewhere, unassigned, new = users
+
+        def create_profiles():
+            TechnicianProfile.objects.create(user=elsewhere, maintenance_company=self.other)
+            TechnicianProfile.objects.create(user=unassigned)
+
+        report = self.add_meanwhile(create_profiles, user_ids=[user.pk for user in users])
+        self.assertEqual(report['added'], [unassigned.pk, new.pk])
+        self.assertEqual(report['other_company'], [elsewhere.pk])
+        self.assertEqual(
+            set(self.company.technicians.values_list('user_id', flat=True)), {unassigned.pk, new.pk}
+        )
+
+
+class TechnicianCountTests(TestCase):
+    """
+    The stored headcount follows the technician's row, not the possibly
+    stale instance that is saved or deleted.
+    """
+
+    def setUp(self):
+        self.first, self.second, self.third = create_company(), create_company(), create_company()
+        self.technician = TechnicianProfile.objects.create(
+            user=create_user('technician'), maintenance_company=self.first
+        )
+
+    def assertCounts(self, *expected):
+        counts = MaintenanceCompanyProfile.objects.in_bulk([self.first.pk, self.second.pk, self.third.pk])
+        self.assertEqual(
+            tuple(counts[company.pk].technician_count for company in (self.first, self.second, self.third)),
+            expected,
+        )
+
+    def test_move(self):
+        self.assertCounts(1, 0, 0)
+        self.technician.maintenance_company = self.second
+        self.technician.save()
+        self.assertCounts(0, 1, 0)
+
+    def test_unassign(self):
+        self.technician.maintenance_company = None
+        self.technician.save()
+        self.assertCounts(0, 0, 0)
+
+    def test_save_without_membership_change(self):
+        self.technician.specialization = 'Hydraulics'
+        self.technician.save()
+        self.technician.save(update_fields=['specialization'])
+        self.assertCounts(1, 0, 0)
+
+    def test_delete(self):
+        self.technician.delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_cascade_delete_with_the_user(self):
+        self.technician.user.delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_concurrent_moves_from_stale_instances(self):
+        one, other = (TechnicianProfile.objects.get(pk=self.technician.pk) for _ in range(2))
+        one.maintenance_company = self.second
+        one.save()
+        # `other` still believes the technician is in the first company
+        other.maintenance_company = self.third
+        other.save()
+        self.assertCounts(0, 0, 1)
+
+    def test_stale_move_after_queryset_update(self):
+        stale = TechnicianProfile.objects.get(pk=self.technician.pk)
+        membership.remove_from_company(self.first, user_ids=[self.technician.user_id])
+        membership.add_to_company(self.second, user_ids=[self.technician.user_id])
+        self.assertCounts(0, 1, 0)
+
+        stale.maintenance_company = self.third
+        stale.save()
+        self.assertCounts(0, 0, 1)
+
+    def test_concurrent_deletes_from_stale_instances(self):
+        one, other = (TechnicianProfile.objects.get(pk=self.technician.pk) for _ in range(2))
+        one.maintenance_company = self.second
+        one.save()
+        other.delete()
+        one.delete()
+        self.assertCounts(0, 0, 0)
+
+
+class OnboardingTests(TestCase):
+    """
+    Bulk uploads report every row, create the valid ones together and keep
+    the headcount and search index current, in both upload formats.
+    """
+
+    def setUp(self):
+        self.company = create_company()
+        self.client = client_for(self.company.admin_user)
+        self.url = f'/api/companies/{self.company.pk}/technicians/bulk/'
+        self.sequence = count()
+
+    def row(self, name, email=None, phone=None):
+        i = next(self.sequence)
+        return {
+            'email': email or f'{name.lower()}{i}@example.com', 'phone_number': phone or f'+2549{i:08d}',
+            'first_name': name, 'last_name': 'Technician', 'specialization': 'Lifts',
+        }
+
+    def upload(self, fmt, rows, client=None):
+        if fmt == onboarding.CSV:
+            header = list(rows[0])
+            body = '\n'.join([','.join(header)] + [','.join(row[key] for key in header) for row in rows])
+            content_type = 'text/csv'
+        else:
+            body = '\n'.join(json.dumps(row) for row in rows)
+            content_type = 'application/x-ndjson'
+        return (client or self.client).post(self.url, body, content_type=content_type)
+
+    def statuses(self, response):
+        return [(row['status'], sorted(row.get('errors', {}))) for row in response.data['rows']]
+
+    def test_creates_technicians_and_updates_count_and_index(self):
+        for fmt in (onboarding.CSV, onboarding.NDJSON):
+            with self.subTest(fmt):
+                name = f'Wanjiru{fmt}'
+                response = self.upload(fmt, [self.row(name), self.row('Otieno')])
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual((response.data['created'], response.data['failed']), (2, 0))
+                ids = [row['id'] for row in response.data['rows']]
+                members = self.company.technicians.filter(pk__in=ids).values_list('pk', flat=True)
+                self.assertEqual(set(members), set(ids))
+                self.assertEqual([pk for pk, _ in search.search(search.TECHNICIAN, name)], [ids[0]])
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.technician_count, 4)
+
+    def test_multipart_file(self):
+        upload = SimpleUploadedFile('roster.ndjson', json.dumps(self.row('Akinyi')).encode())
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+
+    def test_duplicates_within_the_upload(self):
+        for fmt in (onboarding.CSV, onboarding.NDJSON):
+            with self.subTest(fmt):
+                first = self.row('Kamau')
+                same_email = self.row('Other', email=first['email'])
+                same_phone = self.row('Njeri', phone=first['phone_number'])
+                response = self.upload(fmt, [first, same_email, same_phone])
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    self.statuses(response),
+                    [('created', []), ('error', ['email']), ('error', ['phone_number'])],
+                )
+                self.assertEqual(response.data['rows'][1]['errors']['email'], ['Duplicates row 1.'])
+
+    def test_duplicates_of_existing_users(self):
+        existing = create_user('technician')
+        for fmt in (onboarding.CSV, onboarding.NDJSON):
+            with self.subTest(fmt):
+                rows = [self.row('Taken', email=existing.email), self.row('Taken', phone=existing.phone_number)]
+                response = self.upload(fmt, rows)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(self.statuses(response), [('error', ['email']), ('error', ['phone_number'])])
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.technician_count, 0)
+
+    @override_settings(TECHNICIAN_BULK_MAX_ROWS=2)
+    def test_row_limit(self):
+        for fmt in (onboarding.CSV, onboarding.NDJSON):
+            with self.subTest(fmt):
+                response = self.upload(fmt, [self.row('Limit') for _ in range(3)])
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('limited to 2 rows', str(response.data['detail']))
+        self.assertFalse(self.company.technicians.exists())
+
+    def test_users_created_meanwhile_conflict(self):
+        row = self.row('Mwangi')
+        hash_passwords = onboarding.hashing.hash_passwords
+
+        def create_then_hash(passwords):
+            # Another request registers the same email after validation
+            User.objects.create_user(
+                email=row['email'], phone_number='+254799000000', first_name='Early', last_name='Bird',
+                account_type='technician', password=None,
+            )
+            return hash_passwords(passwords)
+
+        with mock.patch.object(onboarding.hashing, 'hash_passwords', side_effect=create_then_hash):
+            response = self.upload(onboarding.NDJSON, [row])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.company.technicians.exists())
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.technician_count, 0)
+
+    def test_other_company_admin_cannot_upload(self):
+        other = create_company()
+        response = self.upload(onboarding.NDJSON, [self.row('Intruder')], client=client_for(other.admin_user))
+        self.assertEqual(response.status_code, 404)
+        response = self.upload(onboarding.NDJSON, [self.row('Intruder')], client=client_for(create_user('technician')))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.company.technicians.exists())
+
+
+class ExportTests(TestCase):
+    """
+    Roster exports stream one company's technicians as CSV or NDJSON with
+    the columns onboarding reads, to its admin and superusers only.
+    """
+
+    def setUp(self):
+        self.company = create_company(technicians=3)
+        create_company(technicians=2)
+        self.client = client_for(self.company.admin_user)
+        self.url = f'/api/companies/{self.company.pk}/technicians/export/'
+
+    def expected(self):
+        rows = self.company.technicians.values_list(*[lookup for _, lookup in export.COLUMNS])
+        header = [column for column, _ in export.COLUMNS]
+        return sorted(({key: str(value) for key, value in zip(header, row)} for row in rows), key=lambda row: row['id'])
+
+    def download(self, client=None, **extra):
+        response = (client or self.client).get(self.url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    @override_settings(TECHNICIAN_EXPORT_CHUNK_SIZE=2)
+    def test_csv(self):
+        response, body = self.download()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            response['Content-Disposition'], f'attachment; filename="technicians-{self.company.pk}.csv"'
+        )
+        reader = csv.DictReader(io.StringIO(body))
+        self.assertEqual(reader.fieldnames, [column for column, _ in export.COLUMNS])
+        self.assertEqual(sorted(reader, key=lambda row: row['id']), self.expected())
+
+    @override_settings(TECHNICIAN_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson(self):
+        for extra in ({'HTTP_ACCEPT': 'application/x-ndjson'}, {'QUERY_STRING': 'format=ndjson'}):
+            with self.subTest(extra):
+                response, body = self.download(**extra)
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                rows = [json.loads(line) for line in body.splitlines()]
+                self.assertEqual(sorted(rows, key=lambda row: row['id']), self.expected())
+
+    def test_formula_cells_are_quoted_in_csv_only(self):
+        technician = self.company.technicians.select_related('user').first()
+        technician.specialization = '=HYPERLINK("http://example.com")'
+        technician.save()
+
+        _, body = self.download()
+        exported = {row['id']: row for row in csv.DictReader(io.StringIO(body))}[str(technician.pk)]
+        self.assertEqual(exported['specialization'], '\'=HYPERLINK("http://example.com")')
+        # Phone numbers keep their leading +
+        self.assertEqual(exported['phone_number'], technician.user.phone_number)
+
+        _, body = self.download(HTTP_ACCEPT='application/x-ndjson')
+        exported = {row['id']: row for row in map(json.loads, body.splitlines())}[str(technician.pk)]
+        self.assertEqual(exported['specialization'], technician.specialization)
+
+    def test_spreadsheet_safe(self):
+        for value, expected in [
+            ('=1+1', "'=1+1"), ('@SUM(A1)', "'@SUM(A1)"), ('-2+3', "'-2+3"), ('\tcmd', "'\tcmd"),
+            ('+254700000000', '+254700000000'), ('-5', '-5'), ('Lifts', 'Lifts'), ('', ''), (None, None), (3, 3),
+        ]:
+            with self.subTest(value):
+                self.assertEqual(export.spreadsheet_safe(value), expected)
+
+    def test_access(self):
+        superuser = client_for(create_user('admin', superuser=True))
+        _, body = self.download(client=superuser)
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body)))), 3)
+
+        other_admin = client_for(create_company().admin_user)
+        self.assertEqual(other_admin.get(self.url).status_code, 404)
+        technician = client_for(self.company.technicians.first().user)
+        self.assertEqual(technician.get(self.url).status_code, 403)
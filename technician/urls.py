@@ -1,8 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TechnicianViewSet
+from .views import AsyncTechnicianListView, TechnicianViewSet
 
 router = DefaultRouter()
 router.register(r'technicians', TechnicianViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    # Async read path for ASGI deployments
+    path('async/technicians/', AsyncTechnicianListView.as_view(), name='technician-list-async'),
+]
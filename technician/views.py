@@ -1,26 +1,51 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.core import exceptions
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
 from django_filters.rest_framework import DjangoFilterBackend
 
+from Account_User.async_views import AsyncAPIView
+from Account_User.mixins import (
+    EagerLoadingViewSetMixin, MultiGetViewSetMixin, ProjectedListViewSetMixin, QueuedWriteViewSetMixin,
+    ReplicaReadViewSetMixin, StreamingListViewSetMixin
+)
+from Account_User.search import FullTextSearchFilter
+from Mtambo_BackendApis.pagination import KeysetPagination
+from maintenance_company import context
 from maintenance_company.permissions import IsSuperUser, IsMaintenanceCompanyAdmin, IsAccountOwnerOrAdmin, IsOwnerOrSuperuser
+from . import export
 from .models import TechnicianProfile
 from .serializers import TechnicianProfileSerializer, TechnicianCreateSerializer
 
 
-class TechnicianViewSet(viewsets.ModelViewSet):
+class TechnicianViewSet(
+    ReplicaReadViewSetMixin,
+    QueuedWriteViewSetMixin,
+    StreamingListViewSetMixin,
+    ProjectedListViewSetMixin,
+    EagerLoadingViewSetMixin,
+    MultiGetViewSetMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for TechnicianProfile model.
     Provides CRUD operations with proper permission handling.
     """
     queryset = TechnicianProfile.objects.all()
     serializer_class = TechnicianProfileSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    # The search filter runs last so it can rank results when no ordering is requested
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     search_fields = ['user__first_name', 'user__last_name', 'user__email', 'specialization']
+    search_entity_type = 'technician'
     filterset_fields = ['maintenance_company']
     ordering_fields = ['user__first_name', 'user__last_name', 'user__created_at']
     ordering = ['user__first_name']
+    replica_actions = ('list', 'retrieve', 'export')
     
     def get_queryset(self):
         """
@@ -36,16 +61,14 @@ class TechnicianViewSet(viewsets.ModelViewSet):
             
         # For maintenance admins, show only technicians in their company
         if self.request.user.account_type == 'maintenance':
-            from maintenance_company.models import MaintenanceCompanyProfile
-            try:
-                company = MaintenanceCompanyProfile.objects.get(admin_user=self.request.user)
-                return queryset.filter(maintenance_company=company)
-            except MaintenanceCompanyProfile.DoesNotExist:
+            company_id = context.get_company_id(self.request)
+            if company_id is None:
                 return TechnicianProfile.objects.none()
+            return queryset.filter(maintenance_company_id=company_id)
         
         # For technicians, show only their own profile
         if self.request.user.account_type == 'technician':
-            return queryset.filter(user=self.request.user)
+            return queryset.filter(user_id=self.request.user.pk)
                 
         return TechnicianProfile.objects.none()
     
@@ -62,6 +85,8 @@ class TechnicianViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated, IsAccountOwnerOrAdmin]
         elif self.action in ['list', 'retrieve']:
             permission_classes = [IsAuthenticated, IsAccountOwnerOrAdmin]
+        elif self.action == 'export':
+            permission_classes = [IsAuthenticated, IsSuperUser]
         else:
             permission_classes = [IsAuthenticated]
             
@@ -72,16 +97,12 @@ class TechnicianViewSet(viewsets.ModelViewSet):
         When creating a technician from this viewset directly,
         associate with the maintenance company if applicable.
         """
-        from maintenance_company.models import MaintenanceCompanyProfile
-        
         # If created by a maintenance company admin
         if self.request.user.account_type == 'maintenance':
-            try:
-                company = MaintenanceCompanyProfile.objects.get(admin_user=self.request.user)
+            company = context.get_company(self.request)
+            if company is not None:
                 serializer.save(maintenance_company=company)
                 return
-            except MaintenanceCompanyProfile.DoesNotExist:
-                pass
                 
         serializer.save()
     
@@ -91,14 +112,11 @@ class TechnicianViewSet(viewsets.ModelViewSet):
         Create a new technician with user account.
         Used by maintenance company admins to add technicians.
         """
-        from maintenance_company.models import MaintenanceCompanyProfile
-        
         # Get the maintenance company if applicable
         maintenance_company = None
         if request.user.account_type == 'maintenance':
-            try:
-                maintenance_company = MaintenanceCompanyProfile.objects.get(admin_user=request.user)
-            except MaintenanceCompanyProfile.DoesNotExist:
+            maintenance_company = context.get_company(request)
+            if maintenance_company is None:
                 return Response(
                     {"error": "Maintenance company profile not found"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -116,4 +134,60 @@ class TechnicianViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_201_CREATED
             )
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], renderer_classes=export.RENDERER_CLASSES)
+    @method_decorator(gzip_page)
+    def export(self, request):
+        """
+        Stream every technician, after the usual filters and search, as CSV
+        (the default) or NDJSON, chosen with Accept or ?format=.
+        """
+        self.eager_loading = False
+        queryset = self.filter_queryset(self.get_queryset())
+        return export.export_technicians(queryset, request.accepted_renderer.format, 'technicians')
+
+
+class AsyncTechnicianListView(AsyncAPIView):
+    """
+    TechnicianViewSet.list on the async ORM, with the same visibility rules,
+    ordering and keyset pagination. It filters by `maintenance_company`;
+    full-text `search` stays on the sync endpoint.
+    """
+    permission_classes = [IsAuthenticated]
+    ordering_fields = TechnicianViewSet.ordering_fields
+    ordering = TechnicianViewSet.ordering
+
+    async def get_queryset(self, request):
+        queryset = TechnicianProfileSerializer.setup_eager_loading(TechnicianProfile.objects.all())
+
+        if request.user.is_superuser:
+            return queryset
+
+        if request.user.account_type == 'maintenance':
+            company_id = await context.aget_company_id(request)
+            if company_id is None:
+                return TechnicianProfile.objects.none()
+            return queryset.filter(maintenance_company_id=company_id)
+
+        if request.user.account_type == 'technician':
+            return queryset.filter(user_id=request.user.pk)
+
+        return TechnicianProfile.objects.none()
+
+    def filter_queryset(self, request, queryset):
+        company_id = request.query_params.get('maintenance_company')
+        if company_id:
+            try:
+                company_id = TechnicianProfile._meta.get_field('maintenance_company').to_python(company_id)
+            except exceptions.ValidationError:
+                raise ValidationError({'maintenance_company': ['Select a valid choice.']})
+            queryset = queryset.filter(maintenance_company_id=company_id)
+        return filters.OrderingFilter().filter_queryset(request, queryset, self)
+
+    async def get(self, request):
+        queryset = self.filter_queryset(request, await self.get_queryset(request))
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = TechnicianProfileSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)